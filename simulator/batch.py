@@ -0,0 +1,199 @@
+"""
+Batch grading of sketches. Every sketch of a directory (.ino or .txt)
+is transpiled and run headlessly on the chosen robot and circuit, in
+a pool of processes, and a report (JSON or CSV) is written with the
+errors, the warnings, the completion time and the track adherence
+of each one.
+
+Usage (from the root of the project):
+    python simulator/batch.py sketches/ --robot mobile2 --circuit circuit
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import compiler.cache as compile_cache
+import compiler.transpiler as transpiler
+import simulation.engine as engine
+
+EXTENSIONS = (".ino", ".txt")
+CSV_FIELDS = ["file", "compiled", "errors", "warnings", "runtime_errors", "finished",
+              "completion_ms", "simulated_ms", "track_adherence", "duplicate_of"]
+
+
+def find_sketches(directory):
+    """
+    Returns the paths of the sketches of a directory, sorted
+    Arguments:
+        directory: the directory
+    """
+    paths = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and name.lower().endswith(EXTENSIONS):
+            paths.append(path)
+    return paths
+
+
+def track_adherence(trace):
+    """
+    Returns the fraction of the samples in which at least one
+    light sensor was over the track, None if the robot has no
+    light sensors
+    Arguments:
+        trace: the samples of the execution
+    """
+    samples = [sample["light"] for sample in trace if "light" in sample]
+    if len(samples) == 0:
+        return None
+    on_track = sum(1 for light in samples if 1 in light)
+    return on_track / len(samples)
+
+
+def grade(code, robot, circuit, time_ms):
+    """
+    Transpiles and runs a sketch
+    Arguments:
+        code: the Arduino code of the sketch
+        robot: the name of the robot
+        circuit: the name of the circuit
+        time_ms: the simulated time the sketch is run
+    Returns:
+        A dictionary with the results
+    """
+    sim = engine.HeadlessEngine(robot, circuit, time_limit_ms=time_ms)
+    result = {
+        "compiled": False,
+        "errors": [],
+        "warnings": [],
+        "runtime_errors": [],
+        "finished": False,
+        "completion_ms": None,
+        "simulated_ms": 0,
+        "track_adherence": None
+    }
+    try:
+        compiled = sim.load(code)
+    except Exception as e:
+        result["errors"].append("Error de compilación: {}".format(e))
+        return result
+    result["errors"] = [error.to_string() for error in sim.errors]
+    result["warnings"] = [warning.to_string() for warning in sim.warnings]
+    result["compiled"] = len(sim.errors) == 0
+    if compiled:
+        sim.run_until(time_ms)
+    result["runtime_errors"] = [m[1] for m in sim.console.messages if m[0] == "error"]
+    result["simulated_ms"] = sim.time_ms
+    if result["compiled"] and not sim.is_running() and not sim.timed_out:
+        result["finished"] = True
+        result["completion_ms"] = sim.time_ms
+    result["track_adherence"] = track_adherence(sim.trace)
+    sim.stop()
+    return result
+
+
+def _init_worker(cache_dir, warm_up=False):
+    """
+    Prepares a process of the pool
+    Arguments:
+        cache_dir: the directory of the compilation cache
+        shared by the processes (None if there is none)
+        warm_up: True to warm the parser in the process (when it
+        is not forked from a warmed parent)
+    """
+    if cache_dir is not None:
+        transpiler.cache = compile_cache.CompileCache(directory=cache_dir)
+    if warm_up:
+        transpiler.warm_up()
+
+
+def run(paths, robot="mobile2", circuit="circuit", time_ms=60000, workers=None, cache_dir=None):
+    """
+    Grades a list of sketches. The sketches with the same code
+    are only run once
+    Arguments:
+        paths: the paths of the sketches
+        robot: the name of the robot
+        circuit: the name of the circuit
+        time_ms: the simulated time each sketch is run
+        workers: the number of processes (the number of CPUs if None)
+        cache_dir: the directory of the compilation cache
+    Returns:
+        The list of results, in the same order as the paths
+    """
+    codes = {}
+    originals = {}
+    results = []
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as file:
+            code = file.read()
+        key = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        codes[path] = code
+        results.append({"file": os.path.basename(path), "duplicate_of": None})
+        if key in originals:
+            results[-1]["duplicate_of"] = os.path.basename(originals[key])
+        else:
+            originals[key] = path
+    # Forked processes inherit the DFA of the parser warmed here
+    forked = multiprocessing.get_start_method() == "fork"
+    if forked:
+        transpiler.warm_up()
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=_init_worker,
+                                                initargs=(cache_dir, not forked)) as pool:
+        futures = {path: pool.submit(grade, codes[path], robot, circuit, time_ms)
+                   for path in originals.values()}
+        graded = {}
+        for path, future in futures.items():
+            try:
+                graded[os.path.basename(path)] = future.result()
+            except Exception as e:
+                graded[os.path.basename(path)] = {"compiled": False, "errors": [str(e)]}
+    for result in results:
+        result.update(graded[result["duplicate_of"] or result["file"]])
+    return results
+
+
+def write_report(results, output):
+    """
+    Writes the report. The format is CSV if the extension of the
+    file is .csv, JSON if else
+    Arguments:
+        results: the results of run
+        output: the path of the report
+    """
+    if output.lower().endswith(".csv"):
+        with open(output, "w", encoding="utf-8", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for result in results:
+                row = dict(result)
+                for field in ("errors", "warnings", "runtime_errors"):
+                    row[field] = len(result.get(field, []))
+                writer.writerow(row)
+    else:
+        with open(output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4, ensure_ascii=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corrige en lote los sketches de un directorio")
+    parser.add_argument("directory", help="directorio con los sketches (.ino o .txt)")
+    parser.add_argument("--robot", choices=engine.ROBOTS, default="mobile2")
+    parser.add_argument("--circuit", choices=engine.CIRCUITS, default="circuit")
+    parser.add_argument("--time", type=int, default=60000, help="tiempo simulado (ms)")
+    parser.add_argument("--workers", type=int, default=None, help="número de procesos")
+    parser.add_argument("--cache-dir", default=None, help="directorio de la caché de compilación")
+    parser.add_argument("--output", default="report.json", help="informe (.json o .csv)")
+    args = parser.parse_args(argv)
+    results = run(find_sketches(args.directory), args.robot, args.circuit,
+                  args.time, args.workers, args.cache_dir)
+    write_report(results, args.output)
+    print("{} sketches corregidos -> {}".format(len(results), args.output))
+
+
+if __name__ == '__main__':
+    main()
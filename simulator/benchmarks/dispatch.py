@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of the dispatch of the AST visitors. Walks the AST of
+every sketch of tests/file-tests with the names of the visitor methods
+computed on every visit (as ASTNode.accept used to do, with a regex)
+and with the names cached by the BaseType metaclass.
+
+Usage (from the root of the project):
+    python simulator/benchmarks/dispatch.py [repetitions]
+"""
+
+import glob
+import re
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+from antlr4 import *
+from compiler.ArduinoLexer import ArduinoLexer
+from compiler.ArduinoParser import ArduinoParser
+import compiler.ast as ast
+import compiler.ast_builder_visitor as ast_builder_visitor
+import compiler.ast_visitor as ast_visitor
+
+
+def regex_accept(self, visitor, param):
+    """
+    The dispatch of ASTNode.accept before the names were cached
+    """
+    NAME = re.compile(r'([A-Z][a-z]+)')
+    name = '_'.join([i.lower() for i in NAME.findall(str(type(self)))
+                     if not i == "Node"])
+    if name:
+        return getattr(visitor, f'visit_{name}')(self, param)
+    else:
+        raise Exception("Warning!")
+
+
+def load_programs(pattern="tests/file-tests/*.txt"):
+    """
+    Builds the AST of the sketches that can be walked by the
+    ASTVisitor
+    Returns:
+        A list of tuples with the file name and the AST
+    """
+    programs = []
+    for file_name in sorted(glob.glob(pattern)):
+        parser = ArduinoParser(CommonTokenStream(ArduinoLexer(FileStream(file_name, encoding="utf-8"))))
+        parser.removeErrorListeners()
+        try:
+            program = ast_builder_visitor.ASTBuilderVisitor().visitProgram(parser.program())
+            ast_visitor.ASTVisitor().visit_program(program, None)
+        except Exception:
+            continue
+        programs.append((file_name, program))
+    return programs
+
+
+def walk(programs, repetitions):
+    """
+    Walks all the programs a number of times
+    Returns:
+        The seconds it took
+    """
+    visitor = ast_visitor.ASTVisitor()
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for _, program in programs:
+            visitor.visit_program(program, None)
+    return time.perf_counter() - start
+
+
+def main(repetitions=200):
+    programs = load_programs()
+    cached_accept = ast.ASTNode.accept
+    ast.ASTNode.accept = regex_accept
+    try:
+        regex_time = walk(programs, repetitions)
+    finally:
+        ast.ASTNode.accept = cached_accept
+    cached_time = walk(programs, repetitions)
+    print("{} programs, {} repetitions".format(len(programs), repetitions))
+    print("regex dispatch:  {:.3f} s".format(regex_time))
+    print("cached dispatch: {:.3f} s".format(cached_time))
+    print("speedup: {:.1f}x".format(regex_time / cached_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,86 @@
+"""
+Benchmark of the line sensor queries. For every circuit of
+robot_data.json checks the same random points (around the pieces of the
+circuit, where the sensors are) with the geometric test, that goes
+through all the pieces, and with the occupancy map: one point at a time,
+in batches of four points (the sensors of the robot) and all the points
+in a single batch. The times are per point.
+
+Usage (from the root of the project):
+    python simulator/benchmarks/occupancy.py [points] [resolution]
+"""
+
+import random
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import files.files_reader as filesr
+import graphics.drawing as drawing
+import graphics.robot_drawings as robot_drawings
+import simulation.occupancy as occupancy
+
+BATCH = 4
+
+
+def sample_points(circuit, count, margin=200):
+    """
+    Returns random integer points in the boxes of the pieces
+    of a circuit, with a margin around them
+    """
+    rng = random.Random(0)
+    boxes = [part.bounds() for part in circuit.circuit_parts]
+    points = []
+    for _ in range(count):
+        x0, y0, x1, y1 = rng.choice(boxes)
+        points.append((rng.randint(int(x0) - margin, int(x1) + margin),
+                       rng.randint(int(y0) - margin, int(y1) + margin)))
+    return points
+
+
+def measure(function, points):
+    start = time.perf_counter()
+    results = [function(x, y) for x, y in points]
+    return time.perf_counter() - start, results
+
+
+def measure_batches(circuit, points, size):
+    start = time.perf_counter()
+    results = []
+    for i in range(0, len(points), size):
+        batch = points[i:i + size]
+        results.extend(circuit.are_overlapping([x for x, _ in batch], [y for _, y in batch]))
+    return time.perf_counter() - start, results
+
+
+def main(count=20000, resolution=occupancy.RESOLUTION):
+    reader = filesr.RobotDataReader()
+    print("{} points per circuit, resolution {}".format(count, resolution))
+    print("{:<22} {:>6} {:>9} {:>10} {:>10} {:>10} {:>10} {:>9}".format(
+        "circuit", "pieces", "map (ms)", "geom (us)", "map (us)",
+        "{} (us)".format(BATCH), "all (us)", "mismatch"))
+    for data in reader.circuits:
+        parts, _ = reader.parse_circuit(data["name"])
+        start = time.perf_counter()
+        circuit = robot_drawings.Circuit(parts, drawing.HeadlessDrawing(), resolution)
+        build_time = time.perf_counter() - start
+        if not circuit.circuit_parts:
+            continue
+        points = sample_points(circuit, count)
+        geometric_time, expected = measure(circuit.check_overlap, points)
+        map_time, results = measure(circuit.is_overlapping, points)
+        batch_time, batch_results = measure_batches(circuit, points, BATCH)
+        all_time, all_results = measure_batches(circuit, points, count)
+        mismatches = sum(bool(a) != b for a, b in zip(expected, results))
+        mismatches += sum(a != b for a, b in zip(results, batch_results))
+        mismatches += sum(a != b for a, b in zip(results, all_results))
+        print("{:<22} {:>6} {:>9.1f} {:>10.2f} {:>10.2f} {:>10.2f} {:>10.2f} {:>9}".format(
+            data["name"], len(circuit.circuit_parts), build_time * 1000,
+            geometric_time / count * 1000000, map_time / count * 1000000,
+            batch_time / count * 1000000, all_time / count * 1000000, mismatches))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -15,9 +15,24 @@ def generate_setter(name):
     return lambda self, value: setattr(self, name, value)
 
 
+NAME = re.compile(r'([A-Z][a-z]+)')
+
+
+def visit_name(clsname):
+    '''
+    Returns the name of the visitor method of a class (NameNode is
+    visited by visit_name), or None if the class has no name to visit
+    '''
+    name = '_'.join([i.lower() for i in NAME.findall(clsname) if not i == "Node"])
+    if name:
+        return f'visit_{name}'
+    return None
+
+
 class BaseType(type):
     '''
-    This base adds setters to all the classes
+    This base adds setters to all the classes, and computes
+    the name of the visitor method of the class only once
     '''
     def __new__(cls, clsname, bases, clsdict):
         new_dict = dict()
@@ -25,7 +40,9 @@ class BaseType(type):
             if not callable(val) and '__' not in name:
                 new_dict[f'set_{name}'] = generate_setter(name)
         clsdict.update(new_dict)
-        return super().__new__(cls, clsname, bases, clsdict)
+        new_cls = super().__new__(cls, clsname, bases, clsdict)
+        new_cls._visit_name = visit_name(clsname)
+        return new_cls
 
 
 @dataclass
@@ -37,13 +54,12 @@ class ASTNode(metaclass=BaseType):
     def accept(self, visitor, param):
         '''
         This method take the name of the class which must be NameNode and then
-        apply the method named visitor.visit_name(param)
+        apply the method named visitor.visit_name(param). The name is
+        computed when the class is created (see BaseType)
         '''
-        NAME = re.compile(r'([A-Z][a-z]+)')
-        name = '_'.join([i.lower() for i in NAME.findall(str(type(self)))
-                         if not i == "Node"])
+        name = self._visit_name
         if name:
-            return getattr(visitor, f'visit_{name}')(self, param)
+            return getattr(visitor, name)(self, param)
         else:
             raise Exception("Warning!")
             print(f"Warning: {type(self)}.accept called from ASTNode!")
@@ -0,0 +1,163 @@
+"""
+Content addressed cache of the compilations. A sketch is identified
+by the hash of its code, the libraries known by the compiler, the
+version of the compiler and the bytecode version of Python, so an unchanged sketch is not transpiled
+again. The entries are kept in memory (the least recently used
+ones are discarded) and, optionally, in a directory.
+"""
+
+import collections
+import hashlib
+import importlib.util
+import marshal
+import os
+import pickle
+import libraries.libs as libraries
+
+# Change it whenever the generated code or the diagnostics change
+COMPILER_VERSION = "2"
+# The code objects are stored with marshal, whose format changes with Python
+BYTECODE_VERSION = importlib.util.MAGIC_NUMBER.hex()
+
+_library_signature = None
+
+
+def library_signature():
+    """
+    Returns a string that identifies the libraries (and their
+    methods) known by the compiler
+    """
+    global _library_signature
+    if _library_signature is None:
+        manager = libraries.LibraryManager()
+        signature = []
+        for name in sorted(manager.get_libraries()):
+            methods = manager.library_methods.get(name, {})
+            not_impl = manager.library_not_impl.get(name, [])
+            signature.append((name, sorted(methods), sorted(not_impl)))
+        _library_signature = repr(signature)
+    return _library_signature
+
+
+class CompileCache:
+
+    def __init__(self, max_entries=64, directory=None):
+        """
+        Constructor for the cache
+        Arguments:
+            max_entries: the maximum number of compilations kept
+            in memory
+            directory: the directory where the compilations are
+            stored, None if they are only kept in memory
+        """
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def key(self, code):
+        """
+        Returns the key of a sketch
+        Arguments:
+            code: the Arduino code of the sketch
+        """
+        content = "\0".join([COMPILER_VERSION, BYTECODE_VERSION, library_signature(), code])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, code):
+        """
+        Searches the compilation of a sketch
+        Arguments:
+            code: the Arduino code of the sketch
+        Returns:
+            A tuple with the warnings, the errors and the code object
+            of the program, or None if the sketch is not cached
+        """
+        key = self.key(code)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.__load(key)
+            if entry is not None:
+                self.__store(key, entry)
+        else:
+            self.entries.move_to_end(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        warns, errors, program = entry
+        return list(warns), list(errors), program
+
+    def put(self, code, warns, errors, program):
+        """
+        Saves the compilation of a sketch
+        Arguments:
+            code: the Arduino code of the sketch
+            warns: the warnings
+            errors: the errors
+            program: the code object of the program (None if
+            there are errors)
+        """
+        key = self.key(code)
+        entry = (list(warns), list(errors), program)
+        self.__store(key, entry)
+        if self.directory is not None:
+            self.__save(key, entry)
+
+    def clear(self):
+        """
+        Removes all the compilations kept in memory
+        """
+        self.entries.clear()
+
+    def __store(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def __save(self, key, entry):
+        """
+        Writes an entry into the directory. The code object is
+        serialized with marshal, the diagnostics with pickle
+        """
+        warns, errors, program = entry
+        data = {
+            "warns": warns,
+            "errors": errors,
+            "program": marshal.dumps(program) if program is not None else None
+        }
+        path = self.__path(key)
+        temp_path = "{}.{}".format(path, os.getpid())
+        with open(temp_path, "wb") as file:
+            pickle.dump(data, file)
+        os.replace(temp_path, path)
+
+    def __load(self, key):
+        """
+        Reads an entry from the directory
+        Returns:
+            The entry or None if it is not there (or is corrupt)
+        """
+        if self.directory is None:
+            return None
+        try:
+            with open(self.__path(key), "rb") as file:
+                data = pickle.load(file)
+            program = data["program"]
+            warns, errors = data["warns"], data["errors"]
+        except (OSError, EOFError, ValueError, KeyError, pickle.UnpicklingError):
+            return None
+        if program is not None:
+            try:
+                program = marshal.loads(program)
+            except Exception:
+                # Written by another version of Python
+                return None
+        return warns, errors, program
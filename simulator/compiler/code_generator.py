@@ -7,7 +7,7 @@ into a transpiler
 import compiler.ast as ast
 import compiler.ast_visitor as ast_visitor
 import libraries.libs as libraries
-import os
+import io
 
 
 class CodeGenerator(ast_visitor.ASTVisitor):
@@ -16,27 +16,30 @@ class CodeGenerator(ast_visitor.ASTVisitor):
 
     continue_line = False
 
-    def __init__(self, library_manager):
+    def __init__(self, library_manager, function_definer=None):
         """
         Constructor for code generator.
         Uses the ASTVisitor implementation. The pattern used
         is visitor.
+        Arguments:
+            library_manager: the library manager
+            function_definer: a FunctionDefiner that has already
+            visited the program (during another pass), None if
+            the code generator has to run it
         """
         self.script_tabs = 0
         self.library_manager: libraries.LibraryManager = library_manager
         self.globals = []
         self.functions = {}
-        self.function_visitor = FunctionDefiner()
-        try:
-            os.mkdir('temp')
-        except FileExistsError:
-            pass
-        open('temp/__init__.py', 'a').close()
+        self.functions_ready = function_definer is not None
+        self.function_visitor = function_definer if self.functions_ready else FunctionDefiner()
+        self.source = ""
 
     def visit_program(self, program: ast.ProgramNode, param):
-        self.function_visitor.visit_program(program, param)
+        if not self.functions_ready:
+            self.function_visitor.visit_program(program, param)
         self.functions = self.function_visitor.functions
-        self.script = open("temp/script_arduino.py", 'w', encoding='utf-8')
+        self.script = io.StringIO()
         self.write_to_script("import libraries.standard as standard")
         self.write_endl()
         self.write_to_script("import libraries.serial as Serial")
@@ -53,9 +56,29 @@ class CodeGenerator(ast_visitor.ASTVisitor):
             self.write_endl()
         for c in program.code:
             c.accept(self, param)
+        self.source = self.script.getvalue()
         self.script.close()
         return None
 
+    def compile(self, file_name="<sketch>"):
+        """
+        Compiles the generated Python code
+        Arguments:
+            file_name: the name of the file shown in the tracebacks
+        Returns:
+            The code object of the program
+        """
+        return compile(self.source, file_name, "exec")
+
+    def dump(self, path):
+        """
+        Writes the generated Python code into a file, for debugging
+        Arguments:
+            path: the path of the file
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.source)
+
     def visit_include(self, program: ast.IncludeNode, param):
         imported = str(program.file_name[:-2])
         library = "libraries.{}".format(str(imported).lower())
@@ -494,17 +517,11 @@ class CodeGenerator(ast_visitor.ASTVisitor):
             self.write_to_script(id_node.value)
         else:
             if param == self.FUNCTION_CALL:
-                method = None
-                lib = None
-                for key in self.library_manager.library_methods:
-                    lib = key
-                    method = self.library_manager.find(key, id_node.value)
-                    if method is not None:
-                        method = method[1]
-                        break
-                if method is not None:
+                found = self.library_manager.lookup(id_node.value)
+                if found is not None:
+                    lib, method = found
                     self.write_to_script(
-                        "{}.{}".format(str(lib).lower(), method))
+                        "{}.{}".format(str(lib).lower(), method[1]))
                 else:
                     return id_node.value
         return None
@@ -543,19 +560,35 @@ class CodeGenerator(ast_visitor.ASTVisitor):
             elem = member_access.element.value
         if member_access.member is not None:
             method = member_access.member.value
-            for key in self.library_manager.library_methods:
-                found_method = self.library_manager.find(key, method)
-                if found_method is not None:
-                    if found_method[3] != -1:
-                        var = member_access.function_call.parameters[found_method[3]].value
-                        self.write_to_script("{} = {}.{}".format(
-                            var, elem, found_method[1]))
-                    else:
-                        self.write_to_script(
-                            "{}.{}".format(elem, found_method[1]))
-                    break
+            found = self.library_manager.lookup(method, self.__library_of(member_access.element))
+            if found is not None:
+                found_method = found[1]
+                if found_method[3] != -1:
+                    var = member_access.function_call.parameters[found_method[3]].value
+                    self.write_to_script("{} = {}.{}".format(
+                        var, elem, found_method[1]))
+                else:
+                    self.write_to_script(
+                        "{}.{}".format(elem, found_method[1]))
         return None
 
+    def __library_of(self, element):
+        """
+        Returns the name of the library of the object whose
+        method is called, so methods with the same name in several
+        libraries (like read or write) are told apart
+        Arguments:
+            element: the object of the member access
+        Returns:
+            The name of the library, or None if it is not known
+        """
+        elem_type = getattr(element, "type", None)
+        if isinstance(elem_type, ast.StringTypeNode):
+            return "String"
+        if isinstance(elem_type, ast.IDTypeNode):
+            return elem_type.type_name
+        return getattr(element, "value", None)
+
     def visit_return(self, return_p: ast.ReturnNode, param):
         self.write_to_script("return ")
         if return_p.expression is not None:
@@ -586,8 +619,8 @@ class CodeGenerator(ast_visitor.ASTVisitor):
 
     def write_to_script(self, sentence):
         """
-        Writes a sentence into a python script, which will be
-        the transpiled Arduino code.
+        Writes a sentence into the python script (kept in memory),
+        which will be the transpiled Arduino code.
         Arguments:
             sentence: the sentence to write
             endl: True if the line ends, False if not
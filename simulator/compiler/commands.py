@@ -1,24 +1,21 @@
 import json
 import traceback
-import importlib.util
-import sys
-import time
+import types
 import output.console as console
 import compiler.transpiler as transpiler
 import libraries.standard as standard
 import libraries.serial as serial
 import robot_components.robot_state as state
-import requests
+import output.telemetry as telemetry
 
 module = None
+program = None
 
 
 def _import_module():
     global module
-    spec = importlib.util.spec_from_file_location('temp.script_arduino', 'temp/script_arduino.py')
-    module = importlib.util.module_from_spec(spec)
-    sys.modules['temp.script_arduino'] = module
-    spec.loader.exec_module(module)
+    module = types.ModuleType('script_arduino')
+    exec(program, module.__dict__)
 
 
 class Command:
@@ -38,7 +35,7 @@ class Command:
 
     def prepare_exec(self):
         standard.board = self.controller.robot_layer.robot.board
-        standard.state = state.State()
+        standard.state = state.State(self.controller.clock)
         serial.cons = self.controller.console
         self.ready = True
 
@@ -49,82 +46,115 @@ class ExecutionInfo(object):
 
 class Compile(Command):
 
-    def __init__(self, controller, username, lab, group):
+    def __init__(self, controller, username, lab, group, uploader=None):
         super().__init__(controller)
         self.username = username
         self.lab = lab
         self.group = group
+        self.uploader: telemetry.Uploader = uploader
 
     def execute(self):
+        result = self.compile(self.controller.get_code())
+        if result is not None:
+            self.send(self.controller.get_code(), result[0], result[1])
+        return self.finish(result)
+
+    def compile(self, code):
+        """
+        Transpiles the code. It does not use the GUI, so it can
+        run in a background thread
+        Arguments:
+            code: the Arduino code
+        Returns:
+            A tuple with the warnings, the errors and the program,
+            None if the sketch could not be compiled
+        """
         try:
             #aqui se obtienen los warns y los errores
             #login de uos
             #scikit learn
-            warns, errors = transpiler.transpile(self.controller.get_code())
-
-            errores = []
-            warnings = []
-
-            for e in errors:
-                errores.append({
-                    "columna": e.column,
-                    "linea": e.line,
-                    "mensaje": e.message,
-                    "tipoError": e.r_type,
-                    "error": e.to_string
-                })
-
-            for e in warns:
-                warnings.append({
-                    "columna": e.column,
-                    "linea": e.line,
-                    "mensaje": e.message,
-                    "tipoError": e.r_type,
-                    "error": e.to_string
-                })
-
-            infoeje = ExecutionInfo()
-            infoeje.warns = warnings
-            infoeje.errores = errores
-            infoeje.codigo = self.controller.get_code()
-
-            infoeje.username = self.username
-            infoeje.lab = self.lab
-            infoeje.group = self.group
-
-            try:
-                r = requests.post('http://147.189.171.97:8000/insertaEjecucion',
-                                 headers={'Accept': 'application/json'}, json=infoeje.toJSON())
+            return transpiler.transpile(code)
+        except Exception as e:
+            print(f'la excepción es {e}')
+            traceback.print_exc()
+            return None
 
-                print(r)
-            except requests.exceptions.ConnectionError as ce:
-                print(f'la excepción es {ce}')
-                traceback.print_exc()
+    def send(self, code, warns, errors):
+        """
+        Queues the information of the execution to be sent to the
+        server by the uploader. It does not block
+        Arguments:
+            code: the Arduino code
+            warns: the warnings of the compilation
+            errors: the errors of the compilation
+        """
+        errores = []
+        warnings = []
+
+        for e in errors:
+            errores.append({
+                "columna": e.column,
+                "linea": e.line,
+                "mensaje": e.message,
+                "tipoError": e.r_type,
+                "error": e.to_string
+            })
+
+        for e in warns:
+            warnings.append({
+                "columna": e.column,
+                "linea": e.line,
+                "mensaje": e.message,
+                "tipoError": e.r_type,
+                "error": e.to_string
+            })
+
+        infoeje = ExecutionInfo()
+        infoeje.warns = warnings
+        infoeje.errores = errores
+        infoeje.codigo = code
+
+        infoeje.username = self.username
+        infoeje.lab = self.lab
+        infoeje.group = self.group
+
+        if self.uploader is not None:
+            self.uploader.submit(json.loads(infoeje.toJSON()))
+            if self.uploader.failures > 0:
                 self.controller.console.write_error(
                     console.Error("Error de conexión", 0, 0, "El sketch no se ha podido enviar correctamente y"
                                                              " se ha guardado la información de la ejecución en el "
-                                                             "archivo executions.txt. Si es necesario"
+                                                             "archivo " + telemetry.SPOOL + ". Si es necesario"
                                                              " avisa a tu profesor"))
+            if self.uploader.is_failing():
+                self.controller.console.write_error(
+                    console.Error("Error de conexión", 0, 0,
+                                  "Las ejecuciones del archivo " + telemetry.SPOOL + " no se han podido enviar"
+                                  " tras {} intentos. Si es necesario avisa a tu profesor".format(
+                                      self.uploader.failures)))
 
-                with open('executions.txt', 'a') as file:
-                    file.write(infoeje.toJSON())
-                    file.write("--------------------------------------------------------")
-                    file.close()
-
-
-
-            if len(errors) > 0:
-                self.print_errors(errors)
-                return False
-            elif len(warns) > 0:
-                self.print_warnings(warns)
-                return True
-            return True
-        except Exception as e:
-            print(f'la excepción es {e}')
-            traceback.print_exc()
+    def finish(self, result):
+        """
+        Shows the result of a compilation in the console and keeps
+        the program to execute it
+        Arguments:
+            result: the result of compile
+        Returns:
+            True if the program can be executed
+        """
+        global program
+        if result is None:
             self.controller.console.write_error(
                 console.Error("Error de compilación", 0, 0, "El sketch no se ha podido compilar correctamente"))
+            return False
+        warns, errors, program = result
+        if len(errors) > 0:
+            self.print_errors(errors)
+            return False
+        elif len(warns) > 0:
+            self.print_warnings(warns)
+            return True
+        return True
 
     def print_warnings(self, warnings):
         for warning in warnings:
@@ -145,7 +175,7 @@ class Setup(Command):
         if not self.ready:
             self.prepare_exec()
             _import_module()
-        curr_time_ns = time.time_ns()
+        curr_time_ns = standard.state.clock.now_ns()
         if (
                 not standard.state.exec_time_us > curr_time_ns / 1000
                 and not standard.state.exec_time_ms > curr_time_ns / 1000000
@@ -167,7 +197,7 @@ class Loop(Command):
         global module
         if not self.ready:
             self.prepare_exec()
-        curr_time_ns = time.time_ns()
+        curr_time_ns = standard.state.clock.now_ns()
         if (
                 not standard.state.exec_time_us > curr_time_ns / 1000
                 and not standard.state.exec_time_ms > curr_time_ns / 1000000
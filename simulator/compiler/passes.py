@@ -0,0 +1,150 @@
+"""
+Pass manager of the compiler. The passes (visitors of the AST) are
+run in the order their dependencies allow, and the time of each
+one is measured. The passes that only collect data from some nodes
+(hooks) don't walk the AST by themselves: their visit methods are
+called during the walk of another pass, so the tree is traversed
+fewer times.
+"""
+
+import time
+
+
+class Pass:
+
+    def __init__(self, name, create, requires=(), hook=False, when=None):
+        """
+        Constructor for a pass
+        Arguments:
+            name: the name of the pass
+            create: a function that returns the visitor of the pass.
+            It is called when the pass is going to run, so it can use
+            the results of the previous passes
+            requires: the names of the passes that must run before
+            hook: True if the visitor only observes the nodes its
+            visit methods receive (it doesn't walk the children), so
+            it can run during the walk of another pass
+            when: a function that returns False if the pass must not
+            run (None if it always runs)
+        """
+        self.name = name
+        self.create = create
+        self.requires = tuple(requires)
+        self.hook = hook
+        self.when = when
+        self.visitor = None
+
+
+class PassManager:
+
+    def __init__(self):
+        """
+        Constructor for the pass manager
+        """
+        self.passes = []
+        self.timings = {}
+        self.walks = 0
+
+    def add(self, name, create, requires=(), hook=False, when=None):
+        """
+        Registers a pass. See Pass for the arguments
+        Returns:
+            The pass
+        """
+        new_pass = Pass(name, create, requires, hook, when)
+        self.passes.append(new_pass)
+        return new_pass
+
+    def run(self, ast):
+        """
+        Runs the passes over the AST. Every hook is fused into the
+        walk of the first pass that runs after its requirements. A
+        pass whose condition is false is skipped, and so are the
+        passes that require it
+        Arguments:
+            ast: the root of the AST (a ProgramNode)
+        """
+        self.timings = {}
+        self.walks = 0
+        done = set()
+        skipped = set()
+        pending_hooks = [p for p in self.passes if p.hook]
+        for walk in self.__order([p for p in self.passes if not p.hook]):
+            if any(r in skipped for r in walk.requires) or (walk.when is not None and not walk.when()):
+                skipped.add(walk.name)
+                continue
+            for hook in [h for h in pending_hooks if h.name in walk.requires]:
+                # The walk needs the results of a hook that could not be fused
+                self.__walk(ast, hook, [])
+                pending_hooks.remove(hook)
+                done.add(hook.name)
+            hooks = [h for h in pending_hooks if all(r in done for r in h.requires)]
+            self.__walk(ast, walk, hooks)
+            for hook in hooks:
+                pending_hooks.remove(hook)
+                done.add(hook.name)
+            done.add(walk.name)
+
+    def report(self):
+        """
+        Returns the time of every pass (of the last run) as
+        a human readable text
+        """
+        return "\n".join("{}: {:.2f} ms".format(name, t * 1000) for name, t in self.timings.items())
+
+    def __order(self, passes):
+        """
+        Sorts the passes so every pass comes after the ones it
+        requires, keeping the order of registration otherwise
+        """
+        hooks = {p.name: p.requires for p in self.passes if p.hook}
+        ordered = []
+        names = set()
+        remaining = list(passes)
+        while remaining:
+            for p in remaining:
+                requires = set()
+                for r in p.requires:
+                    requires.update(hooks.get(r, (r,)))
+                if requires <= names:
+                    ordered.append(p)
+                    names.add(p.name)
+                    remaining.remove(p)
+                    break
+            else:
+                raise ValueError("Circular or missing requirements: {}".format(
+                    [p.name for p in remaining]))
+        return ordered
+
+    def __walk(self, ast, walk, hooks):
+        """
+        Walks the AST with the visitor of a pass, calling the
+        visit methods of the hooks too
+        """
+        start = time.perf_counter()
+        walk.visitor = walk.create()
+        for hook in hooks:
+            hook.visitor = hook.create()
+            self.__fuse(walk.visitor, hook.visitor)
+        walk.visitor.visit_program(ast, None)
+        for attr in [a for a in vars(walk.visitor) if a.startswith("visit_")]:
+            delattr(walk.visitor, attr)
+        name = "+".join([walk.name] + [hook.name for hook in hooks])
+        self.timings[name] = time.perf_counter() - start
+        self.walks += 1
+
+    def __fuse(self, visitor, hook):
+        """
+        Makes the visitor call the visit methods defined by the
+        hook (except visit_program) before its own ones
+        """
+        for attr in vars(type(hook)):
+            if attr.startswith("visit_") and attr != "visit_program":
+                setattr(visitor, attr, self.__chain(getattr(hook, attr), getattr(visitor, attr)))
+
+    @staticmethod
+    def __chain(first, second):
+        def visit(node, param):
+            first(node, param)
+            return second(node, param)
+        return visit
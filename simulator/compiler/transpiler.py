@@ -1,11 +1,16 @@
 # coding: utf-8
 
+import glob
+import os
 import sys
+import threading
+import time
 
 sys.path.append(".")
 sys.path.append("./simulator")
 
 from antlr4 import *
+from antlr4.ListTokenSource import ListTokenSource
 from compiler.ArduinoLexer import ArduinoLexer
 from compiler.ArduinoParser import ArduinoParser
 import compiler.ast_builder_visitor as ast_builder_visitor
@@ -13,57 +18,246 @@ import compiler.error_listener as error_listener
 import compiler.warnings as warnings
 import compiler.semantical_errors as semantical_analysis
 import compiler.code_generator as code_generator
+import compiler.cache as compile_cache
+import compiler.passes as passes
 import libraries.libs as libraries
 
+cache = compile_cache.CompileCache()
+_sessions = threading.local()
+_tokens = None
+# The ANTLR runtime shares the DFA of the lexer and the parser between all
+# their instances without locks, so only one thread lexes or parses at a time
+_antlr_lock = threading.RLock()
+# Sketches parsed by the warm-up, shipped with the application
+WARM_UP_DIR = "assets/warm-up"
+# Number of sketches and time (in seconds) of the warm-up, None if not done
+warm_up_stats = None
 
-def transpile(code):
-    errors = []
-    warns = []
-    input = InputStream(code)
-
-    lexer = ArduinoLexer(input)
-    listener = error_listener.CompilerErrorListener(False)
-    lexer.removeErrorListeners()
-    lexer.addErrorListener(listener)
-
-    stream = CommonTokenStream(lexer)
-    parser = ArduinoParser(stream)
-    parser.removeErrorListeners()
-    parser.addErrorListener(listener)
-
-    visitor = ast_builder_visitor.ASTBuilderVisitor()
-
-    lib_manager = libraries.LibraryManager()
-    warning_analysis = warnings.WarningAnalyzer()
-    sem_analysis = semantical_analysis.Semantic(lib_manager)
-    code_gen = code_generator.CodeGenerator(lib_manager)
-    tree = parser.program()
-    errors.extend(listener.errors)
-    if len(errors) < 1:
-        ast = visitor.visitProgram(tree)
-        sem_analysis.execute(ast)
-        try:
-            errors.extend(sem_analysis.errors)
-        except AttributeError:
-            pass
-        else:
+
+class CompilerSession:
+
+    def __init__(self):
+        """
+        Constructor for a compiler session. The lexer, the parser,
+        the error listener and the library manager are created once
+        and reused by every compilation of the session. A session
+        must only be used by one thread
+        """
+        self.listener = error_listener.CompilerErrorListener(False)
+        self.lexer = ArduinoLexer(InputStream(""))
+        self.lexer.removeErrorListeners()
+        self.lexer.addErrorListener(self.listener)
+        self.parser = ArduinoParser(CommonTokenStream(self.lexer))
+        self.parser.removeErrorListeners()
+        self.parser.addErrorListener(self.listener)
+        self.lib_manager = libraries.LibraryManager()
+        self.timings = {}
+
+    def tokenize(self, code):
+        """
+        Runs the lexer over Arduino code
+        Arguments:
+            code: the Arduino code
+        Returns:
+            A tuple with the list of tokens (ending with the EOF
+            token) and the lexical errors
+        """
+        with _antlr_lock:
+            self.listener.errors = []
+            self.lexer.inputStream = InputStream(code)
+            tokens = [self.lexer.nextToken()]
+            while tokens[-1].type != Token.EOF:
+                tokens.append(self.lexer.nextToken())
+            return tokens, self.listener.errors
+
+    def warm_up(self, codes):
+        """
+        Parses sketches only to build the DFA of the lexer and the
+        parser. The DFA is shared by all the lexers and parsers of
+        the process, so the first compilations are not slower
+        Arguments:
+            codes: the Arduino codes
+        """
+        for code in codes:
+            # The lock is released between sketches, so the editor and
+            # the compiler are not blocked during the whole warm-up
+            with _antlr_lock:
+                self.listener.errors = []
+                self.lexer.inputStream = InputStream(code)
+                self.parser.setInputStream(CommonTokenStream(self.lexer))
+                self.parser.program()
+        self.listener.errors = []
+
+    def transpile(self, code, dump=None):
+        """
+        Transpiles Arduino code into Python code, compiled in memory
+        Arguments:
+            code: the Arduino code
+            dump: the path of a file where the Python code is
+            written (for debugging), None if it is not written
+        Returns:
+            A tuple with the warnings, the errors and the code object
+            of the program (None if there are errors)
+        """
+        errors = []
+        warns = []
+        program = None
+        self.timings = {}
+        self.listener.errors = []
+        self.lib_manager.reset()
+        start = time.perf_counter()
+        tokens, lex_errors = tokenize(code)
+        self.timings["lex"] = time.perf_counter() - start
+        start = time.perf_counter()
+        self.listener.errors = []
+        self.parser.setInputStream(CommonTokenStream(ListTokenSource(tokens)))
+
+        visitor = ast_builder_visitor.ASTBuilderVisitor()
+        with _antlr_lock:
+            tree = self.parser.program()
+        self.timings["parse"] = time.perf_counter() - start
+        errors.extend(sorted(lex_errors + self.listener.errors,
+                             key=lambda error: (error.line, error.column)))
+        if len(errors) < 1:
+            start = time.perf_counter()
+            ast = visitor.visitProgram(tree)
+            self.timings["ast"] = time.perf_counter() - start
+            manager, results = self.__create_passes()
+            manager.run(ast)
+            self.timings.update(manager.timings)
+            errors.extend(results["errors"]())
             if not errors:
-                code_gen.visit_program(ast, None)
-                warning_analysis.visit_program(ast, None)
-                warns = warning_analysis.warnings
+                code_gen = results["codegen"].visitor
+                start = time.perf_counter()
+                if dump is not None:
+                    code_gen.dump(dump)
+                program = code_gen.compile(dump if dump is not None else "<sketch>")
+                self.timings["compile"] = time.perf_counter() - start
+                warns = results["warnings"].visitor.warnings
+        return warns, errors, program
+
+    def report(self):
+        """
+        Returns the time spent in every stage of the last
+        compilation as a human readable text
+        """
+        lines = ["{}: {:.2f} ms".format(name, t * 1000) for name, t in self.timings.items()]
+        if warm_up_stats is not None:
+            lines.append("warm-up: {:.2f} ms ({} sketches)".format(warm_up_stats[1] * 1000, warm_up_stats[0]))
+        return "\n".join(lines)
+
+    def __create_passes(self):
+        """
+        Creates the passes of the compiler: the declarations (with
+        the definition of functions for the code generator fused into
+        its walk), the semantic analysis and, if there are no errors,
+        the code generation and the warnings
+        Returns:
+            A tuple with the pass manager and a dict with the passes
+            whose results are needed and a function returning the errors
+        """
+        manager = passes.PassManager()
+        declarations = manager.add(
+            "declarations", lambda: semantical_analysis.DeclarationAnalyzer(self.lib_manager))
+        functions = manager.add("functions", code_generator.FunctionDefiner, hook=True)
+        semantic = manager.add("semantic", lambda: semantical_analysis.SemanticAnalyzer(
+            self.lib_manager, declarations.visitor.globals, declarations.visitor.locals,
+            declarations.visitor.functions), requires=["declarations"])
+
+        def get_errors():
+            return declarations.visitor.errors + semantic.visitor.errors
+
+        def no_errors():
+            return len(get_errors()) == 0
+
+        codegen = manager.add("codegen", lambda: code_generator.CodeGenerator(self.lib_manager, functions.visitor),
+                              requires=["semantic", "functions"], when=no_errors)
+        warning = manager.add("warnings", warnings.WarningAnalyzer, requires=["semantic"], when=no_errors)
+        return manager, {"errors": get_errors, "codegen": codegen, "warnings": warning}
+
+
+def get_session():
+    """
+    Returns the compiler session of the current thread
+    """
+    if not hasattr(_sessions, "session"):
+        _sessions.session = CompilerSession()
+    return _sessions.session
+
+
+def warm_up(directory=WARM_UP_DIR):
+    """
+    Warms the DFA of the lexer and the parser parsing the sketches
+    of a directory. Worker processes forked after the warm-up
+    inherit the DFA
+    Arguments:
+        directory: the directory with the sketches (.txt)
+    Returns:
+        The time spent, in seconds
+    """
+    global warm_up_stats
+    start = time.perf_counter()
+    codes = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        with open(path, encoding="utf-8") as file:
+            codes.append(file.read())
+    if not codes:
+        print("warm-up: no se han encontrado sketches en {}".format(os.path.abspath(directory)))
+    get_session().warm_up(codes)
+    elapsed = time.perf_counter() - start
+    warm_up_stats = (len(codes), elapsed)
+    return elapsed
+
+
+def tokenize(code):
+    """
+    Returns the tokens of Arduino code. The tokens of the last
+    code are kept, so the code is not lexed again when it is
+    transpiled
+    Arguments:
+        code: the Arduino code
+    Returns:
+        A tuple with the list of tokens (ending with the EOF
+        token) and the lexical errors
+    """
+    global _tokens
+    lexed = _tokens
+    if lexed is None or lexed[0] != code:
+        lexed = (code,) + get_session().tokenize(code)
+        _tokens = lexed
+    return lexed[1], lexed[2]
 
-    return warns, errors
 
+def share_tokens(code, tokens, errors):
+    """
+    Keeps the tokens of Arduino code lexed somewhere else (by the
+    highlighter of the editor), so tokenize does not lex it again
+    Arguments:
+        code: the Arduino code
+        tokens: the list of tokens (ending with the EOF token)
+        errors: the lexical errors
+    """
+    global _tokens
+    _tokens = (code, tokens, errors)
 
-def test():
-    test_code = open('tests/grammar-tests/ejemPeque.txt', 'r').read()
-    arbol = transpile(test_code)
-    visitor = ast_builder_visitor.ASTBuilderVisitor()
-    ast =  visitor.visitProgram(arbol)
-    lib_manager = libraries.LibraryManager()
-    warning_analysis = warnings.WarningAnalyzer()
-    sem_analysis = semantical_analysis.Semantic(lib_manager)
-    return sem_analysis.execute(ast)
 
-f = open('tests/file-tests/arrays.txt').read()
-transpile(f)
+def transpile(code, dump=None):
+    """
+    Transpiles Arduino code into Python code, compiled in memory.
+    Unchanged sketches are taken from the cache
+    Arguments:
+        code: the Arduino code
+        dump: the path of a file where the Python code is
+        written (for debugging), None if it is not written
+    Returns:
+        A tuple with the warnings, the errors and the code object
+        of the program (None if there are errors)
+    """
+    if dump is None and cache is not None:
+        cached = cache.get(code)
+        if cached is not None:
+            return cached
+    warns, errors, program = get_session().transpile(code, dump)
+    if cache is not None:
+        cache.put(code, warns, errors, program)
+    return warns, errors, program
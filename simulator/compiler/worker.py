@@ -0,0 +1,118 @@
+import concurrent.futures
+import threading
+import traceback
+
+
+class Job:
+
+    def __init__(self, future, callback, error=None):
+        """
+        Constructor for a job of the worker
+        Arguments:
+            future: the future of the job
+            callback: the function called with the result of the
+            job, None if the result is not needed
+            error: the function called with the exception raised by
+            the job, None to print it
+        """
+        self.future = future
+        self.callback = callback
+        self.error = error
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Cancels the job. If it has already started it runs until
+        the end, but its result is discarded
+        """
+        self.cancelled = True
+        self.future.cancel()
+
+    def done(self):
+        return self.future.done()
+
+
+class BackgroundWorker:
+
+    def __init__(self, name="worker"):
+        """
+        Constructor for the background worker. The jobs run one
+        after another in a background thread, so the GUI is not
+        frozen while they run (compiling a sketch, validating the
+        login...). The results are delivered by poll, in the thread
+        that calls it (the Tk thread), because the widgets can only
+        be used from that thread
+        Arguments:
+            name: the name of the thread
+        """
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.jobs = []
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, callback=None, error=None):
+        """
+        Runs a function in the background thread
+        Arguments:
+            fn: the function
+            args: the arguments of the function
+            callback: the function called by poll with the result
+            error: the function called by poll with the exception
+            raised by the function, None to print it
+        Returns:
+            The job
+        """
+        job = Job(self.executor.submit(fn, *args), callback, error)
+        with self.lock:
+            self.jobs.append(job)
+        return job
+
+    def poll(self):
+        """
+        Calls the callbacks of the finished jobs that have not been
+        cancelled. The exception of a job goes to its error function,
+        so it does not stop the delivery of the other jobs
+        Returns:
+            True if there are jobs still running
+        """
+        with self.lock:
+            finished = [job for job in self.jobs if job.done()]
+            self.jobs = [job for job in self.jobs if not job.done()]
+        for job in finished:
+            if job.cancelled:
+                continue
+            try:
+                result = job.future.result()
+            except Exception as exception:
+                if job.error is not None:
+                    job.error(exception)
+                else:
+                    traceback.print_exception(exception)
+                continue
+            if job.callback is not None:
+                job.callback(result)
+        return self.busy()
+
+    def busy(self):
+        with self.lock:
+            return len(self.jobs) > 0
+
+    def cancel(self):
+        """
+        Cancels all the jobs
+        """
+        with self.lock:
+            for job in self.jobs:
+                job.cancel()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
+
+
+class CompileWorker(BackgroundWorker):
+
+    def __init__(self):
+        """
+        Constructor for the worker that compiles the sketches
+        """
+        super().__init__("compiler")
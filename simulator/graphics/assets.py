@@ -0,0 +1,151 @@
+import collections
+import threading
+from PIL import Image, ImageTk
+import graphics.sprites as sprites
+
+# Number of scales whose variants are kept. The drawing uses one scale per
+# zoom level and the HUDs their own, so the last zoom levels are reused
+MAX_SCALES = 4
+
+_originals = {}
+_scaled = collections.OrderedDict()
+_photos = collections.OrderedDict()
+_photos_tk = None
+_atlases = {}
+_lock = threading.Lock()
+
+
+def load(path):
+    """
+    Returns the decoded image of a file. Every file is opened and
+    decoded only once for the whole application
+    Arguments:
+        path: the path of the image
+    Returns:
+        The image (as Image instance), shared, must not be modified
+    """
+    with _lock:
+        image = _originals.get(path)
+        if image is None:
+            image = Image.open(path)
+            image.load()
+            _originals[path] = image
+        return image
+
+
+def render(image, angle, scale):
+    """
+    Rotates an image by an angle and resizes it to a scale
+    Arguments:
+        image: the image (as Image instance)
+        angle: the angle in degrees
+        scale: the scale of the result
+    Returns:
+        The new image (as Image instance)
+    """
+    if angle % 360 != 0:
+        image = image.rotate(angle, expand=True)
+    width = max(1, int(image.width * scale))
+    height = max(1, int(image.height * scale))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def scaled(path, scale, angle=0):
+    """
+    Returns an image rotated and resized to a scale. The variants
+    of the last MAX_SCALES scales used are kept
+    Arguments:
+        path: the path of the image
+        scale: the scale of the image
+        angle: the angle in degrees
+    Returns:
+        The image (as Image instance), shared, must not be modified
+    """
+    key = (path, angle % 360)
+    variants = _bucket(_scaled, scale)
+    image = variants.get(key)
+    if image is None:
+        image = variants[key] = render(load(path), angle, scale)
+    return image
+
+
+def atlas(path):
+    """
+    Returns the sprite atlas of an image, creating it the first
+    time. From then on the rotated photos of the image are taken
+    from the atlas
+    Arguments:
+        path: the path of the image
+    Returns:
+        The atlas (as SpriteAtlas instance)
+    """
+    if path not in _atlases:
+        _atlases[path] = sprites.SpriteAtlas(path)
+    return _atlases[path]
+
+
+def photo(path, scale, angle=0, master=None):
+    """
+    Returns the photo of an image rotated and resized to a scale,
+    ready to be used in a canvas. The photos belong to the Tk
+    interpreter of the master, so they are discarded if it changes
+    (a new main window after logging out)
+    Arguments:
+        path: the path of the image
+        scale: the scale of the image
+        angle: the angle in degrees
+        master: the widget that shows the photo
+    Returns:
+        The photo (as PhotoImage instance)
+    """
+    global _photos_tk
+    interp = master.tk if master is not None else None
+    if interp is not _photos_tk:
+        _photos.clear()
+        _photos_tk = interp
+    sprite = _atlases.get(path)
+    angle = sprite.angle_key(angle) if sprite is not None else angle % 360
+    photos = _bucket(_photos, scale)
+    key = (path, angle)
+    image = photos.get(key)
+    if image is None:
+        if sprite is not None:
+            source = sprite.frame(angle, scale)
+        else:
+            source = scaled(path, scale, angle)
+        image = photos[key] = ImageTk.PhotoImage(source, master=master)
+    return image
+
+
+def prerender(scale):
+    """
+    Starts rendering in background the frames of every atlas at
+    a scale, used when the zoom changes
+    Arguments:
+        scale: the new scale
+    """
+    for sprite in _atlases.values():
+        sprite.prerender(scale)
+
+
+def clear():
+    """
+    Discards all the loaded images
+    """
+    global _photos_tk
+    with _lock:
+        _originals.clear()
+    _scaled.clear()
+    _photos.clear()
+    _photos_tk = None
+    _atlases.clear()
+
+
+def _bucket(cache, scale):
+    variants = cache.get(scale)
+    if variants is None:
+        variants = cache[scale] = {}
+    cache.move_to_end(scale)
+    while len(cache) > MAX_SCALES:
+        cache.popitem(last=False)
+    return variants
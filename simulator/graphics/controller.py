@@ -1,7 +1,15 @@
 import graphics.layers as layers
 import output.console as console
 import compiler.commands as commands
+import compiler.worker as worker
+import output.telemetry as telemetry
 import graphics.screen_updater as screen_updater
+import robot_components.robot_state as robot_state
+import simulation.scheduler as scheduler
+
+POLL_MS = 50
+SPEEDS = [(scheduler.REAL_TIME, 1), (scheduler.SCALED, 2), (scheduler.SCALED, 4),
+          (scheduler.SCALED, 10), (scheduler.FAST, 1)]
 
 
 class RobotsController:
@@ -10,36 +18,84 @@ class RobotsController:
         self.view = view
         self.console: console.Console = None
         self.robot_layer: layers.Layer = None
-        self.compile_command = commands.Compile(self, username, lab, group)
+        self.uploader = telemetry.Uploader().start()
+        self.compile_command = commands.Compile(self, username, lab, group, self.uploader)
         self.setup_command = commands.Setup(self)
         self.loop_command = commands.Loop(self)
         self.executing = False
+        self.clock: robot_state.Clock = None
+        self.scheduler: scheduler.Scheduler = None
+        self.speed = SPEEDS[0]
+        self.worker = worker.CompileWorker()
+        self.compile_job: worker.Job = None
+        self.poll_identifier = None
 
     def execute(self):
+        if self.compile_job is not None:
+            self.compile_job.cancel()
+        self.view.abort_after()
+        self.console.clear()
+        code = self.get_code()
+        self.view.share_tokens(code)
+        self.compile_job = self.worker.submit(self.compile_command.compile, code,
+                                              callback=lambda result: self.__compiled(code, result),
+                                              error=lambda exception: self.__compiled(code, None))
+        self.view.show_compiling(True)
+        if self.poll_identifier is None:
+            self.__poll_worker()
+
+    def __poll_worker(self):
+        self.poll_identifier = None
+        if self.worker.poll():
+            self.poll_identifier = self.view.after(POLL_MS, self.__poll_worker)
+
+    def __compiled(self, code, result):
+        self.compile_job = None
+        self.view.show_compiling(False)
+        if code != self.get_code():
+            # The sketch has been edited while it was compiled
+            self.console.write_output("El sketch ha cambiado durante la compilación, "
+                                      "pulsa F5 de nuevo para ejecutarlo\n")
+            return
+        if result is not None:
+            self.compile_command.send(code, result[0], result[1])
+        if self.compile_command.finish(result):
+            self.__start()
+
+    def __start(self):
+        self.scheduler = scheduler.Scheduler(self.robot_layer, self.view, self.__loop, *self.speed)
+        self.clock = self.scheduler.clock
         screen_updater.layer = self.robot_layer
         screen_updater.view = self.view
-        self.view.abort_after()
+        screen_updater.clock = self.clock
         self.robot_layer.execute()
-        self.console.clear()
-        if self.compile_command.execute():
-            if self.setup_command.execute():
-                self.executing = True
-                self.drawing_loop()
+        self.robot_layer.set_deferred(True)
+        if self.scheduler.call(self.setup_command.execute):
+            self.executing = True
+            self.drawing_loop()
 
     def drawing_loop(self):
-        screen_updater.refresh()
-        if not self.view.keys_used:
-            self.loop_command.execute()
-        self.view.identifier = self.view.after(10, self.drawing_loop)
+        self.scheduler.frame()
+        self.view.identifier = self.view.after(scheduler.Scheduler.FRAME_MS, self.drawing_loop)
 
     def stop(self):
+        if self.compile_job is not None:
+            self.compile_job.cancel()
+            self.compile_job = None
+            self.view.show_compiling(False)
         self.executing = False
         self.compile_command.reboot()
         self.setup_command.reboot()
         self.loop_command.reboot()
+        self.robot_layer.set_deferred(False)
         self.robot_layer.stop()
         self.view.abort_after()
 
+    def change_speed(self, option):
+        self.speed = SPEEDS[option]
+        if self.scheduler is not None:
+            self.scheduler.set_mode(*self.speed)
+
     def zoom_in(self):
         self.robot_layer.zoom_in()
         self.view.change_zoom_label(self.robot_layer.drawing.zoom_percentage())
@@ -48,6 +104,10 @@ class RobotsController:
         self.robot_layer.zoom_out()
         self.view.change_zoom_label(self.robot_layer.drawing.zoom_percentage())
 
+    def __loop(self):
+        if not self.view.keys_used:
+            self.loop_command.execute()
+
     def configure_layer(self, drawing_canvas, hud_canvas):
         self.robot_layer.set_canvas(drawing_canvas, hud_canvas)
         self.view.change_zoom_label(self.robot_layer.drawing.zoom_percentage())
@@ -229,4 +289,6 @@ class RobotsController:
         return self.view.get_code()
 
     def exit(self):
+        self.worker.shutdown()
+        self.uploader.close()
         self.console.logger.close_log()
@@ -1,87 +1,122 @@
+import collections
 import tkinter as tk
-from PIL import ImageTk, Image
+import graphics.assets as assets
+import graphics.scene as scene
 
 
 class Drawing:
 
     def __init__(self):
         """
-        Constructor for the drawing
+        Constructor for the drawing. Every image and group of shapes
+        is a node of a scene graph that keeps its canvas items, so
+        the changes are applied by moving and configuring the items
+        instead of deleting and creating them again
         """
         self.canvas = None
-        self.images = {}
-        self.canvas_images = {}
+        self.nodes = collections.OrderedDict()
+        self.dirty = collections.OrderedDict()
         self.scale = 0.2
         self.hud_w = 0
         self.hud_h = 0
+        self.deferred = False
+        self.ops = collections.Counter()
+        self.frame_ops = collections.Counter()
+        self.total_ops = collections.Counter()
 
     def set_canvas(self, canvas: tk.Canvas):
         """
-        Sets the canvas in which the drawing is going to be done
+        Sets the canvas in which the drawing is going to be done.
+        The elements left in it by other drawings are deleted
         Arguments:
             canvas: the canvas
         """
+        if canvas is not self.canvas:
+            canvas.delete('all')
         self.canvas = canvas
 
     def empty_drawing(self):
         """
-        Deletes all elements from the drawing
-        """
-        self.canvas.delete('all')
-        self.canvas_images = {}
+        Deletes all elements from the drawing. The background (the
+        shapes of the circuit and the obstacle) is only hidden, so
+        it is shown again without being created if it is drawn
+        with the same shapes
+        """
+        images = [group for group, node in self.nodes.items()
+                  if isinstance(node, scene.ImageNode)]
+        if images:
+            self.canvas_call("delete", *images)
+        for group in images:
+            del self.nodes[group]
+        self.dirty = collections.OrderedDict()
+        for node in self.nodes.values():
+            if node.set_visible(False):
+                self.dirty[node.group] = node
+        self.render()
 
-    def delete_zoomables(self):
-        """
-        Deletes all the elements that have to be zoomed
+    def draw_shapes(self, group, shapes):
         """
-        self.canvas.delete('actuator', 'button_left', 'button_right', 'block')
-        self.canvas.delete('robot', 'circuit', 'obstacle',
-                           'light_1', 'light_2', 'light_3', 'light_4')
-        self.canvas.delete('prueba')
+        Draws a group of rectangles and arcs that do not move. If
+        the group is already drawn with the same shapes it is only
+        shown
+        Arguments:
+            group: the tag of the shapes
+            shapes: a list of tuples with the kind ("rectangle" or
+            "arc") and the form of every shape, as received by
+            draw_rectangle and draw_arc
+        """
+        node = self.nodes.get(group)
+        if node is None:
+            node = self.nodes[group] = scene.ShapesNode(group)
+        changed = node.set_shapes(shapes)
+        shown = node.set_visible(True)
+        if changed or shown:
+            self.__changed(node)
 
     def draw_image(self, element, group):
         """
         Draws an image
         Arguments:
             element: a dict whose content is the x and y
-            coordinates and the image (as Image instance)
+            coordinates and the image (as str path)
             group: the tag where the image is going to
             be added to
         """
-        image = self.__open_image(element["image"], group)
-        self.__add_to_canvas(element["x"], element["y"], image, group)
+        node = self.nodes.get(group)
+        if node is None:
+            node = scene.ImageNode(group, element["x"], element["y"], element["image"])
+            self.nodes[group] = node
+        else:
+            moved = node.set_position(element["x"], element["y"])
+            changed = node.set_image(element["image"])
+            shown = node.set_visible(True)
+            if not (moved or changed or shown):
+                return
+        self.__changed(node)
 
     def redraw_image(self, element, group):
         """
-        Redraws an already existing image
+        Redraws an already existing image. Nothing is done
+        if the image and its position are the same
         Arguments:
             element: a dict whose content is the x and y
-            coordinates and the image (as Image instance)
+            coordinates and the image (as str path)
             group: the tag where the image is going to
             be added to
         """
-        self.canvas.delete(group)
-        del self.canvas_images[group]
-        image = self.__open_image(element["image"], group)
-        self.__add_to_canvas(element["x"], element["y"], image, group)
+        self.draw_image(element, group)
 
     def move_image(self, group, x, y):
         """
         Moves a image (or group of) of the drawing
         Arguments:
             group: the tag of the image(s)
-            x: the x differential
-            y: the y differential
-        """
-        current_x = self.canvas_images[group]["x"]
-        current_y = self.canvas_images[group]["y"]
-        scale_x = int(x * self.scale)
-        scale_y = int(y * self.scale)
-        dx = scale_x - current_x
-        dy = scale_y - current_y
-        self.canvas_images[group]["x"] = scale_x
-        self.canvas_images[group]["y"] = scale_y
-        self.canvas.move(group, dx, dy)
+            x: the x coordinate
+            y: the y coordinate
+        """
+        node = self.nodes[group]
+        if node.set_position(x, y):
+            self.__changed(node)
 
     def rotate_image(self, element, angle, group):
         """
@@ -89,14 +124,56 @@ class Drawing:
         Arguments:
             element: a dict whose elements are the x and
             y coordinates and the image (as str path)
-            angle: the differential of the angle
+            angle: the angle of the image
             group: the group of the image(s)
         """
-        self.canvas.delete(group)
-        image = self.__open_image(element["image"], group)
-        rotated_img = self.images[element["image"]
-                                  ] = image.rotate(angle, expand=True)
-        self.__add_to_canvas(element["x"], element["y"], rotated_img, group)
+        # The rotated frames are taken from the sprite atlas of the image,
+        # so turning is only a change of the image of the canvas item
+        assets.atlas(element["image"])
+        node = self.nodes.get(group)
+        if node is None:
+            node = scene.ImageNode(group, element["x"], element["y"], element["image"], angle)
+            self.nodes[group] = node
+        elif not node.set_image(element["image"], angle):
+            return
+        self.__changed(node)
+
+    def set_visible(self, group, visible):
+        """
+        Shows or hides an image or a group of shapes
+        Arguments:
+            group: the tag of the element
+            visible: True to show it, False to hide it
+        """
+        node = self.nodes.get(group)
+        if node is not None and node.set_visible(visible):
+            self.__changed(node)
+
+    def set_deferred(self, deferred):
+        """
+        Sets if the images are moved, rotated and redrawn when
+        asked (False) or only when the drawing is rendered (True),
+        so several ticks of the simulation cost a single frame
+        Arguments:
+            deferred: True if the changes wait for render, False if else
+        """
+        if not deferred:
+            self.render()
+        self.deferred = deferred
+
+    def render(self):
+        """
+        Applies the changes of the dirty nodes to the canvas. Only
+        the last state of every node is shown. The canvas operations
+        of the frame are left in frame_ops
+        """
+        dirty = self.dirty
+        self.dirty = collections.OrderedDict()
+        for node in dirty.values():
+            node.flush(self)
+        self.frame_ops = self.ops
+        self.total_ops.update(self.ops)
+        self.ops = collections.Counter()
 
     def draw_rectangle(self, form: dict):
         """
@@ -106,14 +183,7 @@ class Drawing:
             y coordinates, the width and height of the
             rectangle and the color and group (tag of tkinter)
         """
-        x = int(form["x"] * self.scale)
-        y = int(form["y"] * self.scale) + self.hud_h
-        width = int(form["width"] * self.scale)
-        height = int(form["height"] * self.scale)
-        color = form["color"]
-        group = form["group"]
-        self.canvas.create_rectangle(
-            x, y, x + width, y + height, fill=color, tags=group)
+        self.__add_shape("rectangle", form)
 
     def draw_arc(self, form: dict):
         """
@@ -124,16 +194,65 @@ class Drawing:
             the arc, the width of the arc, the angle of the arc
             and the group (tag of tkinter)
         """
-        x = int(form["x"] * self.scale)
-        y = int(form["y"] * self.scale) + self.hud_h
-        width = int(form["width"] * self.scale)
-        height = int(form["height"] * self.scale)
-        track_width = int(form["track_width"] * self.scale)
-        starting_angle = form["starting_angle"]
-        angle = form["angle"]
-        group = form["group"]
-        self.canvas.create_arc(x, y, x + width, y + height, width=track_width, style="arc", start=starting_angle,
-                               extent=angle, tags=group)
+        self.__add_shape("arc", form)
+
+    def canvas_call(self, operation, *args, **kwargs):
+        """
+        Calls a method of the canvas, counting it in the
+        operations of the frame
+        Arguments:
+            operation: the name of the method
+        Returns:
+            What the method returns
+        """
+        self.ops[operation] += 1
+        return getattr(self.canvas, operation)(*args, **kwargs)
+
+    def canvas_coords(self, x, y):
+        """
+        Returns the coordinates in the canvas of a point
+        of the drawing
+        Arguments:
+            x: the x coordinate
+            y: the y coordinate
+        """
+        return (x * self.scale, y * self.scale + self.hud_h)
+
+    def photo(self, image_path, angle=0):
+        """
+        Returns the photo of an image at the current scale
+        Arguments:
+            image_path: the path of the image
+            angle: the angle in degrees of the image
+        """
+        return assets.photo(image_path, self.scale, angle, self.canvas)
+
+    def shape_options(self, kind, form):
+        """
+        Returns the coordinates and options in the canvas of
+        a shape at the current scale
+        Arguments:
+            kind: "rectangle" or "arc"
+            form: the measurements of the shape
+        Returns:
+            A dict with the coords and the options of the
+            create method of the canvas
+        """
+        # The coordinates are not rounded, so the group can be
+        # scaled again and again without moving the shapes
+        x = form["x"] * self.scale
+        y = form["y"] * self.scale + self.hud_h
+        width = form["width"] * self.scale
+        height = form["height"] * self.scale
+        options = {"coords": (x, y, x + width, y + height)}
+        if kind == "rectangle":
+            options["fill"] = form["color"]
+        else:
+            options["width"] = int(form["track_width"] * self.scale)
+            options["style"] = "arc"
+            options["start"] = form["starting_angle"]
+            options["extent"] = form["angle"]
+        return options
 
     def zoom_in(self):
         """
@@ -143,6 +262,7 @@ class Drawing:
             self.scale += 0.1
         self.scale = round(self.scale, 1)
         self.__update_size()
+        self.__rescale()
 
     def zoom_out(self):
         """
@@ -152,6 +272,7 @@ class Drawing:
             self.scale -= 0.1
         self.scale = round(self.scale, 1)
         self.__update_size()
+        self.__rescale()
 
     def zoom_percentage(self):
         """
@@ -179,42 +300,82 @@ class Drawing:
         h = self.height * self.scale
         self.canvas.configure(scrollregion=(0, 0, w, h))
 
-    def __add_to_canvas(self, x, y, image: Image, group):
+    def __rescale(self):
         """
-        Adds a image to the canvas
-        Arguments:
-            x: the x coordinate of the image
-            y: the y coordinate of the image
-            image_path: the image to add (as Image instance)
-            group: the group (tag of tkinter)
-        """
-        width = int(image.width * self.scale)
-        height = int(image.height * self.scale)
-        res_img = image.resize((width, height), Image.ANTIALIAS)
-        scale_x = x * self.scale
-        scale_y = y * self.scale + self.hud_h
-        self.canvas_images[group] = {
-            "x": scale_x,
-            "y": scale_y,
-            "image": ImageTk.PhotoImage(res_img)
-        }
-        self.canvas.create_image(
-            scale_x, scale_y, image=self.canvas_images[group]["image"], tags=group)
-
-    def __open_image(self, image_path, group):
-        image = None
-        if group not in self.images:
-            image = self.__get_image(image_path, group)
-        elif not self.images[group]["path"] == image_path:
-            image = self.__get_image(image_path, group)
-        else:
-            image = self.images[group]["image"]
-        return image
-
-    def __get_image(self, image_path, group):
-        image = Image.open(image_path)
-        self.images[group] = {
-            "image": image,
-            "path": image_path
-        }
-        return image
+        Redraws every node at the new scale, and starts rendering
+        the frames of the rotated images so the first turns after
+        zooming do not wait
+        """
+        assets.prerender(self.scale)
+        for node in self.nodes.values():
+            node.rescale()
+            self.__changed(node)
+
+    def __add_shape(self, kind, form):
+        group = form["group"]
+        node = self.nodes.get(group)
+        if node is None:
+            node = self.nodes[group] = scene.ShapesNode(group)
+        node.add(kind, form)
+        self.__changed(node)
+
+    def __changed(self, node):
+        """
+        Marks a node as dirty, and applies its changes to
+        the canvas if the drawing is not deferred
+        """
+        self.dirty[node.group] = node
+        if not self.deferred:
+            self.render()
+
+
+class HeadlessDrawing(Drawing):
+
+    def __init__(self):
+        """
+        Constructor for a drawing without canvas. Keeps the
+        same interface as Drawing so the layers and the robot
+        drawings can run their physics when nothing is shown
+        (batch runs, tests or servers without display)
+        """
+        super().__init__()
+
+    def set_canvas(self, canvas):
+        pass
+
+    def empty_drawing(self):
+        pass
+
+    def draw_image(self, element, group):
+        pass
+
+    def redraw_image(self, element, group):
+        pass
+
+    def move_image(self, group, x, y):
+        pass
+
+    def rotate_image(self, element, angle, group):
+        pass
+
+    def set_visible(self, group, visible):
+        pass
+
+    def draw_shapes(self, group, shapes):
+        pass
+
+    def draw_rectangle(self, form: dict):
+        pass
+
+    def draw_arc(self, form: dict):
+        pass
+
+    def zoom_in(self):
+        pass
+
+    def zoom_out(self):
+        pass
+
+    def set_size(self, width, height):
+        self.width = width
+        self.height = height
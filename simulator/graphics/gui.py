@@ -1,171 +1,20 @@
 import base64
-import json
-import os
-import re
 import tkinter as tk
 import tkinter.messagebox as messagebox
-import traceback
-from time import sleep
 from tkinter.filedialog import askopenfilename, asksaveasfilename
 import tkinter.ttk as ttk
 
-import cryptography
-import requests
-
 import graphics.controller as controller
+import graphics.login_window as login_window
+import graphics.highlighter as highlighter
+import compiler.transpiler as transpiler
 import files.files_reader as files
 import subprocess
 
-from functools import partial
-from tkinter import Label, Entry, StringVar, Button
-
-import bcrypt
-
-from cryptography.fernet import Fernet
-
-from output import console
-
 DARK_BLUE = "#006468"
 BLUE = "#17a1a5"
 
 
-class LoginInfo(object):
-    def toJSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__,
-                          sort_keys=True, indent=4)
-
-class LoginApplication(tk.Tk):
-
-    def validateLogin(self, username, password, lab, group, fromFile):
-
-        if fromFile:
-            infoLogin = LoginInfo()
-            infoLogin.username = username
-            #infoLogin.pw = password
-            infoLogin.lab = lab
-            infoLogin.group = group
-            infoLogin.fromFile = fromFile
-        else:
-            infoLogin = LoginInfo()
-            infoLogin.username = username.get().upper()
-            #infoLogin.pw = password.get()
-            infoLogin.lab = lab.get()
-            infoLogin.group = group.get()
-            infoLogin.fromFile = fromFile
-
-        print("checking login for :", infoLogin.username.upper())
-
-        try:
-            r = requests.post('http://147.189.171.97:8000/infoLogin',
-                              headers={'Accept': 'application/json'}, json=infoLogin.toJSON())
-
-            if fromFile:
-                infoLogin.pw = password
-            else:
-                infoLogin.pw = password.get()
-
-            if r.status_code == 200:
-                #comprobamos que el login es correcto
-                if ((len(r.content) == 0 and not fromFile)
-                        or (not fromFile and bcrypt.checkpw(infoLogin.pw.encode('utf8'), r.content))
-                        or (fromFile and r.content.decode() == infoLogin.pw)):
-                #generamos el archivo con la pw hasheada si no es login desde archivo
-                #if not fromFile:
-
-                    r = requests.post('http://147.189.171.97:8000/updateLogin',
-                                     headers={'Accept': 'application/json'}, json=infoLogin.toJSON())
-
-                    with open('login.txt', 'w') as f:
-                        key = Fernet.generate_key()
-                        fernet = Fernet(key)
-
-
-                        infolg = fernet.encrypt((infoLogin.username + "\n" + r.content.decode() + "\n" + infoLogin.lab + "\n" + infoLogin.group).encode('utf-8'))
-                        f.write(key.decode('utf-8') + "\n" + infolg.decode('utf-8'))
-
-                        f.close()
-
-                    self.destroy()
-                    tk.messagebox.showinfo(title="Sesión Iniciada", message="Has iniciado sesión como " + infoLogin.username+
-                                           ", Laboratorio: " + infoLogin.lab + ", Grupo: " + infoLogin.group)
-                    app = MainApplication(infoLogin.username.upper(), infoLogin.lab, infoLogin.group)
-                    app.mainloop()
-                    return ""
-
-                tk.messagebox.showerror(title="Error", message='Credenciales Incorrectas')
-                return r
-            mensajeerror = re.search('<p>(.+?)</p>', r.content.decode()).group(1)
-
-            tk.messagebox.showerror(title="Error", message=mensajeerror)
-            return r
-        except Exception as e:
-            mensajeerror = str(e)
-
-            tk.messagebox.showerror(title="Error", message=mensajeerror)
-            return ""
-
-    def __init__(self, logout, *args, **kwargs):
-        tk.Tk.__init__(self, *args, **kwargs)
-
-        self.geometry('250x150')
-        self.eval('tk::PlaceWindow . center') #la centramos
-        self.title('Login Simulador Software para Robots')
-
-        # username label and text entry box
-        usernameLabel = Label(self, text="UO*").grid(row=0, column=0)
-        username = StringVar()
-        usernameEntry = Entry(self, textvariable=username).grid(row=0, column=1)
-
-        # password label and password entry box
-        passwordLabel = Label(self, text="Contraseña*").grid(row=1, column=0)
-        password = StringVar()
-        passwordEntry = Entry(self, textvariable=password, show='*').grid(row=1, column=1)
-
-        # laboratory label and laboratory entry box
-        labLabel = Label(self, text="Laboratorio").grid(row=2, column=0)
-        lab = StringVar()
-        labEntry = Entry(self, textvariable=lab).grid(row=2, column=1)
-
-        # group label and group entry box
-        groupLabel = Label(self, text="Grupo").grid(row=3, column=0)
-        group = StringVar()
-        groupEntry = Entry(self, textvariable=group).grid(row=3, column=1)
-
-        validateLogin = partial(self.validateLogin, username, password, lab, group, False)
-
-        # login button
-        loginButton = Button(self, text="Iniciar Sesión", command=validateLogin).grid(row=5, column=0)
-
-        #comprobamos si existe archivo de login, si existe validamos login
-        if (not logout):
-            try:
-                with open('login.txt', 'r') as file:
-                    data = file.read().replace('\n', ' ')
-                    file.close()
-                    li = list(data.split(" "))
-                    if len(li) == 2:
-
-                        fernet = Fernet(li[0].encode('utf-8'))
-                        try:
-                            decrypted = fernet.decrypt(li[1].encode('utf-8')).decode('utf-8')
-                            decrypted = decrypted.replace('\n', ' ')
-                            li = list(decrypted.split(" "))
-                            if len(li) == 4:
-                                self.validateLogin(li[0], li[1], li[2], li[3], True)
-                        except cryptography.fernet.InvalidToken:
-                            tk.messagebox.showerror(title="Error", message='Credenciales de Archivo Incorrectas')
-
-            except FileNotFoundError:
-                print("The 'login.txt' file does not exist")
-
-            #self.mainloop()
-        else:
-            try:
-                os.remove('login.txt')
-            except OSError as e:
-                print("Error: %s : %s" % ('login.txt', e.strerror))
-
-
 class MainApplication(tk.Tk):
 
     def __init__(self, username, lab, group, *args, **kwargs):
@@ -180,6 +29,7 @@ class MainApplication(tk.Tk):
         self.tools_frame = tk.Frame(self, bg=DARK_BLUE)
         self.button_bar = ButtonBar(self.tools_frame, self, bg=DARK_BLUE)
         self.selector_bar = SelectorBar(self.tools_frame, self, bg=DARK_BLUE)
+        self.compile_progress = ttk.Progressbar(self.tools_frame, mode="indeterminate", length=80)
 
         self.vertical_pane = tk.PanedWindow(
             orient=tk.VERTICAL, sashpad=5, sashrelief="solid", bg=DARK_BLUE)
@@ -239,6 +89,19 @@ class MainApplication(tk.Tk):
     def stop(self):
         self.controller.stop()
 
+    def show_compiling(self, compiling):
+        """
+        Shows an indicator while the sketch is compiled in the background
+        Arguments:
+            compiling: True to show the indicator, False to hide it
+        """
+        if compiling:
+            self.compile_progress.pack(side="left", padx=10)
+            self.compile_progress.start(10)
+        else:
+            self.compile_progress.stop()
+            self.compile_progress.pack_forget()
+
     def editor_undo(self):
         self.editor_frame.text.edit_undo()
 
@@ -263,6 +126,9 @@ class MainApplication(tk.Tk):
     def get_code(self):
         return self.editor_frame.text.get("1.0", tk.END)
 
+    def share_tokens(self, code):
+        self.editor_frame.text.share_tokens(code)
+
     def open_pin_configuration(self, event=None):
         """
         Top level window to configure pins connected to the
@@ -278,42 +144,18 @@ class MainApplication(tk.Tk):
         self.controller.zoom_out()
 
     def check_if_executions(self):
-        try:
-            with open('executions.txt', 'r') as file:
-                contents = file.read()
-                print(contents)
-                jotasones = contents.split("--------------------------------------------------------")
-                for jeson in (jotasones):
-                    print(jeson)
-                    if len(jeson) > 0:
-                        try:
-                            r = requests.post('http://147.189.171.97:8000/insertaEjecucion',
-                                              headers={'Accept': 'application/json'}, json=jeson)
-
-                            print(r)
-                        except requests.exceptions.ConnectionError as ce:
-                            print(f'la excepción es {ce}')
-                            traceback.print_exc()
-                            self.controller.console.write_error(
-                                console.Error("Error de conexión", 0, 0,
-                                              "Las ejecuciones del "
-                                              "archivo executions.txt no se han podido enviar correctamente."
-                                              " Si es necesario avisa a tu profesor"))
-                            break
-
-                        sleep(0.50)
-
-                file.close()
-
-                messagebox.showinfo('Ejecuciones enviadas',
-                                    "Se han enviado correctamente las ejecuciones del archivo executions.txt.")
-                os.remove('executions.txt')
-
-        except FileNotFoundError:
-            print("The 'executions.txt' file does not exist")
-            messagebox.showinfo('No existe el archivo',
-                                "No existe el archivo executions.txt con las ejecuciones a enviar.")
-
+        uploader = self.controller.uploader
+        if uploader.is_failing():
+            messagebox.showerror('Error de conexión',
+                                 f"Las ejecuciones pendientes no se han podido enviar tras {uploader.failures}"
+                                 " intentos. Si es necesario avisa a tu profesor.")
+        pending = uploader.replay()
+        if pending > 0:
+            messagebox.showinfo('Ejecuciones pendientes',
+                                f"Se están enviando en segundo plano {pending} ejecuciones pendientes.")
+        else:
+            messagebox.showinfo('Sin ejecuciones pendientes',
+                                "No hay ejecuciones pendientes de enviar.")
 
     def change_zoom_label(self, zoom_level):
         self.drawing_frame.change_zoom_label(zoom_level)
@@ -344,6 +186,9 @@ class MainApplication(tk.Tk):
         self.controller.configure_layer(
             self.drawing_frame.canvas, self.drawing_frame.hud_canvas)
 
+    def change_speed(self, event):
+        self.controller.change_speed(self.selector_bar.speed_selector.current())
+
     def show_circuit_selector(self, showing):
         if showing:
             self.selector_bar.recover_circuit_selector()
@@ -778,7 +623,7 @@ class MenuBar(tk.Menu):
     def check_if_logout(self):
         if messagebox.askyesno('Cerrar Sesión', '¿Seguro que quieres cerrar sesión? Se perderá el sketch si no está guardado'):
             self.application.close()
-            app = LoginApplication(True)
+            app = login_window.LoginApplication(True)
             app.mainloop()
 
 
@@ -992,15 +837,16 @@ class EditorFrame(tk.Frame):
         self.text.insert(tk.END, "}")
 
     def _on_change(self, event):
-        self.line_bar.show_lines()
+        self.line_bar.redraw()
 
     class TextEditor(tk.Text):
 
         def __init__(self, *args, **kwargs):
             tk.Text.__init__(self, *args, **kwargs)
 
-            self.keywords = self.__get_keywords("assets/colors.txt")
-            self.comment_lines = []
+            self.keywords = highlighter.read_keywords("assets/colors.txt")
+            self.highlighter = highlighter.Highlighter(self.keywords, transpiler.get_session().tokenize)
+            self.highlight_job = None
 
             self._orig = self._w + "_orig"
             self.tk.call("rename", self._w, self._orig)
@@ -1008,133 +854,98 @@ class EditorFrame(tk.Frame):
             self.__create_tags()
 
         def update_highlight(self):
-            def step():
-                i = 0
-                while True:
-                    keyword = self.keywords[i]
-                    if len(keyword) == 3:
-                        self.highlight_all_delimited(
-                            r'%s' % keyword[0], r'%s' % keyword[1], keyword[2])
-                    elif keyword[0][0:2] == '\\"' or keyword[0][0:2] == "\\'":
-                        self.highlight_all(r'%s' % keyword[0], keyword[1], True)
-                    elif keyword[0][0] == '\\':
-                        self.highlight_all(r'%s' % keyword[0], keyword[1])
-                    elif keyword[0][0:2] == '//':
-                        self.highlight_all(r'%s' % keyword[0], keyword[1], True)
-                    else:
-                        self.highlight_all(r'\b%s\b' % keyword[0], keyword[1])
-                    self.after(1, gen.__next__)
-                    i += 1
-                    if i == len(self.keywords):
-                        i = 0
-                        for match in self.comment_lines:
-                            self.__remove_tags(match[0], match[1])
-                        self.comment_lines = []
-                    yield
-
-            gen = step()
-            gen.__next__()
-
-        def highlight_all(self, pattern, tag, is_repaintable=False):
-            for match in self.search_re(pattern, is_repaintable):
-                self.highlight(tag, match[0], match[1])
-
-        def highlight_all_delimited(self, pattern_s, pattern_e, tag):
-            for match in self.search_re_delimited(pattern_s, pattern_e):
-                self.highlight(tag, match[0], match[1])
-
-        def highlight(self, tag, start, end):
-            is_comment = False
-            for comm in self.comment_lines:
-                comm_start = tuple(map(int, comm[0].split('.')))
-                comm_end = tuple(map(int, comm[1].split('.')))
-                fl_start = tuple(map(int, start.split('.')))
-                fl_end = tuple(map(int, end.split('.')))
-                if (
-                        comm_start[0] <= fl_start[0] <= comm_end[0]
-                        and comm_start[0] <= fl_end[0] <= comm_end[0]
-                ):
-                    finished = False
-                    if comm_start[0] == fl_start[0] == comm_end[0]:
-                        if fl_end[0] == fl_start[0]:
-                            finished = (
-                                comm_start[1] < fl_start[1] < comm_end[1]
-                                and comm_start [1] < fl_end[1] < comm_end[1]
-                            )
-                        else:
-                            finished = True
-                    elif comm_start[0] == fl_start[0]:
-                        finished = comm_start[1] < fl_start[1]
-                    elif comm_end[0] == fl_start[0]:
-                        finished = fl_start[1] < comm_end[1]
-                    elif comm_start[0] == fl_end[0]:
-                        finished = comm_start[1] < fl_end[1]
-                    elif comm_end[0] == fl_end[0]:
-                        finished = fl_end[1] < comm_end[1]
-                    else:
-                        finished = True
-                    if finished:
-                        is_comment = True
-                        break
-            if not is_comment:
-                self.__remove_tags(start, end)
-                self.tag_add(tag, start, end)
-
-        def search_re(self, pattern, is_repaintable):
             """
-            Uses the python re library to match patterns.
+            Schedules the highlighting of the lines edited since the last
+            time. Nothing is done while the text does not change.
+            """
+            if self.highlight_job is None and self.highlighter.is_dirty():
+                self.highlight_job = self.after_idle(self.__highlight_lines)
+
+        def __highlight_lines(self):
+            """
+            Tags the lines whose highlighting changed. The spans of a line
+            come sorted and without overlaps, with integer columns, and a
+            keyword inside a comment or a string is never a span, so the
+            spans are added as they come, without checking them against
+            the comments.
+            """
+            self.highlight_job = None
+            updated = list(self.highlighter.update(self.__get_line, self.__line_count()))
+            # The tags are removed once for every run of consecutive lines
+            first = last = None
+            for line, _ in updated + [(None, None)]:
+                if last is not None and line != last + 1:
+                    self.__remove_tags(f"{first}.0", f"{last}.end")
+                    first = None
+                if first is None:
+                    first = line
+                last = line
+            for line, spans in updated:
+                for start, end, tag in spans:
+                    self.tk.call(self._orig, "tag", "add", tag,
+                                 f"{line}.{start}", f"{line}.{end}")
+
+        def share_tokens(self, code):
+            """
+            Hands the tokens of the highlighted lines to the compiler, so
+            the code is not lexed again when it is executed.
 
             Arguments:
-                pattern - The pattern to match.
-            Return value:
-                A list of tuples containing the start and end indices of the matches.
-                e.g. [("0.4", "5.9"]
+                code - The code that is going to be compiled.
             """
-            matches = []
-            text = self.get("1.0", tk.END).splitlines()
-            for i, line in enumerate(text):
-                for match in re.finditer(pattern, line):
-                    matches.append(
-                        (f"{i + 1}.{match.start()}", f"{i + 1}.{match.end()}"))
-            if is_repaintable:
-                self.comment_lines.extend(matches)
-            return matches
-
-        def search_re_delimited(self, pattern_s, pattern_e):
+            lexed = self.highlighter.stream(code)
+            if lexed is not None:
+                transpiler.share_tokens(code, *lexed)
+
+        def __get_line(self, line):
+            return str(self.tk.call(self._orig, "get", f"{line}.0", f"{line}.end"))
+
+        def __line_count(self):
+            index = self.tk.call(self._orig, "index", "end-1c")
+            return int(str(index).split(".")[0])
+
+        def __edited_lines(self, args):
             """
-            Uses the python re library to match patterns.
+            Finds the lines touched by an editing command before running it.
 
             Arguments:
-                pattern_s - The starting pattern to match.
-                pattern_e - The ending pattern to match.
+                args - The arguments of the command.
             Return value:
-                A list of tuples containing the start and end indices of the matches.
-                e.g. [("0.4", "5.9"]
+                A tuple with the first and the last line of the edited range
+                and the number of lines of the text.
             """
-            matches = []
-            text = self.get("1.0", tk.END).splitlines()
-            start = end = -1
-            for i, line in enumerate(text):
-                for match in re.finditer(pattern_s, line):
-                    if start == -1:
-                        start = f"{i + 1}.{match.start()}"
-                for match in re.finditer(pattern_e, line):
-                    if end == -1:
-                        end = f"{i + 1}.{match.end()}"
-                if start != -1 and end != -1:
-                    matches.append((start, end))
-                    start = end = -1
-            self.comment_lines = matches
-            return matches
+            lines = self.__line_count()
+            first = self.tk.call(self._orig, "index", args[1])
+            last = first
+            if args[0] == "replace" or (args[0] == "delete" and len(args) > 2):
+                last = self.tk.call(self._orig, "index", args[2])
+            elif args[0] == "delete":
+                last = self.tk.call(self._orig, "index", f"{args[1]}+1c")
+            first = int(str(first).split(".")[0])
+            last = min(max(first, int(str(last).split(".")[0])), lines)
+            return first, last, lines
 
         def _proxy(self, *args):
             result = None
             command = (self._orig,) + args
+            edited = None
             try:
+                if args[0] in ("insert", "replace", "delete"):
+                    edited = self.__edited_lines(args)
                 result = self.tk.call(command)
             except Exception:
                 return result
 
+            if edited is not None:
+                first, last, lines = edited
+                removed = last - first
+                added = max(0, removed + self.__line_count() - lines)
+                self.highlighter.edit(first, removed, added)
+                self.update_highlight()
+            elif args[0:2] == ("edit", "undo") or args[0:2] == ("edit", "redo"):
+                self.highlighter.reset(self.__line_count())
+                self.update_highlight()
+
             if (args[0] in ("insert", "replace", "delete")
                     or args[0:3] == ("mark", "set", "insert")
                     or args[0:2] == ("xview", "moveto")
@@ -1154,54 +965,68 @@ class EditorFrame(tk.Frame):
             self.tag_configure("dark", foreground="#434F54")
 
         def __remove_tags(self, start, end):
-            self.tag_remove("blue", start, end)
-            self.tag_remove("strblue", start, end)
-            self.tag_remove("orange", start, end)
-            self.tag_remove("green", start, end)
-            self.tag_remove("gray", start, end)
-            self.tag_remove("dark", start, end)
-
-        def __get_keywords(self, file_name):
-            keywords = []
-            file = open(file_name, "r")
-            lines = list(
-                filter(lambda line: line != '',
-                       map(lambda line: str(line).rstrip(), file.readlines())
-                       )
-            )
-            for line in lines:
-                line_elems = line.split('\t')
-                if len(line_elems) == 2:
-                    keywords.append((line_elems[0], line_elems[1]))
-                elif len(line_elems) == 3:
-                    keywords.append(
-                        (line_elems[0], line_elems[1], line_elems[2]))
-            return keywords
+            for tag in ("blue", "strblue", "orange", "green", "gray", "dark"):
+                self.tk.call(self._orig, "tag", "remove", tag, start, end)
 
     class LineNumberBar(tk.Canvas):
 
         def __init__(self, *args, **kwargs):
             tk.Canvas.__init__(self, *args, **kwargs)
             self.editor = None
+            # Pool of text items and the (line, x, y) shown by each one
+            self.items = []
+            self.shown = []
+            self.redraw_job = None
 
         def attach(self, editor):
             self.editor = editor
 
-        def show_lines(self, *args):
-            self.delete("all")
+        def redraw(self, *args):
+            """
+            Schedules the redrawing of the line numbers. All the changes
+            notified before the next idle cycle are drawn at once.
+            """
+            if self.redraw_job is None:
+                self.redraw_job = self.after_idle(self.show_lines)
 
+        def show_lines(self, *args):
+            """
+            Shows the numbers of the visible lines. The text items are
+            reused, so only the ones whose line or position changed are
+            modified and the ones that are not needed are hidden.
+            """
+            self.redraw_job = None
+            visible = []
             i = self.editor.index("@0,0")
             while True:
                 dline = self.editor.dlineinfo(i)
                 if dline is None:
                     break
                 line = str(i).split(".")[0]
-                x = 28 - 9 * len(line)
-                y = dline[1]
-                self.create_text(x, y, anchor="nw", text=line,
-                                 fill="white", font=('consolas', 12, 'bold'))
+                visible.append((line, 28 - 9 * len(line), dline[1]))
                 i = self.editor.index("%s+1line" % i)
 
+            for n, (line, x, y) in enumerate(visible):
+                if n == len(self.items):
+                    self.items.append(self.create_text(x, y, anchor="nw", text=line, fill="white",
+                                                       font=('consolas', 12, 'bold')))
+                    self.shown.append((line, x, y))
+                    continue
+                shown = self.shown[n]
+                if shown == (line, x, y):
+                    continue
+                if shown is None:
+                    self.itemconfigure(self.items[n], text=line, state="normal")
+                elif shown[0] != line:
+                    self.itemconfigure(self.items[n], text=line)
+                if shown is None or shown[1:] != (x, y):
+                    self.coords(self.items[n], x, y)
+                self.shown[n] = (line, x, y)
+            for n in range(len(visible), len(self.items)):
+                if self.shown[n] is not None:
+                    self.itemconfigure(self.items[n], state="hidden")
+                    self.shown[n] = None
+
 
 class ConsoleFrame(tk.Frame):
 
@@ -1463,6 +1288,9 @@ class SelectorBar(tk.Frame):
         self.lb_track = tk.Label(self, text="Circuito:", bg=DARK_BLUE, fg="white", font=(
             "Consolas", 13), underline=1)
         self.track_selector = ttk.Combobox(self, state="readonly")
+        self.lb_speed = tk.Label(self, text="Velocidad:", bg=DARK_BLUE, fg="white", font=(
+            "Consolas", 13), underline=0)
+        self.speed_selector = ttk.Combobox(self, state="readonly", width=12)
 
         self.robot_selector['values'] = ["Robot móvil (2 infrarrojos)",
                                          "Robot móvil (3 infrarrojos)",
@@ -1474,18 +1302,25 @@ class SelectorBar(tk.Frame):
             "Obstáculo", "Recta y obstáculo",
             "Circuito con nodos"]
         self.track_selector.current(0)
+        self.speed_selector['values'] = ["Tiempo real", "x2", "x4", "x10", "Máxima"]
+        self.speed_selector.current(0)
 
         self.robot_selector.bind(
             "<<ComboboxSelected>>", application.change_robot)
         self.track_selector.bind(
             "<<ComboboxSelected>>", application.change_track)
+        self.speed_selector.bind(
+            "<<ComboboxSelected>>", application.change_speed)
         application.bind("<Alt-r>", lambda event: self.robot_selector.focus())
         application.bind("<Alt-i>", lambda event: self.track_selector.focus())
+        application.bind("<Alt-v>", lambda event: self.speed_selector.focus())
 
         self.lb_robot.grid(row=0, column=0)
         self.robot_selector.grid(row=0, column=1, padx=(5, 15))
         self.lb_track.grid(row=0, column=2)
         self.track_selector.grid(row=0, column=3, padx=(5, 10))
+        self.lb_speed.grid(row=0, column=4)
+        self.speed_selector.grid(row=0, column=5, padx=(5, 10))
 
     def hide_circuit_selector(self):
         if self.lb_track.winfo_ismapped():
@@ -0,0 +1,261 @@
+import bisect
+import copy
+import re
+
+from antlr4 import Token
+from antlr4.Token import CommonToken
+from compiler.ArduinoLexer import ArduinoLexer
+
+
+STRINGS = (ArduinoLexer.STRING_CONST, ArduinoLexer.UNTERMINATED_STRING)
+CHARS = (ArduinoLexer.CHAR_CONST, ArduinoLexer.UNTERMINATED_CHAR)
+# The lexer skips the comments, so they are searched between the tokens
+COMMENT = re.compile(r"//.*|/\*.*?\*/")
+
+
+def read_keywords(file_name):
+    """
+    Reads the highlighting rules of the editor.
+
+    Arguments:
+        file_name - The path of the file with the rules. Each line has a
+        pattern and a tag, or a start pattern, an end pattern and a tag
+        for the delimited ones, separated by tabs.
+    Return value:
+        A list of tuples with the rules in the order of the file.
+    """
+    keywords = []
+    with open(file_name, "r") as file:
+        lines = [line.rstrip() for line in file.readlines()]
+    for line in lines:
+        line_elems = line.split('\t')
+        if len(line_elems) == 2:
+            keywords.append((line_elems[0], line_elems[1]))
+        elif len(line_elems) == 3:
+            keywords.append((line_elems[0], line_elems[1], line_elems[2]))
+    return keywords
+
+
+class Line:
+    """
+    The result of lexing a line of the text.
+    """
+
+    def __init__(self, text, comment):
+        """
+        Arguments:
+            text - The text of the line, without the line break.
+            comment - True if the line starts inside a block comment.
+        """
+        self.text = text
+        self.comment = comment
+        self.spans = []
+        self.tokens = []
+        self.errors = []
+        self.end_comment = False
+
+
+class Highlighter:
+    """
+    Highlighter of the editor driven by the tokens of the compiler. The
+    tags of the tokens come from the highlighting rules: the text of a
+    token is looked up in the keywords and the rules of the comments and
+    the strings give the tags of those. The comments and the strings are
+    single tokens (or gaps between tokens), so the words inside them are
+    never looked up and the spans of a line never overlap. Every line is
+    lexed on its own, knowing if it starts inside a block comment (the
+    only token of the lexer that can span several lines), so an edit only
+    lexes the edited lines and the following ones while they start in a
+    different state than before, e.g. up to the end of a comment that was
+    opened.
+    """
+
+    def __init__(self, keywords, tokenize):
+        """
+        Arguments:
+            keywords - The rules as returned by read_keywords.
+            tokenize - A function that returns the tokens and the
+            lexical errors of a text, as CompilerSession.tokenize.
+        """
+        self.tokenize = tokenize
+        self.words = {}
+        self.comment_tag = self.line_comment_tag = None
+        self.string_tag = self.char_tag = None
+        for keyword in keywords:
+            if len(keyword) == 3:
+                self.comment_tag = keyword[2]
+            elif keyword[0].startswith('//'):
+                self.line_comment_tag = keyword[1]
+            elif keyword[0].startswith('\\"'):
+                self.string_tag = keyword[1]
+            elif keyword[0].startswith("\\'"):
+                self.char_tag = keyword[1]
+            else:
+                self.words[re.sub(r'\\(.)', r'\1', keyword[0])] = keyword[1]
+        self.lines = [None]
+        self.dirty = {0}
+
+    def edit(self, line, removed, added):
+        """
+        Registers an edit of the text.
+
+        Arguments:
+            line - The first line (starting at 1) touched by the edit.
+            removed - The number of line breaks removed by the edit.
+            added - The number of line breaks added by the edit.
+        """
+        first = line - 1
+        shift = added - removed
+        # The lines edited before and still pending move with the text
+        self.dirty = {dirty + shift if dirty > first + removed else dirty
+                      for dirty in self.dirty if not first < dirty <= first + removed}
+        self.dirty.update(range(first, first + added + 1))
+        self.lines[line:line + removed] = [None] * added
+
+    def reset(self, lines):
+        """
+        Forgets all the lines.
+
+        Arguments:
+            lines - The number of lines of the text.
+        """
+        self.lines = [None] * lines
+        self.dirty = set(range(lines))
+
+    def is_dirty(self):
+        return bool(self.dirty)
+
+    def update(self, get_line, count):
+        """
+        Lexes the lines edited since the last update and the following
+        ones that start in a different state than the last time, and
+        finds the lines whose highlighting changed.
+
+        Arguments:
+            get_line - A function that returns the text of a line
+            (starting at 1) without the line break.
+            count - The number of lines of the text.
+        Return value:
+            A generator of tuples with the line (starting at 1) and its
+            spans, a list of (start, end, tag) tuples with the columns of
+            the highlighted regions.
+        """
+        if count != len(self.lines):
+            self.reset(count)
+        dirty = sorted(self.dirty)
+        pending, self.dirty = set(dirty), set()
+        line = dirty[0] if dirty else count
+        while line < count:
+            comment = line > 0 and self.lines[line - 1].end_comment
+            old = self.lines[line]
+            if line not in pending and old is not None and old.comment == comment:
+                # The lines up to the next edited one are lexed as before
+                following = bisect.bisect_right(dirty, line)
+                if following == len(dirty):
+                    break
+                line = dirty[following]
+                continue
+            new = self.lines[line] = self.__lex(get_line(line + 1), comment)
+            if line in pending or old is None or new.spans != old.spans:
+                yield line + 1, new.spans
+            line += 1
+
+    def stream(self, code):
+        """
+        Joins the tokens of the lines into the tokens of the whole text,
+        the same ones the lexer of the compiler finds, so the text is not
+        lexed again when it is compiled.
+
+        Arguments:
+            code - The whole text, ending with a line break.
+        Return value:
+            A tuple with the list of tokens (ending with the EOF token) and
+            the lexical errors, or None if the lines are not the ones of
+            the code or a block comment is not closed (the lexer does not
+            take it as a comment).
+        """
+        if self.dirty or self.lines[-1].end_comment:
+            return None
+        if "\n".join(line.text for line in self.lines) + "\n" != code:
+            return None
+        tokens = []
+        errors = []
+        offset = 0
+        for number, line in enumerate(self.lines, 1):
+            for token in line.tokens:
+                token = token.clone()
+                token.start += offset
+                token.stop += offset
+                token.line = number
+                tokens.append(token)
+            for error in line.errors:
+                error = copy.copy(error)
+                error.line = number
+                errors.append(error)
+            offset += len(line.text) + 1
+        eof = CommonToken(type=Token.EOF, start=offset, stop=offset - 1)
+        eof.line = len(self.lines) + 1
+        eof.column = 0
+        eof.text = "<EOF>"
+        tokens.append(eof)
+        return tokens, errors
+
+    def __lex(self, text, comment):
+        """
+        Lexes a line.
+
+        Arguments:
+            text - The text of the line, without the line break.
+            comment - True if the line starts inside a block comment.
+        Return value:
+            The line (as Line instance).
+        """
+        line = Line(text, comment)
+        start = 0
+        if comment:
+            if "*/" not in text:
+                self.__add(line, 0, len(text), self.comment_tag)
+                line.end_comment = True
+                return line
+            start = text.index("*/") + 2
+            self.__add(line, 0, start, self.comment_tag)
+        tokens, errors = self.tokenize(text[start:])
+        previous = start
+        end = len(text)
+        for token in tokens:
+            # The tokens must not read their text from the input of the lexer,
+            # that changes with the next line
+            token.text = token.text
+            token.start += start
+            token.stop += start
+            token.column += start
+            first = token.start if token.type != Token.EOF else len(text)
+            for match in COMMENT.finditer(text, previous, first):
+                self.__add(line, match.start(), match.end(), self.line_comment_tag
+                           if match.group().startswith('//') else self.comment_tag)
+            if token.type == Token.EOF:
+                break
+            if token.text == "/" and text.startswith("*", first + 1):
+                # A block comment that goes on in the next lines
+                self.__add(line, first, len(text), self.comment_tag)
+                line.end_comment = True
+                end = first
+                break
+            if token.type in STRINGS:
+                self.__add(line, first, token.stop + 1, self.string_tag)
+            elif token.type in CHARS:
+                self.__add(line, first, token.stop + 1, self.char_tag)
+            else:
+                self.__add(line, first, token.stop + 1, self.words.get(token.text))
+            line.tokens.append(token)
+            previous = token.stop + 1
+        for error in errors:
+            error.column += start
+            if error.column < end:
+                line.errors.append(error)
+        return line
+
+    @staticmethod
+    def __add(line, start, end, tag):
+        if tag is not None and end > start:
+            line.spans.append((start, end, tag))
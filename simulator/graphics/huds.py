@@ -1,5 +1,43 @@
+import functools
 import tkinter as tk
-from PIL import Image, ImageTk
+import graphics.assets as assets
+
+# Arrows of the HUDs for the slow, medium and fast velocities
+SLOW_ARROW = 'assets/slow-speed.png'
+MID_ARROW = 'assets/mid-speed.png'
+FAST_ARROW = 'assets/full-speed.png'
+ARROW_SCALE = 0.5
+
+
+def deferrable(method):
+    """
+    Decorator for the methods that update the data of the HUD.
+    While the HUD is deferred only the last call of every
+    method is kept, and it is done when the HUD is rendered
+    Arguments:
+        method: the method that draws the data
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        if self.deferred:
+            self.pending[method.__name__] = (method, args)
+        else:
+            method(self, *args)
+    return wrapper
+
+
+def _arrow(vel):
+    """
+    Returns the arrow that represents a velocity (red slow,
+    yellow medium, blue fast)
+    Arguments:
+        vel: the velocity
+    """
+    if abs(vel) < 100:
+        return SLOW_ARROW
+    elif abs(vel) > 200:
+        return FAST_ARROW
+    return MID_ARROW
 
 
 class HUD:
@@ -9,6 +47,8 @@ class HUD:
         Constructor for HUD superclass
         """
         self.canvas: tk.Canvas = None
+        self.deferred = False
+        self.pending = {}
 
     def set_canvas(self, canvas: tk.Canvas):
         """
@@ -21,9 +61,30 @@ class HUD:
         self.set_text()
 
     def reboot(self):
+        self.pending = {}
         self.canvas.delete('all')
         self.set_text()
 
+    def set_deferred(self, deferred):
+        """
+        Sets if the data is drawn when it changes (False) or
+        only when the HUD is rendered (True)
+        Arguments:
+            deferred: True if the changes wait for render, False if else
+        """
+        if not deferred:
+            self.render()
+        self.deferred = deferred
+
+    def render(self):
+        """
+        Draws the last data received by every deferred method
+        """
+        pending = self.pending
+        self.pending = {}
+        for method, args in pending.values():
+            method(self, *args)
+
     def set_text(self):
         """
         Shows the text of the data that the HUD is going to
@@ -39,9 +100,6 @@ class MobileHUD(HUD):
         Constructor for mobile robot's HUD
         """
         super().__init__()
-        self.img_ff = Image.open('assets/full-speed.png')
-        self.img_mf = Image.open('assets/mid-speed.png')
-        self.img_sf = Image.open('assets/slow-speed.png')
 
     def set_text(self):
         """
@@ -58,6 +116,7 @@ class MobileHUD(HUD):
         self.canvas.create_text(250, 50, text="└Distancia:", font=(
             "Consolas", 13), anchor="w", fill="white")
 
+    @deferrable
     def set_wheel(self, vels):
         """
         Method that gets all the velocitys and calls display_wheels
@@ -80,26 +139,13 @@ class MobileHUD(HUD):
             i: the index of the wheel
             vel: the velocity of the wheel
         """
-        w = int(self.img_ff.width * 0.5)
-        h = int(self.img_ff.height * 0.5)
-        self.ff = self.img_ff.resize((w, h), Image.ANTIALIAS)
-        self.mf = self.img_mf.resize((w, h), Image.ANTIALIAS)
-        self.sf = self.img_sf.resize((w, h), Image.ANTIALIAS)
-        if abs(vel) < 100:
-            if vel < 0:
-                self.sf = self.sf.rotate(180, expand=True)
-            self.imgs.append(ImageTk.PhotoImage(self.sf))
-        elif abs(vel) > 200:
-            if vel < 0:
-                self.ff = self.ff.rotate(180, expand=True)
-            self.imgs.append(ImageTk.PhotoImage(self.ff))
-        else:
-            if vel < 0:
-                self.mf = self.mf.rotate(180, expand=True)
-            self.imgs.append(ImageTk.PhotoImage(self.mf))
+        angle = 180 if vel < 0 else 0
+        self.imgs.append(assets.photo(
+            _arrow(vel), ARROW_SCALE, angle, self.canvas))
         y = 25 + (25 * i)
         self.canvas.create_image(200, y, image=self.imgs[i], tags="arr_img")
 
+    @deferrable
     def set_circuit(self, measurements):
         """
         Displays if the robot is on the circuit or outside it
@@ -119,6 +165,7 @@ class MobileHUD(HUD):
         self.canvas.create_text(100, 75, text=text, font=(
             "Consolas", 13), anchor="w", fill="white", tags="cir")
 
+    @deferrable
     def set_detect_obstacle(self, dists):
         """
         Displays if the robot is detecting an obstacle, and the distance
@@ -150,9 +197,6 @@ class ActuatorHUD(HUD):
         Constructor for linear actuator's HUD
         """
         super().__init__()
-        self.img_ff = Image.open('assets/full-speed.png')
-        self.img_mf = Image.open('assets/mid-speed.png')
-        self.img_sf = Image.open('assets/slow-speed.png')
 
     def set_text(self):
         """
@@ -165,6 +209,7 @@ class ActuatorHUD(HUD):
         self.canvas.create_text(5, 75, text="Botón derecho:", font=(
             "Consolas", 13), anchor="w", fill="white")
 
+    @deferrable
     def set_pressed(self, but_states):
         """
         Parses the button sates to data to show on the HUD
@@ -177,33 +222,45 @@ class ActuatorHUD(HUD):
             self.canvas.create_text(150 + 20 * ((i + 1) % 2), 50 + 25 * i, text=text, font=("Consolas", 13), anchor="w",
                                     fill="white", tags="but_text")
 
+    @deferrable
     def set_direction(self, vel):
         """
         Draws the direction arrows with the information
         of the velocity
         """
         self.canvas.delete('arr_img')
-        w = int(self.img_ff.width * 0.5)
-        h = int(self.img_ff.height * 0.5)
-        self.ff = self.img_ff.resize((w, h), Image.ANTIALIAS)
-        self.mf = self.img_mf.resize((w, h), Image.ANTIALIAS)
-        self.sf = self.img_sf.resize((w, h), Image.ANTIALIAS)
-        if abs(vel) < 100:
-            if vel < 0:
-                self.sf = self.sf.rotate(90, expand=True)
-            else:
-                self.sf = self.sf.rotate(-90, expand=True)
-            self.img = ImageTk.PhotoImage(self.sf)
-        elif abs(vel) > 200:
-            if vel < 0:
-                self.ff = self.ff.rotate(90, expand=True)
-            else:
-                self.ff = self.ff.rotate(-90, expand=True)
-            self.img = ImageTk.PhotoImage(self.ff)
-        else:
-            if vel < 0:
-                self.mf = self.mf.rotate(90, expand=True)
-            else:
-                self.mf = self.mf.rotate(-90, expand=True)
-            self.img = ImageTk.PhotoImage(self.mf)
+        angle = 90 if vel < 0 else -90
+        self.img = assets.photo(_arrow(vel), ARROW_SCALE, angle, self.canvas)
         self.canvas.create_image(250, 25, image=self.img, tags="arr_img")
+
+
+class HeadlessHUD(HUD):
+
+    def __init__(self):
+        """
+        Constructor for a HUD without canvas. Accepts every
+        update of the mobile robot and linear actuator HUDs
+        and ignores it
+        """
+        super().__init__()
+
+    def set_canvas(self, canvas: tk.Canvas):
+        pass
+
+    def reboot(self):
+        pass
+
+    def set_wheel(self, vels):
+        pass
+
+    def set_circuit(self, measurements):
+        pass
+
+    def set_detect_obstacle(self, dists):
+        pass
+
+    def set_pressed(self, but_states):
+        pass
+
+    def set_direction(self, vel):
+        pass
@@ -7,11 +7,15 @@ import files.files_reader as filesr
 
 class Layer:
 
-    def __init__(self):
+    def __init__(self, headless=False):
         """
         Constructor for superclass layer
+        Arguments:
+            headless: True if the layer runs without canvas
+            (nothing is drawn), False if else
         """
-        self.drawing = drawing.Drawing()
+        self.headless = headless
+        self.drawing = drawing.HeadlessDrawing() if headless else drawing.Drawing()
         self.hud = None
         self.robot = None
         self.robot_drawing: robot_drawings.RobotDrawing = None
@@ -61,6 +65,23 @@ class Layer:
         """
         pass
 
+    def set_deferred(self, deferred):
+        """
+        Sets if the movements are shown immediately (False) or
+        only when the layer is rendered (True)
+        Arguments:
+            deferred: True if the changes wait for render, False if else
+        """
+        self.drawing.set_deferred(deferred)
+        self.hud.set_deferred(deferred)
+
+    def render(self):
+        """
+        Shows the last state of the robot on the canvas and the HUD
+        """
+        self.drawing.render()
+        self.hud.render()
+
     def set_canvas(self, canvas, hud_canvas):
         """
         Sets the canvas that the drawing and will use
@@ -75,23 +96,10 @@ class Layer:
 
     def _zoom_config(self):
         """
-        Configures the zoom in case when it changes
+        Configures the zoom in case when it changes. The drawing
+        redraws its elements up to scale by itself
         """
         self._zoom_percentage()
-        if self.is_drawing:
-            self._zoom_redraw()
-
-    def _zoom_redraw(self):
-        """
-        Once the zoom changes, use this method for redrawing everything
-        up to scale
-        """
-        self.drawing.delete_zoomables()
-        self._draw_before_robot()
-        self.robot_drawing.draw()
-
-    def _draw_before_robot(self):
-        pass
 
     def _zoom_percentage(self):
         """
@@ -108,14 +116,15 @@ class Layer:
 
 class MobileRobotLayer(Layer):
 
-    def __init__(self, n_light_sens):
+    def __init__(self, n_light_sens, headless=False):
         """
         Constructor for MobileRobotLayer
         Arguments:
             n_light_sens: the number of light sensors
+            headless: True if the layer runs without canvas
         """
-        super().__init__()
-        self.hud = huds.MobileHUD()
+        super().__init__(headless)
+        self.hud = self.__create_hud()
         self.robot_data = self.rdr.parse_robot(n_light_sens-2)
         self.robot = robots.MobileRobot(n_light_sens, self.robot_data)
         self.robot_drawing = robot_drawings.MobileRobotDrawing(
@@ -183,11 +192,20 @@ class MobileRobotLayer(Layer):
         """
         Resets the robot
         """
-        self.hud = huds.MobileHUD()
+        self.hud = self.__create_hud()
         self.robot = robots.MobileRobot(self.n_sens, self.robot_data)
         self.robot_drawing = robot_drawings.MobileRobotDrawing(
             self.drawing, self.n_sens)
 
+    def __create_hud(self):
+        """
+        Creates the HUD of the mobile robot, or one that shows
+        nothing if the layer is headless
+        """
+        if self.headless:
+            return huds.HeadlessHUD()
+        return huds.MobileHUD()
+
     def __move_keys(self, movement):
         """
         Moves the robot using WASD
@@ -282,13 +300,6 @@ class MobileRobotLayer(Layer):
         self.__create_circuit()
         self.__create_obstacle()
 
-    def _draw_before_robot(self):
-        """
-        Draws before the robot so the z-index is correct
-        """
-        self.__create_circuit()
-        self.__create_obstacle()
-
     def __create_circuit(self):
         """
         Creates and draws the circuit in the canvas
@@ -372,13 +383,15 @@ class MobileRobotLayer(Layer):
 
 class LinearActuatorLayer(Layer):
 
-    def __init__(self):
+    def __init__(self, headless=False):
         """
         Constuctor for LinearActuatorLayer
+        Arguments:
+            headless: True if the layer runs without canvas
         """
-        super().__init__()
-        self.hud = huds.ActuatorHUD()
-        self.robot_data = self.rdr.parse_robot(2)
+        super().__init__(headless)
+        self.hud = huds.HeadlessHUD() if headless else huds.ActuatorHUD()
+        self.robot_data = self.rdr.parse_robot(3)
         self.robot = robots.LinearActuator(self.robot_data)
         self.robot_drawing = robot_drawings.LinearActuatorDrawing(self.drawing)
 
@@ -0,0 +1,127 @@
+import os
+import tkinter as tk
+import tkinter.messagebox as messagebox
+import tkinter.ttk as ttk
+from functools import partial
+from tkinter import Label, Entry, StringVar, Button
+
+import cryptography
+
+import compiler.worker as worker
+import output.login as login
+import startup
+
+
+class LoginApplication(tk.Tk):
+
+    def validateLogin(self, username, password, lab, group, fromFile):
+        if not fromFile:
+            username = username.get().upper()
+            password = password.get()
+            lab = lab.get()
+            group = group.get()
+
+        self.show_waiting(True)
+        self.worker.submit(login.validate, username, password, lab, group, fromFile,
+                           callback=self.__validated, error=self.__failed)
+        self.__poll_worker()
+
+    def __poll_worker(self):
+        if self.worker.poll():
+            self.after(50, self.__poll_worker)
+
+    def __validated(self, result):
+        self.show_waiting(False)
+        if result.ok:
+            self.__open(result.username, result.lab, result.group)
+        else:
+            tk.messagebox.showerror(title="Error", message=result.message)
+
+    def __failed(self, exception):
+        self.show_waiting(False)
+        tk.messagebox.showerror(title="Error", message=str(exception))
+
+    def __open(self, username, lab, group):
+        with startup.measure("import graphics.gui"):
+            # Usually already imported in the background by startup.preload
+            import graphics.gui as gui
+        self.worker.shutdown()
+        self.destroy()
+        tk.messagebox.showinfo(title="Sesión Iniciada", message="Has iniciado sesión como " + username +
+                               ", Laboratorio: " + lab + ", Grupo: " + group)
+        with startup.measure("creación de la ventana principal"):
+            app = gui.MainApplication(username.upper(), lab, group)
+        app.mainloop()
+
+    def show_waiting(self, waiting):
+        """
+        Shows that the credentials are being validated and disables
+        the login button meanwhile
+        Arguments:
+            waiting: True while the credentials are being validated
+        """
+        if waiting:
+            self.login_button.config(state=tk.DISABLED)
+            self.status_label.config(text="Conectando...")
+            self.progress.grid(row=6, column=0, columnspan=2, pady=(5, 0))
+            self.progress.start(10)
+        else:
+            self.progress.stop()
+            self.progress.grid_forget()
+            self.status_label.config(text="")
+            self.login_button.config(state=tk.NORMAL)
+
+    def __init__(self, logout, *args, **kwargs):
+        tk.Tk.__init__(self, *args, **kwargs)
+
+        self.geometry('250x170')
+        self.eval('tk::PlaceWindow . center') #la centramos
+        self.title('Login Simulador Software para Robots')
+        self.worker = worker.BackgroundWorker("login")
+
+        # username label and text entry box
+        usernameLabel = Label(self, text="UO*").grid(row=0, column=0)
+        username = StringVar()
+        usernameEntry = Entry(self, textvariable=username).grid(row=0, column=1)
+
+        # password label and password entry box
+        passwordLabel = Label(self, text="Contraseña*").grid(row=1, column=0)
+        password = StringVar()
+        passwordEntry = Entry(self, textvariable=password, show='*').grid(row=1, column=1)
+
+        # laboratory label and laboratory entry box
+        labLabel = Label(self, text="Laboratorio").grid(row=2, column=0)
+        lab = StringVar()
+        labEntry = Entry(self, textvariable=lab).grid(row=2, column=1)
+
+        # group label and group entry box
+        groupLabel = Label(self, text="Grupo").grid(row=3, column=0)
+        group = StringVar()
+        groupEntry = Entry(self, textvariable=group).grid(row=3, column=1)
+
+        validateLogin = partial(self.validateLogin, username, password, lab, group, False)
+
+        # login button
+        self.login_button = Button(self, text="Iniciar Sesión", command=validateLogin)
+        self.login_button.grid(row=5, column=0)
+        self.status_label = Label(self, text="")
+        self.status_label.grid(row=5, column=1)
+        self.progress = ttk.Progressbar(self, mode="indeterminate", length=200)
+
+        #comprobamos si existe archivo de login, si existe se usa la sesión guardada
+        #y se valida en segundo plano
+        if (not logout):
+            try:
+                session = login.read_session()
+                if session is not None:
+                    login.refresh_session(*session)
+                    self.__open(session[0], session[2], session[3])
+            except cryptography.fernet.InvalidToken:
+                tk.messagebox.showerror(title="Error", message='Credenciales de Archivo Incorrectas')
+
+            #self.mainloop()
+        else:
+            try:
+                os.remove('login.txt')
+            except OSError as e:
+                print("Error: %s : %s" % ('login.txt', e.strerror))
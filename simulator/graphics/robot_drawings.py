@@ -1,6 +1,8 @@
 from math import atan2, sqrt
 from math import cos, pi, sin
+import numpy as np
 import graphics.drawing as drawing
+import simulation.occupancy as occupancy
 
 
 class RobotDrawing:
@@ -554,25 +556,32 @@ class MobileRobotDrawing(RobotDrawing):
 
 class Circuit:
 
-    def __init__(self, parts, drawing: drawing.Drawing):
+    def __init__(self, parts, drawing: drawing.Drawing, resolution=occupancy.RESOLUTION):
         """
-        Constructor for Circuit
+        Constructor for Circuit. The pieces of the circuit are
+        created and sampled into its occupancy map
         Arguments:
             parts: a list with circuit*s parts (map with
             orientation: length)
             drawing: the drawing where the circuit is
             going to be represented
+            resolution: the drawing units between two samples
+            of the occupancy map
         """
         self.parts = parts
         self.circuit_parts = []
         self.drawing = drawing
         self.ROAD_WIDTH = 100
+        self.create_straights()
+        self.occupancy = occupancy.OccupancyMap(self.circuit_parts, resolution)
 
     def create_circuit(self):
         """
-        Creates and draws a circuit
+        Creates and draws a circuit. The pieces are only
+        created the first time
         """
-        self.create_straights()
+        if not self.circuit_parts:
+            self.create_straights()
         self.draw_circuit()
 
     def create_straights(self):
@@ -758,10 +767,12 @@ class Circuit:
 
     def draw_circuit(self):
         """
-        Draws the circuit
+        Draws the circuit as a single group of shapes
         """
+        shapes = []
         for part in self.circuit_parts:
-            part.draw(self.drawing)
+            shapes.extend(part.shapes())
+        self.drawing.draw_shapes("circuit", shapes)
 
     def __create_straight(self, x, y, width, height):
         """
@@ -827,6 +838,30 @@ class Circuit:
         Returns:
             True if is overlapping, False if else
         """
+        return self.occupancy.is_overlapping(x, y)
+
+    def are_overlapping(self, xs, ys):
+        """
+        Checks if several points are overlapping with the circuit
+        Arguments:
+            xs: the x coordinates to check
+            ys: the y coordinates to check
+        Returns:
+            A list with True for every point overlapping, False
+            for the rest
+        """
+        return self.occupancy.are_overlapping(xs, ys).tolist()
+
+    def check_overlap(self, x, y):
+        """
+        Checks if the coordinates are overlapping with any piece of
+        the circuit, without the occupancy map
+        Arguments:
+            x: the x coordinate to check
+            y: the y coordinate to check
+        Returns:
+            True if is overlapping, False if else
+        """
         overlap = False
         for part in self.circuit_parts:
             overlap = part.check_overlap(x, y)
@@ -846,11 +881,12 @@ class Circuit:
             self.x = x
             self.y = y
 
-        def draw(self, drawing: drawing.Drawing):
+        def shapes(self):
             """
-            Draws the circuit part
+            Returns the shapes that draw the circuit part, a list
+            of tuples with the kind and the form of every shape
             """
-            pass
+            return []
 
         def check_overlap(self, x, y):
             """
@@ -859,6 +895,22 @@ class Circuit:
             """
             pass
 
+        def bounds(self):
+            """
+            Returns the box that contains the part, a tuple with
+            the minimum and maximum x and y coordinates
+            """
+            pass
+
+        def overlap_mask(self, x, y):
+            """
+            Checks if the points of two arrays of coordinates are
+            overlapped with the circuit, as check_overlap does
+            Returns:
+                A boolean array
+            """
+            pass
+
 
     class CircuitStraight(CircuitPart):
 
@@ -875,8 +927,9 @@ class Circuit:
             self.width = width
             self.height = height
 
-        def draw(self, drawing: drawing.Drawing):
-            drawing.draw_rectangle(
+        def shapes(self):
+            return [(
+                "rectangle",
                 {
                     "x": self.x,
                     "y": self.y,
@@ -885,7 +938,7 @@ class Circuit:
                     "color": "black",
                     "group": "circuit"
                 }
-            )
+            )]
 
         def check_overlap(self, x, y):
             """
@@ -902,6 +955,15 @@ class Circuit:
                 )
             )
 
+        def bounds(self):
+            return (self.x, self.y, self.x + self.width, self.y + self.height)
+
+        def overlap_mask(self, x, y):
+            return (
+                (x >= self.x) & (x <= self.x + self.width)
+                & (y >= self.y) & (y <= self.y + self.height)
+            )
+
     class CircuitId(CircuitStraight):
 
             def __init__(self, x, y, width, height, number):
@@ -917,15 +979,17 @@ class Circuit:
                 super().__init__(x, y, width, height)
                 self.number = number
 
-            def draw(self, drawing: drawing.Drawing):
+            def shapes(self):
                 temp = self.number
                 bits = []
                 for cont in range(3):
                     bits.append((temp >> cont) % 2)
                 bits.append(0)
                 bits.reverse()
+                shapes = []
                 for cont, bit in enumerate(bits):
-                    drawing.draw_rectangle(
+                    shapes.append((
+                        "rectangle",
                         {
                             "x": self.x + (2 * cont + 1) * self.width / 8,
                             "y": self.y,
@@ -934,9 +998,10 @@ class Circuit:
                             "color": "black",
                             "group": "circuit"
                         }
-                    )
+                    ))
                     if bit:
-                        drawing.draw_rectangle(
+                        shapes.append((
+                            "rectangle",
                             {
                                 "x": self.x + cont * self.width / 4,
                                 "y": self.y - 2 * self.height,
@@ -945,7 +1010,9 @@ class Circuit:
                                 "color": "black",
                                 "group": "circuit"
                             }
-                        )
+                        ))
+                return shapes
+
             def check_overlap(self, x, y):
                 """
                 Checks if the point is overlapped with the
@@ -973,6 +1040,33 @@ class Circuit:
                             return True
                 return False
 
+            def bounds(self):
+                return (self.x, self.y - 2 * self.height,
+                        self.x + self.width, self.y + 2 * self.height)
+
+            def overlap_mask(self, x, y):
+                temp = self.number
+                bits = []
+                for cont in range(3):
+                    bits.append((temp >> cont) % 2)
+                bits.append(0)
+                bits.reverse()
+                mask = np.zeros(np.broadcast(x, y).shape, dtype=bool)
+                for cont, bit in enumerate(bits):
+                    mask |= (
+                        (self.x + (2 * cont + 1) * self.width / 8 <= x)
+                        & (x <= self.x + (2 * cont + 2) * self.width / 8)
+                        & (self.y <= y) & (y <= self.y + self.height)
+                    )
+                    if bit:
+                        mask |= (
+                            (self.x + cont * self.width / 4 <= x)
+                            & (x <= self.x + (2 * cont + 1) * self.width / 8)
+                            & (self.y - 2 * self.height <= y)
+                            & (y <= self.y + 2 * self.height)
+                        )
+                return mask
+
     class CircuitTurn(CircuitPart):
 
         def __init__(self, x, y, width, height, angle, starting_angle, track_width):
@@ -1001,8 +1095,9 @@ class Circuit:
             self.center = (x + width / 2, y + height / 2)
             self.radius = sqrt((self.center[0] - x) ** 2)
 
-        def draw(self, drawing: drawing.Drawing):
-            drawing.draw_arc(
+        def shapes(self):
+            return [(
+                "arc",
                 {
                     "x": self.x,
                     "y": self.y,
@@ -1013,7 +1108,7 @@ class Circuit:
                     "starting_angle": self.starting_angle,
                     "group": "circuit"
                 }
-            )
+            )]
 
         def check_overlap(self, x, y):
             """
@@ -1048,6 +1143,43 @@ class Circuit:
                 )
             return False
 
+        def bounds(self):
+            # The box of the ring sector: its ends and the points of the
+            # axes between them. The angles go counterclockwise, with
+            # the y axis of the canvas pointing down
+            r_in = self.radius - (self.track_width / 2)
+            r_out = self.radius + (self.track_width / 2)
+            end_angle = self.starting_angle + self.angle
+            angles = [self.starting_angle, end_angle]
+            angles += [a for a in range(0, 721, 90) if self.starting_angle < a < end_angle]
+            xs = []
+            ys = []
+            for angle in angles:
+                for r in (r_in, r_out):
+                    xs.append(self.center[0] + r * cos(angle * pi / 180))
+                    ys.append(self.center[1] - r * sin(angle * pi / 180))
+            # A unit of margin for the rounding of cos and sin
+            return (min(xs) - 1, min(ys) - 1, max(xs) + 1, max(ys) + 1)
+
+        def overlap_mask(self, x, y):
+            r_in = self.radius - (self.track_width / 2)
+            r_out = self.radius + (self.track_width / 2)
+            dx, dy = np.broadcast_arrays(x - self.center[0], y - self.center[1])
+            dist = np.sqrt((dx ** 2) + (dy ** 2))
+            mask = (dist >= r_in) & (dist <= r_out)
+            # The angle is only needed inside the ring
+            inside_angle = np.arctan2(dy[mask], dx[mask]) * (180 / pi)
+            inside_angle[inside_angle < 0] += 360
+            inside_angle = np.abs(inside_angle - 360)
+            end_angle = self.starting_angle + self.angle
+            if end_angle == 0:
+                end_angle = 360
+            mask[mask] = (
+                (inside_angle != 0)
+                & (self.starting_angle <= inside_angle) & (inside_angle <= end_angle)
+            )
+            return mask
+
 
 class Obstacle:
 
@@ -1069,7 +1201,8 @@ class Obstacle:
         """
         Draws the obstacle in the corresponding drawing
         """
-        self.drawing.draw_rectangle(
+        self.drawing.draw_shapes("obstacle", [(
+            "rectangle",
             {
                 "x": self.x,
                 "y": self.y,
@@ -1078,7 +1211,7 @@ class Obstacle:
                 "color": "orange",
                 "group": "obstacle"
             }
-        )
+        )])
 
     def calculate_distance(self, sx, sy, angle):
         """
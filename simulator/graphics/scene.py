@@ -0,0 +1,212 @@
+"""
+Scene graph of the simulation canvas. Every visual of the drawing (the
+robot, each sensor, the circuit, the obstacle...) is a node that keeps
+its canvas items while the drawing exists. Changing a node only marks
+it as dirty, and when the drawing is flushed each dirty node issues the
+canvas operations for what actually changed since it was last shown:
+coords for the position, itemconfigure for the image and the visibility.
+"""
+
+POSITION = "position"
+IMAGE = "image"
+VISIBILITY = "visibility"
+
+
+class Node:
+
+    def __init__(self, group):
+        """
+        Constructor for the node superclass
+        Arguments:
+            group: the tag of the items of the node
+        """
+        self.group = group
+        self.items = []
+        self.visible = True
+        self.shown_visible = True
+        self.dirty = set()
+
+    def set_visible(self, visible):
+        """
+        Shows or hides the node
+        Arguments:
+            visible: True to show the node, False to hide it
+        Returns:
+            True if the node has changed
+        """
+        if visible == self.visible:
+            return False
+        self.visible = visible
+        self.dirty.add(VISIBILITY)
+        return True
+
+    def rescale(self):
+        """
+        Marks the node to be redrawn at a new scale
+        """
+        self.dirty.update((POSITION, IMAGE))
+
+    def flush(self, drawing):
+        """
+        Issues the canvas operations of the changes of the node
+        Arguments:
+            drawing: the drawing of the node
+        """
+        pass
+
+    def state(self):
+        return "normal" if self.visible else "hidden"
+
+
+class ImageNode(Node):
+
+    def __init__(self, group, x, y, image, angle=0):
+        """
+        Constructor for a node with an image
+        Arguments:
+            group: the tag of the image
+            x: the x coordinate of the center of the image
+            y: the y coordinate of the center of the image
+            image: the path of the image
+            angle: the angle in degrees of the image
+        """
+        super().__init__(group)
+        self.x = x
+        self.y = y
+        self.image = image
+        self.angle = angle
+        self.shown_coords = None
+        self.shown_image = None
+
+    def set_position(self, x, y):
+        """
+        Moves the image
+        Arguments:
+            x: the new x coordinate
+            y: the new y coordinate
+        Returns:
+            True if the node has changed
+        """
+        if (x, y) == (self.x, self.y):
+            return False
+        self.x = x
+        self.y = y
+        self.dirty.add(POSITION)
+        return True
+
+    def set_image(self, image, angle=0):
+        """
+        Changes the image or its angle
+        Arguments:
+            image: the path of the image
+            angle: the angle in degrees of the image
+        Returns:
+            True if the node has changed
+        """
+        if (image, angle) == (self.image, self.angle):
+            return False
+        self.image = image
+        self.angle = angle
+        self.dirty.add(IMAGE)
+        return True
+
+    def flush(self, drawing):
+        coords = drawing.canvas_coords(self.x, self.y)
+        if not self.items:
+            self.shown_image = drawing.photo(self.image, self.angle)
+            self.items.append(drawing.canvas_call(
+                "create_image", *coords, image=self.shown_image,
+                state=self.state(), tags=self.group))
+            self.shown_coords = coords
+            self.shown_visible = self.visible
+            self.dirty.clear()
+            return
+        if POSITION in self.dirty and coords != self.shown_coords:
+            drawing.canvas_call("coords", self.items[0], *coords)
+            self.shown_coords = coords
+        options = {}
+        if IMAGE in self.dirty:
+            image = drawing.photo(self.image, self.angle)
+            if image is not self.shown_image:
+                options["image"] = self.shown_image = image
+        if VISIBILITY in self.dirty and self.visible != self.shown_visible:
+            options["state"] = self.state()
+            self.shown_visible = self.visible
+        if options:
+            drawing.canvas_call("itemconfigure", self.items[0], **options)
+        self.dirty.clear()
+
+
+class ShapesNode(Node):
+
+    def __init__(self, group):
+        """
+        Constructor for a node made of rectangles and arcs, the
+        static background of the drawing (the circuit and the
+        obstacle). The shapes are created once and, when the zoom
+        changes, the whole group is scaled by the canvas
+        Arguments:
+            group: the tag of the shapes
+        """
+        super().__init__(group)
+        self.shapes = []
+        self.shown_scale = None
+
+    def add(self, kind, form):
+        """
+        Adds a shape to the node
+        Arguments:
+            kind: "rectangle" or "arc"
+            form: the measurements of the shape, as received by
+            Drawing.draw_rectangle or Drawing.draw_arc
+        """
+        self.shapes.append((kind, form))
+
+    def set_shapes(self, shapes):
+        """
+        Replaces all the shapes of the node
+        Arguments:
+            shapes: a list of tuples with the kind and the form
+            of every shape
+        Returns:
+            True if the node has changed
+        """
+        if shapes == self.shapes:
+            return False
+        self.shapes = list(shapes)
+        self.dirty.add(IMAGE)
+        return True
+
+    def rescale(self):
+        self.dirty.add(POSITION)
+
+    def flush(self, drawing):
+        if IMAGE in self.dirty and self.items:
+            drawing.canvas_call("delete", self.group)
+            self.items = []
+        if POSITION in self.dirty and self.items and self.shown_scale != drawing.scale:
+            factor = drawing.scale / self.shown_scale
+            drawing.canvas_call("scale", self.group, 0, drawing.hud_h, factor, factor)
+            # The canvas does not scale the width of the lines
+            for track_width in self.__arc_widths(self.shapes[:len(self.items)]):
+                drawing.canvas_call("itemconfigure", self.__arc_tag(track_width),
+                                    width=int(track_width * drawing.scale))
+        for kind, form in self.shapes[len(self.items):]:
+            options = drawing.shape_options(kind, form)
+            tags = (self.group,)
+            if kind == "arc":
+                tags += (self.__arc_tag(form["track_width"]),)
+            self.items.append(drawing.canvas_call(
+                "create_" + kind, *options.pop("coords"),
+                state=self.state(), tags=tags, **options))
+        self.shown_scale = drawing.scale
+        if VISIBILITY in self.dirty and self.visible != self.shown_visible:
+            drawing.canvas_call("itemconfigure", self.group, state=self.state())
+        self.shown_visible = self.visible
+        self.dirty.clear()
+
+    def __arc_tag(self, track_width):
+        return "{}-arc-{}".format(self.group, track_width)
+
+    def __arc_widths(self, shapes):
+        return sorted({form["track_width"] for kind, form in shapes if kind == "arc"})
@@ -1,16 +1,22 @@
 import time
 import graphics.layers as layers
+import robot_components.robot_state as robot_state
 
 
 layer: layers.Layer = None
 last_update = 0
 view = None
+clock: robot_state.Clock = None
 
 
 def refresh():
     global layer
     global last_update
     global view
+    if clock is not None and clock.virtual:
+        # Busy loops of the sketch only make the simulated time pass
+        clock.advance(clock.loop_ns)
+        return
     curr_time = time.time_ns() / 1000000
     if last_update + 16 <= curr_time:
         layer.move(view.keys_used, view.move_WASD)
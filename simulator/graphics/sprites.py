@@ -0,0 +1,120 @@
+import collections
+import threading
+import graphics.assets as assets
+
+
+class SpriteAtlas:
+
+    def __init__(self, image_path, step=5, max_scales=3):
+        """
+        Constructor for the sprite atlas of an image. The atlas keeps
+        the image rotated to every reachable angle (a multiple of the
+        step) and resized to a scale, so rotating a drawing does not
+        need to rotate and resize the image again. The frames of a
+        scale are rendered when they are first asked for, and the
+        rest of them in a background thread. Only the frames of the
+        last max_scales scales used are kept
+        Arguments:
+            image_path: the path of the image
+            step: the degrees between two frames
+            max_scales: the number of scales kept in the atlas
+        """
+        self.image = assets.load(image_path)
+        self.step = step
+        self.max_scales = max_scales
+        self.scales = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.threads = {}
+
+    def angles(self):
+        """
+        Returns the angles that have a frame
+        """
+        return range(0, 360, self.step)
+
+    def angle_key(self, angle):
+        """
+        Returns the angle of the frame used for an angle
+        Arguments:
+            angle: the angle in degrees, any value
+        """
+        return int(round(angle / self.step)) * self.step % 360
+
+    def frame(self, angle, scale):
+        """
+        Returns the image rotated by an angle and resized to a
+        scale. If the scale is new, the rest of its frames start
+        to be rendered in background
+        Arguments:
+            angle: the angle in degrees
+            scale: the scale of the image
+        Returns:
+            The frame (as Image instance)
+        """
+        key = self.angle_key(angle)
+        with self.lock:
+            frames = self.__frames(scale)
+            image = frames.get(key)
+        if image is None:
+            image = assets.render(self.image, key, scale)
+            with self.lock:
+                image = frames.setdefault(key, image)
+        self.prerender(scale)
+        return image
+
+    def prerender(self, scale):
+        """
+        Renders in a background thread the frames of a scale
+        that are not in the atlas yet
+        Arguments:
+            scale: the scale of the frames
+        Returns:
+            The thread that renders the frames, None if all of
+            them are already rendered or being rendered
+        """
+        with self.lock:
+            frames = self.__frames(scale)
+            thread = self.threads.get(scale)
+            if len(frames) == len(self.angles()) or (thread is not None and thread.is_alive()):
+                return None
+            thread = threading.Thread(
+                target=self.__prerender, args=(scale, frames), daemon=True)
+            self.threads[scale] = thread
+        thread.start()
+        return thread
+
+    def is_complete(self, scale):
+        """
+        Returns True if all the frames of a scale are rendered
+        Arguments:
+            scale: the scale of the frames
+        """
+        with self.lock:
+            frames = self.scales.get(scale)
+            return frames is not None and len(frames) == len(self.angles())
+
+    def __frames(self, scale):
+        """
+        Returns the frames of a scale, marking it as the last
+        used one and removing the least recently used scales.
+        Must be called with the lock held
+        """
+        frames = self.scales.get(scale)
+        if frames is None:
+            frames = self.scales[scale] = {}
+        self.scales.move_to_end(scale)
+        while len(self.scales) > self.max_scales:
+            old_scale, _ = self.scales.popitem(last=False)
+            self.threads.pop(old_scale, None)
+        return frames
+
+    def __prerender(self, scale, frames):
+        for angle in self.angles():
+            with self.lock:
+                if self.scales.get(scale) is not frames:
+                    return
+                if angle in frames:
+                    continue
+            image = assets.render(self.image, angle, scale)
+            with self.lock:
+                frames.setdefault(angle, image)
@@ -10,33 +10,83 @@ import libraries.standard as std
 import libraries.serial as serial
 import libraries.servo as servo
 import libraries.string as string
+import collections
+import types
 
 
-class LibraryManager:
-    OK = 0
-    ERROR = -1
-    NOT_IMPL_WARNING = -2
+def build_index(library_methods):
+    """
+    Builds the reverse index of the methods of the libraries
+    Arguments:
+        library_methods: a dict whose keys are the names of the
+        libraries and whose values are their methods
+    Returns:
+        A dict whose keys are the names of the methods and whose
+        values are tuples of (library, signature), in the same
+        order as the libraries
+    """
+    index = {}
+    for library, methods in library_methods.items():
+        if isinstance(methods, dict):
+            for name, signature in methods.items():
+                index[name] = index.get(name, ()) + ((library, signature),)
+    return types.MappingProxyType(index)
+
+
+class LibraryRegistry:
 
     def __init__(self):
         """
-        Constructor for library manager
+        Constructor for the registry of libraries. It holds the
+        methods of every library, and it is built only once (see
+        REGISTRY) and never modified
         """
-        self.library_methods = {
+        self.library_methods = types.MappingProxyType({
             std.get_name(): std.get_methods(),
             serial.get_name(): serial.get_methods(),
             string.get_name(): string.get_methods()
-        }
-        self.libraries = {
+        })
+        self.libraries = types.MappingProxyType({
             std.get_name(): (std, std.get_not_implemented()),
             serial.get_name(): (serial, serial.get_not_implemented()),
             string.get_name(): (string.get_methods(), string.get_not_implemented()),
             servo.get_name(): (servo.get_methods(), string.get_not_implemented())
-        }
-        self.library_not_impl = {
+        })
+        self.library_not_impl = types.MappingProxyType({
             std.get_name(): std.get_not_implemented(),
             serial.get_name(): serial.get_not_implemented(),
             string.get_name(): string.get_not_implemented(),
-        }
+        })
+        self.index = build_index(self.library_methods)
+
+
+REGISTRY = LibraryRegistry()
+
+
+class LibraryManager:
+    OK = 0
+    ERROR = -1
+    NOT_IMPL_WARNING = -2
+
+    def __init__(self, registry=None):
+        """
+        Constructor for library manager. The libraries included by
+        a sketch are kept in an overlay over the registry, so the
+        manager can be reused by several compilations
+        Arguments:
+            registry: the registry of libraries (REGISTRY if None)
+        """
+        self.registry = registry if registry is not None else REGISTRY
+        self.libraries = self.registry.libraries
+        self.reset()
+
+    def reset(self):
+        """
+        Removes the libraries included by the last compilation
+        """
+        self.library_methods = collections.ChainMap({}, self.registry.library_methods)
+        self.library_not_impl = collections.ChainMap({}, self.registry.library_not_impl)
+        self.index = self.registry.index
 
     def get_libraries(self):
         """
@@ -61,6 +111,45 @@ class LibraryManager:
                 return self.library_methods[library][method]
         return None
 
+    def lookup(self, method, library=None):
+        """
+        Finds a method by its name using the reverse index
+        Arguments:
+            method: the name of the method
+            library: the library that is expected to define the
+            method, None if it is not known
+        Returns:
+            A tuple with the library and the signature of the method,
+            or None if no library defines it. If the expected library
+            does not define it the first library that does is used
+        """
+        found = self.index.get(method, ())
+        if library is not None:
+            for entry in found:
+                if entry[0] == library:
+                    return entry
+        if len(found) > 0:
+            return found[0]
+        return None
+
+    def lookup_all(self, method):
+        """
+        Returns a tuple with the (library, signature) of every
+        library that defines the method
+        Arguments:
+            method: the name of the method
+        """
+        return self.index.get(method, ())
+
+    def is_ambiguous(self, method):
+        """
+        Returns True if several libraries define the method (so the
+        library of the call must be known), False if else
+        Arguments:
+            method: the name of the method
+        """
+        return len(self.lookup_all(method)) > 1
+
     def not_implemented(self, library, method):
         message = ""
         if library in self.library_not_impl:
@@ -79,6 +168,7 @@ class LibraryManager:
         if lib in self.libraries:
             self.library_methods[lib] = self.libraries[lib][0]
             self.library_not_impl[lib] = self.libraries[lib][1]
+            self.index = build_index(self.library_methods)
         else:
             return self.ERROR
         return self.OK
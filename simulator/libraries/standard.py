@@ -4,12 +4,10 @@ at: https://www.arduino.cc/reference/en/
 """
 
 import string
-import time
 import random as ran
 from math import cos, sin, sqrt, tan
 import robot_components.boards as boards
 import robot_components.robot_state as robot_state
-import graphics.screen_updater as screen_updater
 
 HIGH = 1
 LOW = 0
@@ -24,7 +22,6 @@ NOT_IMPL_WARNING = -2
 
 board: boards.Board = None
 state: robot_state.State = None
-start = time.time()
 
 
 def get_name():
@@ -308,9 +305,8 @@ def delay(ms):
     Arguments:
         ms: the number of milliseconds to pause
     """
-    state.exec_time_ms = int(time.time_ns() / 1000000) + ms
-    while time.time_ns() / 1000000 < state.exec_time_ms:
-        screen_updater.refresh()
+    state.exec_time_ms = int(state.clock.now_ns() / 1000000) + ms
+    state.clock.sleep(ms * 1000000)
 
 
 def delay_microseconds(us):
@@ -319,7 +315,7 @@ def delay_microseconds(us):
     Arguments:
         us: the number of microseconds to pause
     """
-    state.exec_time_us = int(time.time_ns() / 1000) + us
+    state.exec_time_us = int(state.clock.now_ns() / 1000) + us
 
 
 def micros():
@@ -327,9 +323,7 @@ def micros():
     Returns the number of microseconds since the Arduino board
     began running the current program
     """
-    now = time.time()
-    diff = now - start
-    return int(diff * 1000000)
+    return int(state.clock.elapsed_ns() / 1000)
 
 
 def millis():
@@ -337,9 +331,7 @@ def millis():
     Returns the number of milliseconds since the Arduino board
     began running the current program
     """
-    now = time.time()
-    diff = now - start
-    return int(diff * 1000)
+    return int(state.clock.elapsed_ns() / 1000000)
 
 
 # Math
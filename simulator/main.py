@@ -1,9 +1,21 @@
-import graphics.gui as gui
+import argparse
 
+import startup
 
 
-def main():
-    app = gui.LoginApplication(False)#gui.MainApplication()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador Software para Robots")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="muestra los tiempos de importación e inicialización del arranque")
+    args = parser.parse_args(argv)
+    startup.enabled = args.startup_profile
+
+    with startup.measure("import graphics.login_window"):
+        import graphics.login_window as login_window
+    startup.preload()
+    with startup.measure("creación de la ventana de login"):
+        app = login_window.LoginApplication(False)#gui.MainApplication()
+    app.after_idle(startup.mark, "ventana de login visible")
     app.mainloop()
 
 
@@ -226,6 +226,70 @@ class Console:
         self.text_widget.config(state=tk.DISABLED)
 
 
+class HeadlessConsole(Console):
+
+    def __init__(self):
+        """
+        Constructor for a console without text widget. The
+        messages are only kept in memory, so they can be
+        inspected after a headless execution
+        """
+        self.text_widget = None
+        self.logger = None
+        self.messages = []
+        self.input_msgs = []
+        self.serial_started = False
+        self.speed = 0
+        self.curr_time = time() * 1000
+        self.begin(4000000)
+
+    def input(self, message):
+        """
+        Adds input to the list of introduced inputs
+        Arguments:
+            message: the message to add to the list
+        """
+        self.input_msgs.append(message)
+
+    def write_output(self, message):
+        """
+        Keeps a normal message
+        Arguments:
+            message: the message to keep
+        """
+        self.messages.append(('info', message))
+
+    def write_error(self, error_msg: Error):
+        """
+        Keeps a message indicating an error
+        Arguments:
+            error_msg: the error to keep
+        """
+        self.messages.append(('error', error_msg.to_string()))
+
+    def write_warning(self, warning_msg: Warning):
+        """
+        Keeps a message indicating a warning
+        Arguments:
+            warning_msg: the warning to keep
+        """
+        self.messages.append(('warning', warning_msg.to_string()))
+
+    def filter_messages(self, msg_types):
+        pass
+
+    def clear(self):
+        self.messages = []
+        self.input_msgs = []
+
+    def get_output(self):
+        """
+        Returns all the normal messages written by the program
+        as a single string
+        """
+        return "".join(str(m[1]) for m in self.messages if m[0] == 'info')
+
+
 class Logger:
 
     def __init__(self):
@@ -0,0 +1,170 @@
+import json
+import os
+import re
+import threading
+
+from cryptography.fernet import Fernet
+
+# requests and bcrypt are imported when they are used, so they are not
+# loaded before the login window is shown
+
+SERVER = 'http://147.189.171.97:8000'
+LOGIN_FILE = 'login.txt'
+TIMEOUT = (3.05, 10)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """
+    Returns the HTTP session shared by the requests to the server,
+    so the connection is kept alive between them
+    """
+    global _session
+    import requests
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update({'Accept': 'application/json'})
+        return _session
+
+
+class LoginInfo(object):
+    def toJSON(self):
+        return json.dumps(self, default=lambda o: o.__dict__,
+                          sort_keys=True, indent=4)
+
+
+class LoginResult:
+
+    def __init__(self, ok, username, lab, group, message=""):
+        """
+        Constructor for the result of a login
+        Arguments:
+            ok: True if the user has logged in
+            username: the username
+            lab: the laboratory of the user
+            group: the group of the user
+            message: the error message if the user has not logged in
+        """
+        self.ok = ok
+        self.username = username
+        self.lab = lab
+        self.group = group
+        self.message = message
+
+
+def validate(username, password, lab, group, from_file, server=SERVER, login_file=LOGIN_FILE):
+    """
+    Validates the credentials of a user against the server and,
+    if they are valid, saves the session in the login file. It
+    does not use the GUI, so it can run in a background thread
+    Arguments:
+        username: the username
+        password: the password, or the token of the login file
+        lab: the laboratory of the user
+        group: the group of the user
+        from_file: True if the credentials come from the login file
+        server: the URL of the server
+        login_file: the path of the login file
+    Returns:
+        A LoginResult
+    """
+    import bcrypt
+    import requests
+
+    infoLogin = LoginInfo()
+    infoLogin.username = username
+    infoLogin.lab = lab
+    infoLogin.group = group
+    infoLogin.fromFile = from_file
+
+    print("checking login for :", infoLogin.username.upper())
+
+    session = get_session()
+    try:
+        r = session.post(server + '/infoLogin', json=infoLogin.toJSON(), timeout=TIMEOUT)
+
+        infoLogin.pw = password
+
+        if r.status_code == 200:
+            #comprobamos que el login es correcto
+            if ((len(r.content) == 0 and not from_file)
+                    or (not from_file and bcrypt.checkpw(infoLogin.pw.encode('utf8'), r.content))
+                    or (from_file and r.content.decode() == infoLogin.pw)):
+                r = session.post(server + '/updateLogin', json=infoLogin.toJSON(), timeout=TIMEOUT)
+                save_session(infoLogin.username, r.content.decode(), infoLogin.lab, infoLogin.group,
+                             login_file)
+                return LoginResult(True, username, lab, group)
+
+            return LoginResult(False, username, lab, group, 'Credenciales Incorrectas')
+        found = re.search('<p>(.+?)</p>', r.content.decode())
+        mensajeerror = found.group(1) if found is not None else "Error del servidor ({})".format(r.status_code)
+        return LoginResult(False, username, lab, group, mensajeerror)
+    except requests.exceptions.Timeout:
+        return LoginResult(False, username, lab, group, "El servidor no responde")
+    except Exception as e:
+        return LoginResult(False, username, lab, group, str(e))
+
+
+def save_session(username, token, lab, group, login_file=LOGIN_FILE):
+    """
+    Saves the session of a user, encrypted, in the login file
+    """
+    with open(login_file, 'w') as f:
+        key = Fernet.generate_key()
+        fernet = Fernet(key)
+        infolg = fernet.encrypt((username + "\n" + token + "\n" + lab + "\n" + group).encode('utf-8'))
+        f.write(key.decode('utf-8') + "\n" + infolg.decode('utf-8'))
+
+
+def read_session(login_file=LOGIN_FILE):
+    """
+    Reads the session saved in the login file
+    Arguments:
+        login_file: the path of the login file
+    Returns:
+        A list with the username, the token, the laboratory and the
+        group, None if there is no valid session
+    Raises:
+        cryptography.fernet.InvalidToken if the file has been modified
+    """
+    try:
+        with open(login_file, 'r') as file:
+            data = file.read().replace('\n', ' ')
+    except FileNotFoundError:
+        print("The 'login.txt' file does not exist")
+        return None
+    li = list(data.split(" "))
+    if len(li) != 2:
+        return None
+    fernet = Fernet(li[0].encode('utf-8'))
+    decrypted = fernet.decrypt(li[1].encode('utf-8')).decode('utf-8')
+    li = list(decrypted.replace('\n', ' ').split(" "))
+    if len(li) != 4:
+        return None
+    return li
+
+
+def refresh_session(username, token, lab, group, server=SERVER, login_file=LOGIN_FILE):
+    """
+    Validates in a background thread a session read from the login
+    file, while the user already works with it. If the server can
+    not be reached the session is kept, if it rejects the session
+    the login file is removed so the credentials are asked the next
+    time
+    Returns:
+        The thread
+    """
+    def run():
+        result = validate(username, token, lab, group, True, server, login_file)
+        if not result.ok and result.message == 'Credenciales Incorrectas':
+            try:
+                os.remove(login_file)
+            except OSError:
+                pass
+
+    thread = threading.Thread(target=run, name="login", daemon=True)
+    thread.start()
+    return thread
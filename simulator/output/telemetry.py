@@ -0,0 +1,432 @@
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+
+import requests
+
+URL = 'http://147.189.171.97:8000/insertaEjecucion'
+SPOOL = 'executions.jsonl'
+LEGACY_SPOOL = 'executions.txt'
+# The executions the server refuses, kept apart so they do not block the rest
+REJECTED = 'executions.rejected.jsonl'
+# Attempts in a row after which the user is told that nothing can be sent
+MAX_FAILURES = 5
+# Header of the answers of a server that rebuilds the code from codigo_diff
+DIFF_HEADER = 'X-Codigo-Diff'
+# Header of the answers of a server that accepts lists of executions
+BATCH_HEADER = 'X-Ejecuciones-Lote'
+LEGACY_SEPARATOR = "--------------------------------------------------------"
+
+
+def code_hash(code):
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def diff(base, code):
+    """
+    Computes the differences between two versions of a sketch
+    Arguments:
+        base: the previous version
+        code: the new version
+    Returns:
+        A list of operations over the lines of the previous version:
+        a positive number keeps that many lines, a negative number
+        removes them and a list of lines inserts them
+    """
+    old = base.splitlines(keepends=True)
+    new = code.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(i2 - i1)
+            continue
+        if i2 > i1:
+            ops.append(i1 - i2)
+        if j2 > j1:
+            ops.append(new[j1:j2])
+    return ops
+
+
+def apply_diff(base, ops):
+    """
+    Rebuilds a version of a sketch from the previous one
+    Arguments:
+        base: the previous version
+        ops: the operations returned by diff
+    Returns:
+        The new version
+    """
+    old = base.splitlines(keepends=True)
+    lines = []
+    i = 0
+    for op in ops:
+        if isinstance(op, list):
+            lines.extend(op)
+        elif op > 0:
+            lines.extend(old[i:i + op])
+            i += op
+        else:
+            i -= op
+    return "".join(lines)
+
+
+def encode(record, base=None):
+    """
+    Encodes an execution as compact JSON. The hash of the code is
+    added in codigo_sha256. If the previous version of the code is
+    known by the server and the differences are shorter than the
+    code, codigo is null and the differences are sent in
+    codigo_diff, with the hash of that version in codigo_base
+    Arguments:
+        record: the dict with the information of the execution
+        base: the previous version of the code known by the
+        server, None to send the whole code
+    Returns:
+        The JSON text of the execution
+    """
+    record = dict(record)
+    code = record.get("codigo")
+    if isinstance(code, str):
+        record["codigo_sha256"] = code_hash(code)
+        if base is not None:
+            ops = diff(base, code)
+            if len(json.dumps(ops, separators=(",", ":"))) < len(code):
+                record["codigo"] = None
+                record["codigo_base"] = code_hash(base)
+                record["codigo_diff"] = ops
+    return json.dumps(record, sort_keys=True, separators=(",", ":"))
+
+
+class Spool:
+
+    def __init__(self, path):
+        """
+        Constructor for the spool, a JSON lines file where the
+        executions that could not be sent are kept until they are
+        sent
+        Arguments:
+            path: the path of the file
+        """
+        self.path = path
+        self.lock = threading.Lock()
+
+    def append(self, records):
+        """
+        Adds executions at the end of the spool
+        Arguments:
+            records: a list with the executions
+        """
+        if not records:
+            return
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                for record in records:
+                    file.write(json.dumps(record, sort_keys=True) + "\n")
+
+    def read(self):
+        """
+        Returns the list of executions of the spool. The lines that
+        are not valid (e.g. a line cut by a crash) are ignored
+        """
+        with self.lock:
+            return self.__read()
+
+    def __read(self):
+        records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass
+        except FileNotFoundError:
+            pass
+        return records
+
+    def take(self, count):
+        """
+        Removes the first executions of the spool
+        Arguments:
+            count: the number of executions to remove
+        """
+        if count == 0:
+            return
+        with self.lock:
+            remaining = self.__read()[count:]
+            if not remaining:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            temp = self.path + ".tmp"
+            with open(temp, 'w', encoding='utf-8') as file:
+                for record in remaining:
+                    file.write(json.dumps(record, sort_keys=True) + "\n")
+            os.replace(temp, self.path)
+
+    def __len__(self):
+        return len(self.read())
+
+    def import_legacy(self, path):
+        """
+        Moves the executions of the old executions.txt file, with
+        the JSON of the executions separated by dashes, to the spool
+        Arguments:
+            path: the path of the old file
+        Returns:
+            The number of executions moved
+        """
+        try:
+            with open(path, 'r') as file:
+                contents = file.read()
+        except FileNotFoundError:
+            return 0
+        records = []
+        for chunk in contents.split(LEGACY_SEPARATOR):
+            try:
+                records.append(json.loads(chunk))
+            except ValueError:
+                pass
+        self.append(records)
+        os.remove(path)
+        return len(records)
+
+
+class Uploader:
+
+    def __init__(self, url=URL, spool_path=SPOOL, queue_size=100, batch_size=10,
+                 timeout=(3.05, 10), backoff=1, max_backoff=60, session=None):
+        """
+        Constructor for the uploader. The executions are sent by a
+        background thread through a pooled HTTP session. When the server can not be reached they
+        are written to the spool and the thread waits an
+        exponentially growing time before trying again. The spool
+        is sent when the server is reachable again. The executions
+        are sent one by one, whole and uncompressed, until the server
+        announces in its answers that it accepts lists of them
+        (X-Ejecuciones-Lote: 1), gzip (Accept-Encoding) and the
+        differences of the code (X-Codigo-Diff: 1)
+        Arguments:
+            url: the URL where the executions are sent
+            spool_path: the path of the spool
+            queue_size: the maximum number of executions waiting to
+            be sent, the rest go directly to the spool
+            batch_size: the maximum number of executions of a request
+            timeout: the connection and read timeouts of a request
+            backoff: the time waited after the first failure, in seconds
+            max_backoff: the maximum time waited after a failure
+            session: the requests session, a new one if None
+        """
+        self.url = url
+        self.spool = Spool(spool_path)
+        self.rejected = Spool(os.path.join(os.path.dirname(spool_path), REJECTED))
+        self.queue = queue.Queue(queue_size)
+        self.batch_size = batch_size
+        self.batching = False
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.session = session if session is not None else requests.Session()
+        self.session.headers.update({'Accept': 'application/json'})
+        self.compress = False
+        self.delta = False
+        # The last version of the code received by the server
+        self.acknowledged = None
+        self.failures = 0
+        self.sent = 0
+        self.bytes_sent = 0
+        self.wake_up = threading.Event()
+        self.stopped = threading.Event()
+        self.idle = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """
+        Starts the background thread. The executions of the old
+        executions.txt file are moved to the spool first
+        """
+        self.spool.import_legacy(os.path.join(os.path.dirname(self.spool.path), LEGACY_SPOOL))
+        self.thread = threading.Thread(target=self.__run, name="telemetry", daemon=True)
+        self.idle.clear()
+        self.wake_up.set()
+        self.thread.start()
+        return self
+
+    def submit(self, record):
+        """
+        Queues an execution to be sent. It never blocks: if the
+        queue is full the execution is written to the spool
+        Arguments:
+            record: the dict with the information of the execution
+        """
+        with self.lock:
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.spool.append([record])
+            self.idle.clear()
+        self.wake_up.set()
+
+    def replay(self):
+        """
+        Sends the spool now, without waiting for the end of the
+        current backoff
+        Returns:
+            The number of executions in the spool
+        """
+        pending = len(self.spool)
+        self.failures = 0
+        self.idle.clear()
+        self.wake_up.set()
+        return pending
+
+    def pending(self):
+        return self.queue.qsize() + len(self.spool)
+
+    def is_failing(self):
+        """
+        Returns True if the executions could not be sent in the
+        last MAX_FAILURES attempts
+        """
+        return self.failures >= MAX_FAILURES
+
+    def flush(self, timeout=None):
+        """
+        Waits until there is nothing left to send or the server
+        can not be reached
+        Returns:
+            True if the uploader is idle
+        """
+        return self.idle.wait(timeout)
+
+    def close(self, timeout=1):
+        """
+        Stops the background thread. The executions that have not
+        been sent are written to the spool
+        """
+        self.stopped.set()
+        self.wake_up.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self.spool.append(self.__drain(self.queue.qsize()))
+        self.session.close()
+
+    def __drain(self, count):
+        records = []
+        while len(records) < count:
+            try:
+                records.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return records
+
+    def __run(self):
+        while not self.stopped.is_set():
+            if self.failures > 0:
+                delay = min(self.max_backoff, self.backoff * 2 ** (self.failures - 1))
+                self.wake_up.wait(delay * random.uniform(0.5, 1))
+            else:
+                self.wake_up.wait()
+            self.wake_up.clear()
+            if self.stopped.is_set():
+                break
+            if self.__send_spool() and self.__send_queue():
+                self.failures = 0
+            else:
+                self.failures += 1
+                self.spool.append(self.__drain(self.queue.qsize()))
+            with self.lock:
+                if self.queue.empty():
+                    self.idle.set()
+
+    def __send_spool(self):
+        records = self.spool.read()
+        while records:
+            batch = records[:self.__batch()]
+            sent = self.__post(batch)
+            self.spool.take(sent)
+            if sent < len(batch):
+                return False
+            records = records[sent:]
+        return True
+
+    def __send_queue(self):
+        while not self.queue.empty():
+            batch = self.__drain(self.__batch())
+            sent = self.__post(batch)
+            if sent < len(batch):
+                self.spool.append(batch[sent:])
+                return False
+        return True
+
+    def __batch(self):
+        return self.batch_size if self.batching else 1
+
+    def __post(self, batch):
+        """
+        Sends a batch of executions, gzipped if the server accepts
+        it. A batch of one execution is sent as a JSON string, bigger
+        ones as a list. If the server accepts them, the code of every
+        execution is sent as the differences with the previous one
+        when it is shorter
+        Returns:
+            The number of executions, from the first one, received
+            by the server or moved to the rejected ones
+        """
+        base = self.acknowledged
+        body = []
+        for record in batch:
+            body.append(encode(record, base if self.delta else None))
+            base = record.get("codigo") if isinstance(record.get("codigo"), str) else base
+        data = json.dumps(body[0] if len(batch) == 1 else body).encode("utf-8")
+        headers = {'Content-Type': 'application/json'}
+        if self.compress:
+            data = gzip.compress(data)
+            headers['Content-Encoding'] = 'gzip'
+        try:
+            r = self.session.post(self.url, data=data, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f'la excepción es {e}')
+            return 0
+        if r.status_code >= 500 or r.status_code in (408, 429):
+            return 0
+        if r.status_code == 409 and self.acknowledged is not None:
+            # The server does not know the previous version, the whole code is sent
+            self.acknowledged = None
+            return self.__post(batch)
+        if r.status_code == 415 and self.compress:
+            self.compress = False
+            return self.__post(batch)
+        if r.status_code >= 400 and len(batch) > 1:
+            # The server does not accept batches, they are sent one by one
+            self.batching = False
+            for sent, record in enumerate(batch):
+                if self.__post([record]) == 0:
+                    return sent
+            return len(batch)
+        if r.status_code >= 400:
+            print(f'el servidor ha rechazado la ejecución ({r.status_code}), '
+                  f'se guarda en {self.rejected.path}')
+            self.rejected.append(batch)
+            return len(batch)
+        self.sent += len(batch)
+        self.bytes_sent += len(data)
+        self.acknowledged = base
+        self.__negotiate(r)
+        return len(batch)
+
+    def __negotiate(self, r):
+        """
+        Uses the formats that the server announces in an answer
+        """
+        encodings = [e.split(";")[0].strip() for e in r.headers.get('Accept-Encoding', '').split(",")]
+        self.compress = 'gzip' in encodings
+        self.delta = r.headers.get(DIFF_HEADER) == '1'
+        self.batching = self.batch_size > 1 and r.headers.get(BATCH_HEADER) == '1'
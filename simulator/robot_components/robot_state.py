@@ -1,6 +1,109 @@
+import time
+
+
+class TimeLimitReached(BaseException):
+    """
+    Raised by the simulated clock when its limit is reached. It is
+    not an Exception, so the handlers of the sketch let it through
+    """
+    pass
+
+
+class Clock:
+    virtual = False
+
+    def __init__(self, idle=None):
+        """
+        Constructor for the wall clock, which follows the real
+        time of the computer
+        Arguments:
+            idle: the function to call while waiting (so the
+            robot keeps moving and the screen updating)
+        """
+        self.idle = idle
+        self.start_ns = self.now_ns()
+
+    def now_ns(self):
+        """
+        Returns the current time in nanoseconds
+        """
+        return time.time_ns()
+
+    def elapsed_ns(self):
+        """
+        Returns the nanoseconds since the clock was created, that
+        is, since the board began running the current program
+        """
+        return self.now_ns() - self.start_ns
+
+    def sleep(self, ns):
+        """
+        Waits for an amount of time, calling the idle function
+        meanwhile
+        Arguments:
+            ns: the nanoseconds to wait
+        """
+        deadline = self.now_ns() + ns
+        while self.now_ns() < deadline:
+            if self.idle is not None:
+                self.idle()
+
+
+class VirtualClock(Clock):
+    virtual = True
+
+    def __init__(self, tick_ns, idle=None, loop_ns=100000):
+        """
+        Constructor for the simulated clock. Time only passes when
+        it is advanced, so waiting is instant and runs are
+        deterministic
+        Arguments:
+            tick_ns: the nanoseconds between two physics ticks
+            idle: the function to call on every physics tick
+            loop_ns: the nanoseconds an iteration of a busy loop
+            of the sketch is supposed to take
+        """
+        self.time_ns = 0
+        self.tick_ns = tick_ns
+        self.next_tick_ns = tick_ns
+        self.loop_ns = loop_ns
+        self.limit_ns = None
+        super().__init__(idle)
+
+    def now_ns(self):
+        return self.time_ns
+
+    def advance(self, ns):
+        """
+        Advances the simulated time, calling the idle function
+        every time a physics tick is reached
+        Arguments:
+            ns: the nanoseconds to advance
+        """
+        deadline = self.time_ns + ns
+        while self.next_tick_ns <= deadline:
+            self.time_ns = self.next_tick_ns
+            self.next_tick_ns += self.tick_ns
+            if self.idle is not None:
+                self.idle()
+        self.time_ns = deadline
+        if self.limit_ns is not None and self.time_ns >= self.limit_ns:
+            raise TimeLimitReached()
+
+    def sleep(self, ns):
+        self.advance(ns)
+
+
 class State:
 
-    def __init__(self):
+    def __init__(self, clock=None):
+        """
+        Constructor for the state of the execution
+        Arguments:
+            clock: the clock that measures the time of the
+            program (a wall clock if None)
+        """
         self.exec_time_ms = 0
         self.exec_time_us = 0
         self.exited = False
+        self.clock = clock if clock is not None else Clock()
@@ -0,0 +1,233 @@
+"""
+Headless simulation engine. Runs a sketch on one of the robots
+without Tkinter canvas, HUD or text widgets, stepping the physics
+of the layers, their sensors and the loop of the sketch. Used for
+grading many sketches on machines without display.
+"""
+
+import compiler.commands as commands
+import compiler.transpiler as transpiler
+import graphics.layers as layers
+import graphics.screen_updater as screen_updater
+import libraries.standard as standard
+import output.console as console
+import robot_components.robot_state as robot_state
+import simulation.scheduler as scheduler
+
+ROBOTS = ["mobile2", "mobile3", "mobile4", "actuator"]
+CIRCUITS = ["circuit", "labyrinth", "straight", "obstacle",
+            "straight and obstacle", "node circuit"]
+
+
+class HeadlessEngine:
+    TICK_MS = scheduler.Scheduler.TICK_MS
+
+    def __init__(self, robot="mobile2", circuit="circuit", record=True, time_limit_ms=None):
+        """
+        Constructor for the headless engine. It plays the role of
+        both the controller and the view for the commands and the
+        screen updater, so the sketch runs as it does in the GUI
+        Arguments:
+            robot: the name of the robot (mobile2, mobile3, mobile4
+            or actuator)
+            circuit: the name of the circuit for the mobile robots
+            record: True if a sample is kept on every step, False if else
+            time_limit_ms: the simulated time after which the sketch
+            is stopped, even in the middle of a loop (None if there
+            is no limit)
+        """
+        self.console = console.HeadlessConsole()
+        self.robot_layer = self.__create_layer(robot, circuit)
+        self.record = record
+        self.time_limit_ms = time_limit_ms
+        self.timed_out = False
+        self.executing = False
+        self.keys_used = False
+        self.move_WASD = {
+            "w": False,
+            "a": False,
+            "s": False,
+            "d": False
+        }
+        self.trace = []
+        self.warnings = []
+        self.errors = []
+        self.setup_command = commands.Setup(self)
+        self.loop_command = commands.Loop(self)
+        self.scheduler = self.__create_scheduler()
+
+    def load(self, code, dump=None):
+        """
+        Compiles the sketch and runs its setup
+        Arguments:
+            code: the Arduino code of the sketch
+            dump: the path of a file where the transpiled code
+            is written (for debugging), None if it is not written
+        Returns:
+            True if the sketch is running, False if it could
+            not be compiled or set up
+        """
+        self.warnings, self.errors, program = transpiler.transpile(code, dump)
+        if len(self.errors) > 0:
+            return False
+        commands.program = program
+        self.scheduler = self.__create_scheduler()
+        screen_updater.layer = self.robot_layer
+        screen_updater.view = self
+        screen_updater.clock = self.clock
+        self.robot_layer.execute()
+        self.trace = []
+        self.timed_out = False
+        try:
+            self.executing = self.scheduler.call(self.setup_command.execute)
+        except robot_state.TimeLimitReached:
+            self.__time_out()
+        return self.executing
+
+    def step(self, n=1):
+        """
+        Advances the simulation a number of ticks. On every tick
+        the robot moves, the sensors are updated and the loop of
+        the sketch is executed. The delays of the sketch advance
+        the simulated time (and move the robot) instantly
+        Arguments:
+            n: the number of ticks to advance
+        Returns:
+            The pose of the robot after the last tick
+        """
+        for _ in range(0, n):
+            if not self.is_running():
+                break
+            try:
+                self.scheduler.step()
+            except robot_state.TimeLimitReached:
+                self.__time_out()
+        return self.pose()
+
+    def run_until(self, t_ms):
+        """
+        Runs the simulation until the simulated time reaches t_ms
+        or the sketch finishes (exit or runtime error)
+        Arguments:
+            t_ms: the simulated time, in milliseconds
+        Returns:
+            The list of samples recorded until now
+        """
+        while self.time_ms < t_ms and self.is_running():
+            self.step()
+        return self.trace
+
+    @property
+    def clock(self):
+        """
+        Returns the simulated clock of the execution
+        """
+        return self.scheduler.clock
+
+    @property
+    def time_ms(self):
+        """
+        Returns the simulated time, in milliseconds
+        """
+        return self.clock.now_ns() // 1000000
+
+    def stop(self):
+        """
+        Stops the execution of the sketch
+        """
+        self.executing = False
+        self.setup_command.reboot()
+        self.loop_command.reboot()
+
+    def is_running(self):
+        """
+        Returns:
+            True if the sketch is still being executed, False if else
+        """
+        state = standard.state
+        return self.executing and not (state is not None and state.exited)
+
+    def pose(self):
+        """
+        Returns the position of the robot as a dictionary. For the
+        mobile robots: x, y and angle (degrees). For the linear
+        actuator: the x coordinate of the block
+        """
+        drawing = self.robot_layer.robot_drawing
+        if isinstance(self.robot_layer, layers.MobileRobotLayer):
+            return {
+                "x": drawing.real_x,
+                "y": drawing.real_y,
+                "angle": drawing.angle
+            }
+        return {"x": drawing.block.x}
+
+    def sensors(self):
+        """
+        Returns the values read by the sensors of the robot as
+        a dictionary
+        """
+        robot = self.robot_layer.robot
+        if isinstance(self.robot_layer, layers.MobileRobotLayer):
+            return {
+                "light": [sens.value for sens in robot.light_sensors],
+                "sound": robot.sound.dist
+            }
+        return {
+            "button_left": robot.button_left.value,
+            "button_right": robot.button_right.value
+        }
+
+    def sample(self):
+        """
+        Returns the time, the pose and the sensors of the robot
+        at the current tick
+        """
+        sample = {"t": self.time_ms}
+        sample.update(self.pose())
+        sample.update(self.sensors())
+        return sample
+
+    def update_idletasks(self):
+        pass
+
+    def __tick(self):
+        """
+        Records a sample after every physics tick
+        """
+        if self.record:
+            self.trace.append(self.sample())
+
+    def __time_out(self):
+        """
+        Stops the sketch once the time limit has been reached
+        """
+        self.timed_out = True
+        self.executing = False
+
+    def __create_scheduler(self):
+        """
+        Creates the scheduler, that runs as fast as possible with
+        the simulated time starting at 0
+        """
+        sch = scheduler.Scheduler(self.robot_layer, self, self.loop_command.execute,
+                                  scheduler.FAST, on_tick=self.__tick)
+        if self.time_limit_ms is not None:
+            sch.clock.limit_ns = self.time_limit_ms * 1000000
+        return sch
+
+    def __create_layer(self, robot, circuit):
+        """
+        Creates the headless layer of the robot
+        Arguments:
+            robot: the name of the robot
+            circuit: the name of the circuit
+        Returns:
+            The layer
+        """
+        if robot == "actuator":
+            return layers.LinearActuatorLayer(headless=True)
+        n_light_sens = ROBOTS.index(robot) + 2
+        layer = layers.MobileRobotLayer(n_light_sens, headless=True)
+        layer.set_circuit(CIRCUITS.index(circuit))
+        return layer
@@ -0,0 +1,100 @@
+"""
+Occupancy map of a circuit. The geometry of the circuit is sampled once
+into a NumPy bitmap, so knowing if a point is on the track is a single
+array index instead of checking every part of the circuit, and the
+points of all the light sensors are checked with one vectorized gather.
+"""
+
+import math
+import numpy as np
+
+# Drawing units between two samples of the bitmap. With 1 every integer
+# point is sampled, so the results match the geometric test exactly for
+# the integer coordinates of the sensors
+RESOLUTION = 1
+
+
+class OccupancyMap:
+
+    def __init__(self, parts, resolution=RESOLUTION):
+        """
+        Constructor for the occupancy map. Every part must provide
+        bounds() and overlap_mask(x, y), the vectorized version of
+        its check_overlap
+        Arguments:
+            parts: the parts of the circuit
+            resolution: the drawing units between two samples
+        """
+        self.resolution = resolution
+        bounds = [part.bounds() for part in parts]
+        if not bounds:
+            self.origin = (0, 0)
+            self.bitmap = np.zeros((1, 1), dtype=bool)
+            return
+        # The bitmap has a border of empty samples, so the points
+        # outside it can be moved to the border instead of checked
+        x0 = math.floor(min(b[0] for b in bounds)) - resolution
+        y0 = math.floor(min(b[1] for b in bounds)) - resolution
+        x1 = max(b[2] for b in bounds) + resolution
+        y1 = max(b[3] for b in bounds) + resolution
+        self.origin = (x0, y0)
+        width = int(math.ceil((x1 - x0) / resolution)) + 1
+        height = int(math.ceil((y1 - y0) / resolution)) + 1
+        self.bitmap = np.zeros((height, width), dtype=bool)
+        for part, part_bounds in zip(parts, bounds):
+            self.__add(part, part_bounds)
+
+    def __add(self, part, bounds):
+        """
+        Samples a part only inside its bounds
+        """
+        i0, j0 = self.__index(bounds[0], bounds[1], math.floor)
+        i1, j1 = self.__index(bounds[2], bounds[3], math.ceil)
+        i0, j0 = max(i0, 0), max(j0, 0)
+        i1 = min(i1, self.bitmap.shape[1] - 1)
+        j1 = min(j1, self.bitmap.shape[0] - 1)
+        if i1 < i0 or j1 < j0:
+            return
+        x = self.origin[0] + np.arange(i0, i1 + 1) * self.resolution
+        y = self.origin[1] + np.arange(j0, j1 + 1) * self.resolution
+        # A row of x and a column of y, broadcast by the masks
+        self.bitmap[j0:j1 + 1, i0:i1 + 1] |= part.overlap_mask(x[np.newaxis, :], y[:, np.newaxis])
+
+    def __index(self, x, y, rounding):
+        return (
+            int(rounding((x - self.origin[0]) / self.resolution)),
+            int(rounding((y - self.origin[1]) / self.resolution))
+        )
+
+    def is_overlapping(self, x, y):
+        """
+        Checks if a point is on the circuit, using the nearest sample
+        Arguments:
+            x: the x coordinate to check
+            y: the y coordinate to check
+        Returns:
+            True if is overlapping, False if else
+        """
+        i = int(math.floor((x - self.origin[0]) / self.resolution + 0.5))
+        j = int(math.floor((y - self.origin[1]) / self.resolution + 0.5))
+        if 0 <= j < self.bitmap.shape[0] and 0 <= i < self.bitmap.shape[1]:
+            return bool(self.bitmap[j, i])
+        return False
+
+    def are_overlapping(self, xs, ys):
+        """
+        Checks if several points are on the circuit
+        Arguments:
+            xs: the x coordinates of the points
+            ys: the y coordinates of the points
+        Returns:
+            A boolean array with the result for every point
+        """
+        points = np.array((xs, ys), dtype=float)
+        points -= np.array(self.origin, dtype=float)[:, np.newaxis]
+        points /= self.resolution
+        points += 0.5
+        indexes = np.floor(points).astype(np.intp)
+        # The points outside the bitmap are moved to its empty border
+        np.clip(indexes, 0, np.array(self.bitmap.shape[::-1])[:, np.newaxis] - 1, out=indexes)
+        return self.bitmap[indexes[1], indexes[0]]
@@ -0,0 +1,147 @@
+"""
+Fixed timestep scheduler of the simulation. The physics of the
+layers always advance in ticks of the same simulated time, and the
+mode decides how the simulated time follows the real one: real-time,
+N times faster or as fast as possible. Rendering is done once per
+frame, so when the physics fall behind frames are dropped instead
+of slowing down the simulation.
+"""
+
+import time
+import robot_components.robot_state as robot_state
+
+REAL_TIME = "real-time"
+SCALED = "scaled"
+FAST = "fast"
+
+
+class Scheduler:
+    TICK_MS = 16
+    FRAME_MS = 16
+    MAX_TICKS_PER_FRAME = 250
+
+    def __init__(self, layer, view, loop=None, mode=REAL_TIME, speed=1, on_tick=None):
+        """
+        Constructor for the scheduler
+        Arguments:
+            layer: the layer of the robot
+            view: the view, that provides the keys being pressed
+            loop: the function to call after every tick (the loop
+            of the sketch)
+            mode: REAL_TIME, SCALED or FAST
+            speed: the times the simulated time is faster than the
+            real one (SCALED mode)
+            on_tick: a function to call after every physics tick
+        """
+        self.layer = layer
+        self.view = view
+        self.loop = loop
+        self.on_tick = on_tick
+        self.clock = robot_state.VirtualClock(self.TICK_MS * 1000000, self.__tick)
+        self.in_sketch = False
+        self.ticks = 0
+        self.frames = 0
+        self.last_render_ns = 0
+        self.set_mode(mode, speed)
+
+    def set_mode(self, mode, speed=1):
+        """
+        Changes the mode of the scheduler, keeping the simulated time
+        Arguments:
+            mode: REAL_TIME, SCALED or FAST
+            speed: the times the simulated time is faster than the
+            real one (SCALED mode)
+        """
+        self.mode = mode
+        self.speed = speed if mode == SCALED else 1
+        self.__sync()
+
+    def step(self):
+        """
+        Advances one tick: the robot moves and the loop is called
+        """
+        self.clock.advance(self.clock.tick_ns)
+        if self.loop is not None:
+            self.call(self.loop)
+
+    def call(self, function):
+        """
+        Calls a function of the sketch. While it runs, its delays
+        and busy loops follow the mode of the scheduler
+        Arguments:
+            function: the function to call
+        Returns:
+            What the function returns
+        """
+        self.in_sketch = True
+        try:
+            return function()
+        finally:
+            self.in_sketch = False
+
+    def frame(self):
+        """
+        Runs the ticks that are due since the last frame and
+        renders the layer once
+        """
+        start = time.perf_counter_ns()
+        if self.mode == FAST:
+            while time.perf_counter_ns() - start < self.FRAME_MS * 1000000:
+                self.step()
+        else:
+            n = 0
+            while self.clock.now_ns() < self.__target_ns() and n < self.MAX_TICKS_PER_FRAME:
+                self.step()
+                n += 1
+            if n == self.MAX_TICKS_PER_FRAME:
+                # The physics can't keep up, so the remaining time is lost
+                self.__sync()
+        self.render()
+
+    def render(self):
+        """
+        Shows the current state of the robot
+        """
+        self.layer.render()
+        self.last_render_ns = time.perf_counter_ns()
+        self.frames += 1
+
+    def __tick(self):
+        """
+        Moves the robot one physics tick. Called by the clock
+        """
+        self.layer.move(self.view.keys_used, self.view.move_WASD)
+        self.ticks += 1
+        if self.on_tick is not None:
+            self.on_tick()
+        if self.in_sketch:
+            self.__pace()
+
+    def __pace(self):
+        """
+        While the sketch is waiting (delay or busy loop) the
+        frames are rendered and the simulated time is not
+        allowed to go faster than the mode says
+        """
+        now = time.perf_counter_ns()
+        if now - self.last_render_ns >= self.FRAME_MS * 1000000:
+            self.render()
+            self.view.update_idletasks()
+        if self.mode != FAST:
+            ahead_ns = self.clock.now_ns() - self.__target_ns()
+            if ahead_ns > 0:
+                time.sleep(ahead_ns / self.speed / 1000000000)
+
+    def __target_ns(self):
+        """
+        Returns the simulated time that corresponds to the
+        current real time
+        """
+        return (time.perf_counter_ns() - self.start_ns) * self.speed
+
+    def __sync(self):
+        """
+        Makes the current real time correspond to the current
+        simulated time
+        """
+        self.start_ns = time.perf_counter_ns() - self.clock.now_ns() / self.speed
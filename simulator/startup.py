@@ -0,0 +1,64 @@
+import contextlib
+import threading
+import time
+
+# Modules of the main window and the compiler, imported in the background
+# while the login window is shown
+PRELOAD = ["graphics.gui", "compiler.transpiler"]
+
+enabled = False
+start = time.perf_counter()
+timings = []
+_lock = threading.Lock()
+
+
+def mark(name):
+    """
+    Records the time elapsed since the start of the application
+    Arguments:
+        name: the name of the moment
+    """
+    _record(name, time.perf_counter() - start, "desde el inicio")
+
+
+@contextlib.contextmanager
+def measure(name):
+    """
+    Records the time spent in a block of code
+    Arguments:
+        name: the name of the block
+    """
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - begin, "")
+
+
+def _record(name, elapsed, note):
+    with _lock:
+        timings.append((name, elapsed))
+        if enabled:
+            print("[arranque] {}: {:.1f} ms {}".format(name, elapsed * 1000, note).rstrip(), flush=True)
+
+
+def preload():
+    """
+    Imports the modules of the main window and the compiler and
+    warms the parser in a background thread, so they are ready when
+    the user logs in
+    Returns:
+        The thread
+    """
+    def run():
+        import importlib
+        for module in PRELOAD:
+            with measure("import {} (segundo plano)".format(module)):
+                importlib.import_module(module)
+        with measure("warm-up del parser (segundo plano)"):
+            importlib.import_module("compiler.transpiler").warm_up()
+        mark("precarga terminada")
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
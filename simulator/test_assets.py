@@ -0,0 +1,52 @@
+import unittest
+
+import graphics.assets as assets
+
+
+class TestAssets(unittest.TestCase):
+
+    def setUp(self):
+        assets.clear()
+
+    def tearDown(self):
+        assets.clear()
+        return super().tearDown()
+
+    def test_file_decoded_once(self):
+        image = assets.load("assets/mobile-part.png")
+        self.assertIs(assets.load("assets/mobile-part.png"), image)
+
+    def test_scaled_variant_is_reused(self):
+        image = assets.scaled("assets/mobile-part.png", 0.5)
+        original = assets.load("assets/mobile-part.png")
+        self.assertEqual(image.size, (int(original.width * 0.5), int(original.height * 0.5)))
+        self.assertIs(assets.scaled("assets/mobile-part.png", 0.5), image)
+
+    def test_rotated_variant(self):
+        image = assets.scaled("assets/full-speed.png", 0.5, -90)
+        self.assertIs(assets.scaled("assets/full-speed.png", 0.5, 270), image)
+        self.assertEqual(image.size, assets.scaled("assets/full-speed.png", 0.5, 90).size)
+        self.assertEqual(image.size, assets.scaled("assets/full-speed.png", 0.5).size[::-1])
+
+    def test_old_scales_dropped(self):
+        first = assets.scaled("assets/mobile-part.png", 0.1)
+        for i in range(2, assets.MAX_SCALES + 2):
+            assets.scaled("assets/mobile-part.png", i / 10)
+        self.assertNotIn(0.1, assets._scaled)
+        self.assertIsNot(assets.scaled("assets/mobile-part.png", 0.1), first)
+
+    def test_recent_scale_kept(self):
+        first = assets.scaled("assets/mobile-part.png", 0.1)
+        for i in range(2, assets.MAX_SCALES + 2):
+            assets.scaled("assets/mobile-part.png", 0.1)
+            assets.scaled("assets/mobile-part.png", i / 10)
+        self.assertIs(assets.scaled("assets/mobile-part.png", 0.1), first)
+
+    def test_atlas_shared(self):
+        atlas = assets.atlas("assets/mobile-robot.png")
+        self.assertIs(assets.atlas("assets/mobile-robot.png"), atlas)
+        self.assertIs(atlas.image, assets.load("assets/mobile-robot.png"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import batch
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ("forward.txt", "exit.txt"):
+            shutil.copy(os.path.join("tests/engine-tests", name), self.directory)
+        shutil.copy("tests/engine-tests/forward.txt", os.path.join(self.directory, "copy.ino"))
+        with open(os.path.join(self.directory, "hang.txt"), "w", encoding="utf-8") as file:
+            file.write("void setup() {\n}\n\nvoid loop() {\n  while (true) {\n  }\n}\n")
+        with open(os.path.join(self.directory, "notes.md"), "w", encoding="utf-8") as file:
+            file.write("not a sketch")
+        self.results = {r["file"]: r for r in batch.run(batch.find_sketches(self.directory),
+                                                          time_ms=2000, workers=2)}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        return super().tearDown()
+
+    def test_sketches(self):
+        self.assertEqual(sorted(self.results), ["copy.ino", "exit.txt", "forward.txt", "hang.txt"])
+
+    def test_finished(self):
+        self.assertTrue(self.results["exit.txt"]["finished"])
+        self.assertEqual(self.results["exit.txt"]["completion_ms"], 16)
+        self.assertFalse(self.results["forward.txt"]["finished"])
+
+    def test_time_limit(self):
+        self.assertFalse(self.results["hang.txt"]["finished"])
+        self.assertEqual(self.results["hang.txt"]["simulated_ms"], 2000)
+
+    def test_duplicates(self):
+        self.assertEqual(self.results["forward.txt"]["duplicate_of"], "copy.ino")
+        self.assertEqual(self.results["forward.txt"]["simulated_ms"], self.results["copy.ino"]["simulated_ms"])
+
+    def test_reports(self):
+        results = list(self.results.values())
+        path = os.path.join(self.directory, "report.csv")
+        batch.write_report(results, path)
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(len(list(csv.DictReader(file))), 4)
+        path = os.path.join(self.directory, "report.json")
+        batch.write_report(results, path)
+        with open(path, encoding="utf-8") as file:
+            self.assertEqual(json.load(file)[0]["errors"], [])
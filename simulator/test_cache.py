@@ -0,0 +1,95 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import compiler.cache as compile_cache
+import compiler.transpiler as transpiler
+
+
+class TestBaseCache(unittest.TestCase):
+    file = "tests/engine-tests/forward.txt"
+
+    def setUp(self):
+        with open(self.file, encoding="utf-8") as file:
+            self.code = file.read()
+        self.previous = transpiler.cache
+        transpiler.cache = self.cache = compile_cache.CompileCache(2)
+
+    def tearDown(self):
+        transpiler.cache = self.previous
+        return super().tearDown()
+
+
+class TestCache(TestBaseCache):
+
+    def test_hit(self):
+        first = transpiler.transpile(self.code)
+        second = transpiler.transpile(self.code)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertIs(first[2], second[2])
+
+    def test_changed_code(self):
+        transpiler.transpile(self.code)
+        transpiler.transpile(self.code + "\n")
+        self.assertEqual(self.cache.misses, 2)
+        self.assertEqual(self.cache.hits, 0)
+
+    def test_errors_are_cached(self):
+        warns, errors, program = transpiler.transpile("void setup() {}")
+        cached = transpiler.transpile("void setup() {}")
+        self.assertIsNone(program)
+        self.assertEqual(len(cached[1]), len(errors))
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_lru(self):
+        transpiler.transpile(self.code)
+        transpiler.transpile("void setup() {}")
+        transpiler.transpile(self.code)
+        transpiler.transpile("void loop() {}")
+        self.assertIsNotNone(self.cache.get(self.code))
+        self.assertIsNone(self.cache.get("void setup() {}"))
+
+    def test_key_depends_on_version(self):
+        key = self.cache.key(self.code)
+        version = compile_cache.COMPILER_VERSION
+        compile_cache.COMPILER_VERSION = version + "-test"
+        try:
+            self.assertNotEqual(key, self.cache.key(self.code))
+        finally:
+            compile_cache.COMPILER_VERSION = version
+
+    def test_key_depends_on_python(self):
+        key = self.cache.key(self.code)
+        version = compile_cache.BYTECODE_VERSION
+        compile_cache.BYTECODE_VERSION = "00000000"
+        try:
+            self.assertNotEqual(key, self.cache.key(self.code))
+        finally:
+            compile_cache.BYTECODE_VERSION = version
+
+
+class TestDiskCache(TestBaseCache):
+
+    def test_shared_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            transpiler.cache = compile_cache.CompileCache(directory=directory)
+            warns, errors, program = transpiler.transpile(self.code)
+            transpiler.cache = other = compile_cache.CompileCache(directory=directory)
+            cached = transpiler.transpile(self.code)
+            self.assertEqual(other.hits, 1)
+            self.assertEqual(cached[2], program)
+            self.assertEqual(len(cached[0]), len(warns))
+
+    def test_unreadable_program(self):
+        with tempfile.TemporaryDirectory() as directory:
+            transpiler.cache = compile_cache.CompileCache(directory=directory)
+            transpiler.transpile(self.code)
+            path = os.path.join(directory, transpiler.cache.key(self.code) + ".pickle")
+            with open(path, "wb") as file:
+                pickle.dump({"warns": [], "errors": [], "program": b"\xe3\x00"}, file)
+            transpiler.cache = other = compile_cache.CompileCache(directory=directory)
+            warns, errors, program = transpiler.transpile(self.code)
+            self.assertEqual(other.misses, 1)
+            self.assertIsNotNone(program)
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import time
+import unittest
+
+from simulation.engine import HeadlessEngine
+
+
+class TestBaseEngine(unittest.TestCase):
+    robot = "mobile2"
+    circuit = "circuit"
+
+    def setUp(self):
+        self.engine = HeadlessEngine(self.robot, self.circuit)
+        with open(self.file, encoding="utf-8") as file:
+            self.loaded = self.engine.load(file.read())
+
+    def tearDown(self):
+        self.engine.stop()
+        return super().tearDown()
+
+
+class TestMobileForward(TestBaseEngine):
+    file = "tests/engine-tests/forward.txt"
+
+    def test_loaded(self):
+        self.assertTrue(self.loaded)
+        self.assertEqual(len(self.engine.errors), 0)
+
+    def test_step(self):
+        start = self.engine.pose()
+        pose = self.engine.step(10)
+        self.assertEqual(self.engine.time_ms, 10 * HeadlessEngine.TICK_MS)
+        self.assertEqual(pose["angle"], start["angle"])
+        self.assertLess(pose["y"], start["y"])
+
+    def test_run_until(self):
+        trace = self.engine.run_until(1000)
+        self.assertGreaterEqual(self.engine.time_ms, 1000)
+        self.assertEqual(len(trace), self.engine.time_ms / HeadlessEngine.TICK_MS)
+        self.assertEqual(len(trace[-1]["light"]), 2)
+
+
+class TestActuator(TestBaseEngine):
+    file = "tests/engine-tests/actuator.txt"
+    robot = "actuator"
+
+    def test_hits_right_button(self):
+        self.engine.run_until(3000)
+        self.assertEqual(self.engine.sensors()["button_right"], 0)
+        self.assertEqual(self.engine.sensors()["button_left"], 1)
+
+
+class TestExit(TestBaseEngine):
+    file = "tests/engine-tests/exit.txt"
+    robot = "mobile3"
+    circuit = "straight"
+
+    def test_stops_on_exit(self):
+        trace = self.engine.run_until(1000)
+        self.assertEqual(len(trace), 1)
+        self.assertFalse(self.engine.is_running())
+
+
+class TestDelay(TestBaseEngine):
+    file = "tests/engine-tests/delay.txt"
+
+    def test_delay_is_instant(self):
+        start = time.time()
+        self.engine.run_until(60000)
+        self.assertLess(time.time() - start, 10)
+        self.assertGreaterEqual(self.engine.time_ms, 60000)
+
+    def test_deterministic(self):
+        self.engine.run_until(5000)
+        output = [int(line) for line in self.engine.console.get_output().split()]
+        self.assertEqual(output, [16 + 1016 * i for i in range(0, 5)])
+
+    def test_moves_while_waiting(self):
+        self.engine.run_until(2000)
+        self.assertEqual(len(self.engine.trace), self.engine.time_ms // HeadlessEngine.TICK_MS)
+        self.assertLess(self.engine.trace[-1]["y"], self.engine.trace[0]["y"])
+
+
+class TestTranspilation(unittest.TestCase):
+
+    def setUp(self):
+        with open("tests/engine-tests/forward.txt", encoding="utf-8") as file:
+            self.code = file.read()
+
+    def test_in_memory(self):
+        engine = HeadlessEngine()
+        self.assertTrue(engine.load(self.code))
+        self.assertFalse(os.path.exists("temp/script_arduino.py"))
+
+    def test_dump(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "script_arduino.py")
+            engine = HeadlessEngine()
+            self.assertTrue(engine.load(self.code, path))
+            with open(path, encoding="utf-8") as file:
+                self.assertIn("def loop():", file.read())
+
+
+class TestCompilationErrors(unittest.TestCase):
+
+    def test_not_loaded(self):
+        engine = HeadlessEngine()
+        self.assertFalse(engine.load("void setup() {}"))
+        self.assertGreater(len(engine.errors), 0)
+        self.assertEqual(engine.step(5), engine.pose())
+        self.assertEqual(engine.time_ms, 0)
@@ -0,0 +1,140 @@
+import unittest
+
+import compiler.transpiler as transpiler
+import graphics.highlighter as highlighter
+
+
+class TestHighlighter(unittest.TestCase):
+
+    def setUp(self):
+        keywords = highlighter.read_keywords("assets/colors.txt")
+        self.highlighter = highlighter.Highlighter(keywords, transpiler.get_session().tokenize)
+        self.read = []
+
+    def update(self, text):
+        lines = text.split("\n")[:-1]
+
+        def get_line(line):
+            self.read.append(line)
+            return lines[line - 1]
+
+        self.read = []
+        return dict(self.highlighter.update(get_line, len(lines)))
+
+    def test_keywords(self):
+        lines = self.update("int a = HIGH;\n")
+        self.assertEqual(lines, {1: [(0, 3, "blue"), (8, 12, "blue")]})
+
+    def test_include(self):
+        lines = self.update("#include <Servo.h>\n")
+        self.assertEqual(lines, {1: [(0, 8, "green"), (10, 15, "orange")]})
+
+    def test_comments_hide_keywords(self):
+        lines = self.update("int a; // int b\n")
+        self.assertEqual(lines, {1: [(0, 3, "blue"), (7, 15, "dark")]})
+        self.highlighter.reset(1)
+        lines = self.update('Serial.print("int");\n')
+        self.assertIn((13, 18, "strblue"), lines[1])
+        self.assertNotIn((14, 17, "blue"), lines[1])
+
+    def test_block_comment(self):
+        lines = self.update("int a; /* int\nint */ int\n")
+        self.assertEqual(lines, {1: [(0, 3, "blue"), (7, 13, "gray")],
+                                 2: [(0, 6, "gray"), (7, 10, "blue")]})
+
+    def test_spans_are_sorted_regions(self):
+        code = 'int a = 1; /* int HIGH */ // LOW\nSerial.print("int /* x */"); /* a\nint */ char c = \'i\';\n'
+        for line, spans in self.update(code).items():
+            for (_, end, _), (start, _, _) in zip(spans, spans[1:]):
+                self.assertLessEqual(end, start)
+            for start, end, _ in spans:
+                self.assertIsInstance(start, int)
+                self.assertLess(start, end)
+        self.assertEqual(self.update(code), {})
+
+    def test_same_tokens_as_compiler(self):
+        code = "#include <Servo.h>\nint a; /* x\n\n*/ int b = $1;\n// c\nvoid loop() {\n  Serial.print(\"a /* b\");\n}\n"
+        self.update(code)
+        tokens, errors = self.highlighter.stream(code)
+        expected, expected_errors = transpiler.get_session().tokenize(code)
+        self.assertEqual([(t.type, t.start, t.stop, t.line, t.column, t.text) for t in tokens],
+                         [(t.type, t.start, t.stop, t.line, t.column, t.text) for t in expected])
+        self.assertEqual([e.to_string() for e in errors], [e.to_string() for e in expected_errors])
+        transpiler.share_tokens(code, tokens, errors)
+        self.assertIs(transpiler.tokenize(code)[0], tokens)
+
+    def test_no_stream(self):
+        code = "int a;\n/* int b;\n"
+        self.update(code)
+        self.assertIsNone(self.highlighter.stream(code))
+        self.update("int a;\nint b;\n")
+        self.assertIsNone(self.highlighter.stream(code))
+        self.highlighter.edit(2, 0, 0)
+        self.assertIsNone(self.highlighter.stream("int a;\nint b;\n"))
+
+    def test_only_changed_lines(self):
+        code = "void setup() {\n}\n\nvoid loop() {\n}\n"
+        self.assertEqual(list(self.update(code)), [1, 2, 3, 4, 5])
+        self.assertFalse(self.highlighter.is_dirty())
+        self.highlighter.edit(3, 0, 0)
+        updated = self.update(code.replace("\n\n", "\nint a;\n"))
+        self.assertEqual(updated, {3: [(0, 3, "blue")]})
+
+    def test_comment_propagates(self):
+        self.update("int a;\nint b;\nint c;\nint d;\n")
+        self.highlighter.edit(2, 0, 0)
+        updated = self.update("int a;\n/* int b;\nint c;\nint d; */\n")
+        self.assertEqual(list(updated), [2, 3, 4])
+        self.assertEqual(updated[3], [(0, 6, "gray")])
+
+    def test_inserted_and_removed_lines(self):
+        self.update("int a;\nint b;\n")
+        self.highlighter.edit(1, 0, 2)
+        updated = self.update("int a;\n/* x\ny */\nint b;\n")
+        self.assertEqual(list(updated), [1, 2, 3])
+        self.highlighter.edit(1, 2, 0)
+        updated = self.update("int a;\nint b;\n")
+        self.assertEqual(list(updated), [1])
+        self.assertEqual(len(self.highlighter.lines), 2)
+
+    def test_only_edited_lines_are_lexed(self):
+        code = "int a;\n" * 100
+        self.update(code)
+        self.assertEqual(len(self.read), 100)
+        self.highlighter.edit(50, 0, 0)
+        updated = self.update(code.replace("int a;", "int b; // c", 50).replace("int b; // c", "int a;", 49))
+        self.assertEqual(self.read, [50])
+        self.assertEqual(updated, {50: [(0, 3, "blue"), (7, 11, "dark")]})
+
+    def test_lexing_stops_after_comment(self):
+        lines = ["int a;"] * 10
+        self.update("\n".join(lines) + "\n")
+        lines[2] = "/* int a;"
+        self.highlighter.edit(3, 0, 0)
+        self.update("\n".join(lines) + "\n")
+        self.assertEqual(self.read, list(range(3, 11)))
+        lines[5] = "*/ int a;"
+        self.highlighter.edit(6, 0, 0)
+        updated = self.update("\n".join(lines) + "\n")
+        self.assertEqual(self.read, list(range(6, 11)))
+        self.assertEqual(updated[7], [(0, 3, "blue")])
+        lines[3] = "int b;"
+        self.highlighter.edit(4, 0, 0)
+        updated = self.update("\n".join(lines) + "\n")
+        self.assertEqual(self.read, [4])
+        self.assertEqual(updated, {4: [(0, 6, "gray")]})
+
+    def test_pending_edits_move(self):
+        self.update("int a;\nint b;\nint c;\n")
+        self.highlighter.edit(3, 0, 0)
+        self.highlighter.edit(1, 0, 2)
+        self.assertEqual(self.highlighter.dirty, {0, 1, 2, 4})
+        self.highlighter.edit(2, 1, 0)
+        self.assertEqual(self.highlighter.dirty, {0, 1, 3})
+        updated = self.update("int a;\nx\nint b;\nint c;\n")
+        self.assertEqual(list(updated), [1, 2, 4])
+        self.assertFalse(self.highlighter.is_dirty())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import http.server
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import bcrypt
+
+import output.login as login
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        info = json.loads(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        server = self.server
+        time.sleep(server.delay)
+        if self.path == "/infoLogin":
+            body = server.token.encode() if info["fromFile"] else server.hash
+        else:
+            server.token = "token%d" % len(server.logins)
+            server.logins.append(info["username"])
+            body = server.token.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestLogin(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.hash = bcrypt.hashpw(b"secret", bcrypt.gensalt(4))
+        self.server.token = "token"
+        self.server.logins = []
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = "http://127.0.0.1:%d" % self.server.server_address[1]
+        self.directory = tempfile.mkdtemp()
+        self.file = os.path.join(self.directory, "login.txt")
+
+    def tearDown(self):
+        self.stop_server()
+        shutil.rmtree(self.directory)
+        return super().tearDown()
+
+    def stop_server(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def validate(self, password, from_file=False):
+        return login.validate("UO1", password, "L1", "G1", from_file, self.url, self.file)
+
+    def test_login_saves_session(self):
+        result = self.validate("secret")
+        self.assertTrue(result.ok)
+        self.assertEqual(login.read_session(self.file), ["UO1", "token0", "L1", "G1"])
+
+    def test_wrong_password(self):
+        result = self.validate("wrong")
+        self.assertFalse(result.ok)
+        self.assertEqual(result.message, "Credenciales Incorrectas")
+        self.assertFalse(os.path.exists(self.file))
+
+    def test_session_from_file(self):
+        self.validate("secret")
+        username, token, lab, group = login.read_session(self.file)
+        self.assertTrue(self.validate(token, True).ok)
+        self.assertEqual(login.read_session(self.file)[1], "token1")
+
+    def test_timeout(self):
+        self.server.delay = 1
+        previous = login.TIMEOUT
+        login.TIMEOUT = (1, 0.1)
+        try:
+            result = self.validate("secret")
+        finally:
+            login.TIMEOUT = previous
+        self.assertFalse(result.ok)
+        self.assertEqual(result.message, "El servidor no responde")
+
+    def test_rejected_session_is_removed(self):
+        login.save_session("UO1", "old", "L1", "G1", self.file)
+        login.refresh_session("UO1", "old", "L1", "G1", self.url, self.file).join(5)
+        self.assertFalse(os.path.exists(self.file))
+
+    def test_offline_session_is_kept(self):
+        login.save_session("UO1", "token", "L1", "G1", self.file)
+        self.stop_server()
+        login.refresh_session("UO1", "token", "L1", "G1", self.url, self.file).join(5)
+        self.assertEqual(login.read_session(self.file), ["UO1", "token", "L1", "G1"])
+
+    def test_no_session(self):
+        self.assertIsNone(login.read_session(self.file))
+
+
+if __name__ == "__main__":
+    unittest.main()
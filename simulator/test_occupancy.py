@@ -0,0 +1,62 @@
+import random
+import unittest
+
+import files.files_reader as filesr
+import graphics.drawing as drawing
+import graphics.robot_drawings as robot_drawings
+
+
+class TestOccupancyMap(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        reader = filesr.RobotDataReader()
+        cls.circuits = {}
+        for data in reader.circuits:
+            parts, _ = reader.parse_circuit(data["name"])
+            cls.circuits[data["name"]] = robot_drawings.Circuit(parts, drawing.HeadlessDrawing())
+
+    def points(self, circuit, count=2000):
+        rng = random.Random(0)
+        points = []
+        for part in circuit.circuit_parts:
+            x0, y0, x1, y1 = part.bounds()
+            for _ in range(count // len(circuit.circuit_parts)):
+                points.append((rng.randint(int(x0) - 100, int(x1) + 100),
+                               rng.randint(int(y0) - 100, int(y1) + 100)))
+        return points
+
+    def test_same_as_geometric_test(self):
+        for name, circuit in self.circuits.items():
+            for x, y in self.points(circuit):
+                with self.subTest(circuit=name, x=x, y=y):
+                    self.assertEqual(circuit.is_overlapping(x, y), bool(circuit.check_overlap(x, y)))
+
+    def test_batch(self):
+        circuit = self.circuits["node circuit"]
+        points = self.points(circuit)
+        expected = [circuit.is_overlapping(x, y) for x, y in points]
+        self.assertIn(True, expected)
+        self.assertEqual(circuit.are_overlapping([x for x, _ in points], [y for _, y in points]), expected)
+
+    def test_outside_bitmap(self):
+        circuit = self.circuits["straight"]
+        self.assertFalse(circuit.is_overlapping(-10000, 10000))
+        self.assertEqual(circuit.are_overlapping([-10000, 100000], [0, 0]), [False, False])
+
+    def test_circuit_without_pieces(self):
+        circuit = self.circuits["obstacle"]
+        self.assertFalse(circuit.is_overlapping(600, 600))
+        self.assertEqual(circuit.are_overlapping([600], [600]), [False])
+
+    def test_resolution(self):
+        parts = filesr.RobotDataReader().parse_circuit("straight")[0]
+        circuit = robot_drawings.Circuit(parts, drawing.HeadlessDrawing(), resolution=5)
+        full = self.circuits["straight"].occupancy.bitmap
+        self.assertLess(circuit.occupancy.bitmap.size, full.size / 20)
+        part = circuit.circuit_parts[0]
+        self.assertTrue(circuit.is_overlapping(part.x + 50, part.y + 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+
+import graphics.drawing as drawing
+import graphics.layers as layers
+
+
+class RecordingCanvas:
+
+    def __init__(self):
+        self.calls = []
+        self.next_item = 0
+
+    def __record(self, operation, *args, **kwargs):
+        self.calls.append((operation, args, kwargs))
+        if operation.startswith("create_"):
+            self.next_item += 1
+            return self.next_item
+        return None
+
+    def __getattr__(self, operation):
+        return lambda *args, **kwargs: self.__record(operation, *args, **kwargs)
+
+
+class RecordingDrawing(drawing.Drawing):
+
+    def photo(self, image_path, angle=0):
+        # The photos need a display, the tests compare their keys
+        return (image_path, angle % 360, self.scale)
+
+
+class TestScene(unittest.TestCase):
+
+    def setUp(self):
+        self.canvas = RecordingCanvas()
+        self.drawing = RecordingDrawing()
+        self.drawing.set_canvas(self.canvas)
+        self.drawing.set_size(1000, 1000)
+        self.element = {"x": 100, "y": 200, "image": "assets/mobile-robot.png"}
+        self.drawing.draw_image(self.element, "robot")
+        self.drawing.set_deferred(True)
+
+    def test_created_once(self):
+        self.assertEqual(self.drawing.frame_ops, {"create_image": 1})
+
+    def test_rotation_configures_item(self):
+        for angle in (5, 10, 15):
+            self.drawing.rotate_image(self.element, angle, "robot")
+        self.drawing.render()
+        self.assertEqual(self.drawing.frame_ops, {"itemconfigure": 1})
+        self.assertEqual(self.canvas.calls[-1][2]["image"][1], 15)
+
+    def test_move_and_rotation_in_one_frame(self):
+        self.drawing.move_image("robot", 150, 200)
+        self.drawing.rotate_image(self.element, 90, "robot")
+        self.drawing.render()
+        self.assertEqual(self.drawing.frame_ops, {"coords": 1, "itemconfigure": 1})
+        self.assertIn(("coords", (1, 150 * 0.2, 200 * 0.2), {}), self.canvas.calls)
+
+    def test_unchanged_redraw_is_free(self):
+        self.drawing.redraw_image(self.element, "robot")
+        self.drawing.move_image("robot", 150, 200)
+        self.drawing.move_image("robot", 100, 200)
+        self.drawing.render()
+        self.assertEqual(self.drawing.frame_ops, {})
+
+    def test_visibility(self):
+        self.drawing.set_visible("robot", False)
+        self.drawing.render()
+        self.assertEqual(self.canvas.calls[-1], ("itemconfigure", (1,), {"state": "hidden"}))
+        self.drawing.set_visible("robot", False)
+        self.drawing.render()
+        self.assertEqual(self.drawing.frame_ops, {})
+
+    def test_zoom_keeps_items(self):
+        self.drawing.draw_rectangle({"x": 0, "y": 0, "width": 100, "height": 50,
+                                     "color": "black", "group": "circuit"})
+        self.drawing.render()
+        self.drawing.zoom_in()
+        self.drawing.render()
+        self.assertEqual(self.drawing.frame_ops, {"coords": 1, "itemconfigure": 1, "scale": 1})
+        operation, (group, x, y, factor, _), _ = self.canvas.calls[-1]
+        self.assertEqual((operation, group, x, y), ("scale", "circuit", 0, 0))
+        self.assertAlmostEqual(factor, 1.5)
+
+    def test_zoom_scales_arc_width(self):
+        arc = {"x": 0, "y": 0, "width": 100, "height": 100, "track_width": 100,
+               "angle": 90, "starting_angle": 0, "group": "circuit"}
+        self.drawing.draw_shapes("circuit", [("arc", arc), ("arc", dict(arc, x=200))])
+        self.drawing.render()
+        self.drawing.zoom_out()
+        self.drawing.render()
+        self.assertIn(("itemconfigure", ("circuit-arc-100",), {"width": 10}), self.canvas.calls)
+
+    def test_same_shapes_are_reused(self):
+        shapes = [("rectangle", {"x": 0, "y": 0, "width": 100, "height": 50,
+                                 "color": "black", "group": "circuit"})]
+        self.drawing.draw_shapes("circuit", shapes)
+        self.drawing.render()
+        self.drawing.empty_drawing()
+        self.assertEqual(self.drawing.frame_ops, {"delete": 1, "itemconfigure": 1})
+        self.drawing.draw_shapes("circuit", list(shapes))
+        self.drawing.render()
+        self.assertEqual(self.drawing.frame_ops, {"itemconfigure": 1})
+
+    def test_total_ops(self):
+        self.drawing.move_image("robot", 150, 200)
+        self.drawing.render()
+        self.assertEqual(self.drawing.total_ops, {"create_image": 1, "coords": 1})
+
+
+class TestLayerOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.canvas = RecordingCanvas()
+        self.layer = layers.MobileRobotLayer(3, headless=True)
+        self.layer.drawing = RecordingDrawing()
+        self.layer.drawing.set_canvas(self.canvas)
+        self.layer.drawing.set_size(6300, 4300)
+        self.layer.set_circuit(0)
+        self.layer.execute()
+        self.layer.set_deferred(True)
+
+    def frame(self, keys, ticks=5):
+        movement = {"w": False, "a": False, "s": False, "d": False}
+        movement.update(keys)
+        for _ in range(ticks):
+            self.layer.move(True, movement)
+        self.layer.render()
+        return self.layer.drawing.frame_ops
+
+    def test_turning_frame(self):
+        ops = self.frame({"a": True})
+        # The robot changes its image and the three sensors move
+        self.assertEqual(ops, {"itemconfigure": 1, "coords": 3})
+
+    def test_idle_frame(self):
+        self.frame({})
+        self.assertEqual(self.frame({}), {})
+
+    def test_circuit_reused_on_execution(self):
+        self.layer.set_deferred(False)
+        self.layer.drawing.total_ops.clear()
+        self.layer.stop()
+        self.layer.execute()
+        ops = self.layer.drawing.total_ops
+        self.assertNotIn("create_rectangle", ops)
+        self.assertNotIn("create_arc", ops)
+        self.assertEqual(ops["create_image"], 4)
+
+    def test_zoom_node_circuit(self):
+        self.layer.set_circuit(5)
+        self.layer.execute()
+        self.layer.render()
+        self.assertGreater(len(self.layer.circuit.circuit_parts), 10)
+        self.layer.zoom_in()
+        ops = self.frame({}, 0)
+        # The circuit and the hidden obstacle of the first circuit are
+        # scaled as groups, the robot and the sensors change their
+        # position and image
+        self.assertEqual(ops["scale"], 2)
+        self.assertEqual(ops["itemconfigure"], 1 + 4)
+        self.assertNotIn("delete", ops)
+        self.assertNotIn("create_rectangle", ops)
+
+
+if __name__ == '__main__':
+    unittest.main()
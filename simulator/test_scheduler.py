@@ -0,0 +1,88 @@
+import time
+import unittest
+
+import graphics.drawing as drawing
+import graphics.layers as layers
+import graphics.scene as scene
+import simulation.scheduler as scheduler
+from simulation.engine import HeadlessEngine
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.view = HeadlessEngine()
+        self.layer = layers.MobileRobotLayer(2, headless=True)
+        self.layer.set_circuit(0)
+        self.layer.execute()
+        self.loops = 0
+
+    def count_loop(self):
+        self.loops += 1
+
+    def test_fast_renders_once_per_frame(self):
+        sch = scheduler.Scheduler(self.layer, self.view, self.count_loop, scheduler.FAST)
+        sch.frame()
+        self.assertEqual(sch.frames, 1)
+        self.assertGreater(sch.ticks, 1)
+        self.assertEqual(self.loops, sch.ticks)
+        self.assertEqual(sch.clock.now_ns(), sch.ticks * scheduler.Scheduler.TICK_MS * 1000000)
+
+    def test_real_time(self):
+        sch = scheduler.Scheduler(self.layer, self.view, self.count_loop)
+        time.sleep(0.2)
+        sch.frame()
+        self.assertEqual(sch.frames, 1)
+        self.assertGreaterEqual(sch.ticks, 200 // scheduler.Scheduler.TICK_MS)
+        self.assertLess(sch.ticks, 2000 // scheduler.Scheduler.TICK_MS)
+
+    def test_scaled_is_faster(self):
+        sch = scheduler.Scheduler(self.layer, self.view, None, scheduler.SCALED, 10)
+        time.sleep(0.1)
+        sch.frame()
+        self.assertGreaterEqual(sch.clock.now_ns(), 1000 * 1000000)
+
+    def test_delay_is_paced(self):
+        sch = scheduler.Scheduler(self.layer, self.view)
+        start = time.time()
+        sch.call(lambda: sch.clock.sleep(200 * 1000000))
+        self.assertGreaterEqual(time.time() - start, 0.15)
+        self.assertGreater(sch.frames, 0)
+
+    def test_set_mode_keeps_time(self):
+        sch = scheduler.Scheduler(self.layer, self.view, None, scheduler.FAST)
+        sch.frame()
+        now = sch.clock.now_ns()
+        sch.set_mode(scheduler.REAL_TIME)
+        sch.frame()
+        self.assertLess(sch.clock.now_ns() - now, 1000 * 1000000)
+
+
+class TestDeferredDrawing(unittest.TestCase):
+
+    def setUp(self):
+        self.drawing = drawing.Drawing()
+        self.drawing.set_deferred(True)
+        self.element = {"x": 0, "y": 0, "image": "assets/mobile-part.png"}
+        self.drawing.draw_image(self.element, "robot")
+        self.node = self.drawing.nodes["robot"]
+
+    def test_last_move_is_kept(self):
+        self.drawing.move_image("robot", 1, 1)
+        self.drawing.move_image("robot", 2, 3)
+        self.assertEqual((self.node.x, self.node.y), (2, 3))
+        self.assertEqual(list(self.drawing.dirty), ["robot"])
+
+    def test_rotation_after_move(self):
+        self.drawing.move_image("robot", 1, 1)
+        self.drawing.rotate_image(self.element, 90, "robot")
+        self.assertEqual((self.node.x, self.node.y), (1, 1))
+        self.assertEqual(self.node.angle, 90)
+        self.assertEqual(self.node.dirty, {scene.POSITION, scene.IMAGE})
+
+    def test_move_after_rotation(self):
+        self.drawing.rotate_image(self.element, 90, "robot")
+        self.drawing.move_image("robot", 1, 1)
+        self.assertEqual((self.node.x, self.node.y), (1, 1))
+        self.assertEqual(self.node.angle, 90)
+        self.assertEqual(self.node.dirty, {scene.POSITION, scene.IMAGE})
@@ -0,0 +1,50 @@
+import unittest
+
+import graphics.sprites as sprites
+
+
+class TestSpriteAtlas(unittest.TestCase):
+
+    def setUp(self):
+        self.atlas = sprites.SpriteAtlas("assets/mobile-robot.png", max_scales=2)
+
+    def wait(self, scale):
+        thread = self.atlas.threads.get(scale)
+        if thread is not None:
+            thread.join(10)
+
+    def test_angle_key(self):
+        self.assertEqual(self.atlas.angle_key(0), 0)
+        self.assertEqual(self.atlas.angle_key(360), 0)
+        self.assertEqual(self.atlas.angle_key(-5), 355)
+        self.assertEqual(self.atlas.angle_key(92), 90)
+
+    def test_frame_matches_rotation(self):
+        frame = self.atlas.frame(90, 0.2)
+        rotated = self.atlas.image.rotate(90, expand=True)
+        self.assertEqual(frame.size, (int(rotated.width * 0.2), int(rotated.height * 0.2)))
+
+    def test_frame_is_reused(self):
+        frame = self.atlas.frame(45, 0.2)
+        self.assertIs(self.atlas.frame(45, 0.2), frame)
+        self.assertIs(self.atlas.frame(405, 0.2), frame)
+
+    def test_scale_prerendered_in_background(self):
+        self.atlas.frame(0, 0.3)
+        self.wait(0.3)
+        self.assertTrue(self.atlas.is_complete(0.3))
+        self.assertIsNone(self.atlas.prerender(0.3))
+
+    def test_least_recently_used_scale_is_dropped(self):
+        self.atlas.frame(0, 0.1)
+        self.atlas.frame(0, 0.2)
+        self.atlas.frame(0, 0.1)
+        self.atlas.frame(0, 0.3)
+        for scale in (0.1, 0.2, 0.3):
+            self.wait(scale)
+        self.assertEqual(list(self.atlas.scales), [0.1, 0.3])
+        self.assertFalse(self.atlas.is_complete(0.2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import unittest
+
+import startup
+
+
+class TestStartup(unittest.TestCase):
+
+    def setUp(self):
+        self.timings = list(startup.timings)
+
+    def tearDown(self):
+        startup.timings[:] = self.timings
+        return super().tearDown()
+
+    def test_measure(self):
+        with startup.measure("block"):
+            pass
+        startup.mark("moment")
+        names = [name for name, _ in startup.timings[len(self.timings):]]
+        self.assertEqual(names, ["block", "moment"])
+
+    def test_preload(self):
+        startup.preload().join(60)
+        self.assertIn("graphics.gui", sys.modules)
+        self.assertIn("compiler.transpiler", sys.modules)
+        names = [name for name, _ in startup.timings]
+        self.assertIn("import graphics.gui (segundo plano)", names)
+
+    def test_login_window_imports(self):
+        code = ("import sys, graphics.login_window; "
+                "print(','.join(m for m in ('graphics.gui', 'compiler.ArduinoParser', 'requests', 'bcrypt', 'PIL')"
+                " if m in sys.modules))")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                env=dict(os.environ, PYTHONPATH="simulator"))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
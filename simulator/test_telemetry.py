@@ -0,0 +1,298 @@
+import gzip
+import http.server
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import compiler.commands as commands
+import output.telemetry as telemetry
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        server = self.server
+        server.sizes.append(len(data))
+        server.encodings.append(self.headers.get("Content-Encoding"))
+        if self.headers.get("Content-Encoding") == "gzip":
+            if not server.gzip:
+                # An old server that can not read the body
+                self.send_response(400)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = gzip.decompress(data)
+        body = json.loads(data)
+        status = server.status
+        if isinstance(body, list) and not server.batches:
+            status = server.list_status
+        if status < 300:
+            status = self.store(body if isinstance(body, list) else [body])
+        if status < 300:
+            server.bodies.append(body)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        if server.gzip:
+            self.send_header("Accept-Encoding", "gzip")
+        if server.batches:
+            self.send_header(telemetry.BATCH_HEADER, "1")
+        if server.diff:
+            self.send_header(telemetry.DIFF_HEADER, "1")
+        self.end_headers()
+
+    def store(self, texts):
+        versions = dict(self.server.versions)
+        records = []
+        for text in texts:
+            record = json.loads(text)
+            if record.get("codigo") is None and "codigo_diff" in record and self.server.diff:
+                if record["codigo_base"] not in versions:
+                    return 409
+                record["codigo"] = telemetry.apply_diff(versions[record["codigo_base"]], record["codigo_diff"])
+            if "codigo" in record:
+                self.server.test.assertEqual(telemetry.code_hash(record["codigo"]), record["codigo_sha256"])
+                versions[record["codigo_sha256"]] = record["codigo"]
+            records.append(record)
+        self.server.versions = versions
+        self.server.records.extend(records)
+        return 200
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestUploader(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.status = 200
+        self.server.batches = True
+        self.server.list_status = 400
+        self.server.bodies = []
+        self.server.records = []
+        self.server.sizes = []
+        self.server.encodings = []
+        self.server.gzip = True
+        self.server.diff = True
+        self.server.versions = {}
+        self.server.test = self
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.directory = tempfile.mkdtemp()
+        self.spool = os.path.join(self.directory, "executions.jsonl")
+        self.uploader = None
+
+    def tearDown(self):
+        if self.uploader is not None:
+            self.uploader.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+        return super().tearDown()
+
+    def start(self, **kwargs):
+        url = "http://127.0.0.1:%d/insertaEjecucion" % self.server.server_address[1]
+        self.uploader = telemetry.Uploader(url, self.spool, backoff=0.01, max_backoff=0.05, **kwargs)
+        return self.uploader
+
+    def received(self, *fields):
+        fields = fields or ("n",)
+        return [{field: record[field] for field in fields} for record in self.server.records]
+
+    def test_single_execution(self):
+        self.start().start()
+        self.uploader.submit({"codigo": "void setup() {}", "username": "uo1"})
+        self.assertTrue(self.uploader.flush(5))
+        self.assertEqual(self.server.bodies, [telemetry.encode({"codigo": "void setup() {}", "username": "uo1"})])
+        self.assertEqual(self.received("codigo", "username"), [{"codigo": "void setup() {}", "username": "uo1"}])
+
+    def test_batches(self):
+        uploader = self.start(batch_size=3)
+        for i in range(7):
+            uploader.submit({"n": i})
+        uploader.start()
+        self.assertTrue(uploader.flush(5))
+        # The first execution goes alone, until the server says it accepts lists
+        self.assertEqual([len(body) if isinstance(body, list) else 1 for body in self.server.bodies], [1, 3, 3])
+        self.assertEqual(self.received(), [{"n": i} for i in range(7)])
+
+    def test_server_fails_with_lists(self):
+        self.server.batches = False
+        self.server.list_status = 500
+        uploader = self.start(batch_size=3)
+        uploader.spool.append([{"n": i} for i in range(3)])
+        uploader.start()
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(self.received(), [{"n": i} for i in range(3)])
+        self.assertEqual(uploader.spool.read(), [])
+        self.assertEqual(uploader.failures, 0)
+
+    def test_server_without_batches(self):
+        self.server.batches = False
+        uploader = self.start(batch_size=3)
+        for i in range(4):
+            uploader.submit({"n": i})
+        uploader.start()
+        self.assertTrue(uploader.flush(5))
+        self.assertFalse(uploader.batching)
+        self.assertEqual(self.received(), [{"n": i} for i in range(4)])
+
+    def test_spool_and_replay(self):
+        self.server.status = 503
+        uploader = self.start().start()
+        uploader.submit({"n": 1})
+        uploader.submit({"n": 2})
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(uploader.spool.read(), [{"n": 1}, {"n": 2}])
+        self.server.status = 200
+        uploader.replay()
+        uploader.submit({"n": 3})
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(self.received(), [{"n": 1}, {"n": 2}, {"n": 3}])
+        self.assertFalse(os.path.exists(self.spool))
+
+    def test_full_queue_goes_to_spool(self):
+        uploader = self.start(queue_size=1)
+        uploader.submit({"n": 1})
+        uploader.submit({"n": 2})
+        self.assertEqual(uploader.spool.read(), [{"n": 2}])
+        uploader.start()
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(sorted(record["n"] for record in self.received()), [1, 2])
+
+    def test_legacy_spool(self):
+        with open(os.path.join(self.directory, telemetry.LEGACY_SPOOL), "w") as file:
+            for i in range(2):
+                file.write(json.dumps({"n": i}, sort_keys=True, indent=4))
+                file.write(telemetry.LEGACY_SEPARATOR)
+        self.start().start()
+        self.assertTrue(self.uploader.flush(5))
+        self.assertEqual(self.received(), [{"n": 0}, {"n": 1}])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, telemetry.LEGACY_SPOOL)))
+
+    def test_delta(self):
+        code = "".join("int a%d = %d;\n" % (i, i) for i in range(50))
+        edited = code.replace("a10 = 10", "a10 = 11")
+        uploader = self.start().start()
+        uploader.submit({"codigo": code, "n": 1})
+        self.assertTrue(uploader.flush(5))
+        uploader.submit({"codigo": edited, "n": 2})
+        self.assertTrue(uploader.flush(5))
+        delta = json.loads(self.server.bodies[1])
+        self.assertIsNone(delta["codigo"])
+        self.assertEqual(delta["codigo_base"], telemetry.code_hash(code))
+        self.assertEqual(self.received("codigo", "n"), [{"codigo": code, "n": 1}, {"codigo": edited, "n": 2}])
+        self.assertLess(self.server.sizes[1], self.server.sizes[0])
+
+    def test_unknown_base(self):
+        uploader = self.start().start()
+        uploader.submit({"codigo": "void setup() {\n}\n" * 20, "n": 1})
+        self.assertTrue(uploader.flush(5))
+        self.server.versions = {}
+        uploader.submit({"codigo": "void setup() {\n}\n" * 21, "n": 2})
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(self.received(), [{"n": 1}, {"n": 2}])
+        self.assertEqual(json.loads(self.server.bodies[1])["codigo"], "void setup() {\n}\n" * 21)
+
+    def test_negotiation(self):
+        uploader = self.start().start()
+        for i in range(2):
+            uploader.submit({"n": i})
+            self.assertTrue(uploader.flush(5))
+        self.assertEqual(self.server.encodings, [None, "gzip"])
+        self.assertTrue(uploader.compress)
+        self.assertTrue(uploader.delta)
+
+    def test_old_server(self):
+        self.server.gzip = False
+        self.server.diff = False
+        code = "".join("int a%d = %d;\n" % (i, i) for i in range(50))
+        edited = code.replace("a10 = 10", "a10 = 11")
+        uploader = self.start().start()
+        uploader.submit({"codigo": code, "n": 1})
+        self.assertTrue(uploader.flush(5))
+        uploader.submit({"codigo": edited, "n": 2})
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(self.server.encodings, [None, None])
+        self.assertEqual(self.received("codigo", "n"), [{"codigo": code, "n": 1}, {"codigo": edited, "n": 2}])
+        self.assertEqual(uploader.rejected.read(), [])
+
+    def test_diff(self):
+        base = "a\nb\nc\nd\n"
+        for code in ["a\nb\nc\nd\n", "a\nx\nc\nd\ne", "", "b\nc\n", "z\n" + base]:
+            self.assertEqual(telemetry.apply_diff(base, telemetry.diff(base, code)), code)
+
+    def test_rejected_execution(self):
+        self.server.status = 400
+        uploader = self.start().start()
+        uploader.submit({"n": 1})
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(self.received(), [])
+        self.assertEqual(uploader.sent, 0)
+        self.assertEqual(uploader.spool.read(), [])
+        self.assertEqual(uploader.rejected.read(), [{"n": 1}])
+        self.server.status = 200
+        uploader.submit({"n": 2})
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(self.received(), [{"n": 2}])
+
+    def test_retry_later(self):
+        self.server.status = 429
+        uploader = self.start().start()
+        uploader.submit({"n": 1})
+        self.assertTrue(uploader.flush(5))
+        self.assertEqual(uploader.spool.read(), [{"n": 1}])
+        self.assertEqual(uploader.rejected.read(), [])
+
+    def test_close_keeps_pending(self):
+        uploader = self.start()
+        uploader.submit({"n": 1})
+        uploader.close()
+        self.uploader = None
+        self.assertEqual(telemetry.Spool(self.spool).read(), [{"n": 1}])
+
+
+class RecordingConsole:
+
+    def __init__(self):
+        self.errors = []
+
+    def write_error(self, error):
+        self.errors.append(error)
+
+
+class TestConnectionErrors(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.uploader = telemetry.Uploader("http://127.0.0.1:1/", os.path.join(self.directory, "executions.jsonl"))
+        self.controller = type("Controller", (), {"console": RecordingConsole()})()
+        self.command = commands.Compile(self.controller, "user", "lab", "group", self.uploader)
+
+    def tearDown(self):
+        self.uploader.close()
+        shutil.rmtree(self.directory)
+        return super().tearDown()
+
+    def test_reachable(self):
+        self.command.send("void setup() {}", [], [])
+        self.assertEqual(self.controller.console.errors, [])
+
+    def test_unreachable(self):
+        self.uploader.failures = 1
+        self.command.send("void setup() {}", [], [])
+        self.assertEqual([e.r_type for e in self.controller.console.errors], ["Error de conexión"])
+
+    def test_failing(self):
+        self.uploader.failures = telemetry.MAX_FAILURES
+        self.assertTrue(self.uploader.is_failing())
+        self.command.send("void setup() {}", [], [])
+        self.assertEqual(len(self.controller.console.errors), 2)
+        self.assertIn(str(telemetry.MAX_FAILURES), self.controller.console.errors[1].message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import contextlib
+import glob
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+from antlr4 import *
+from compiler.ArduinoLexer import ArduinoLexer
+from compiler.ArduinoParser import ArduinoParser
+import compiler.ast_builder_visitor as ast_builder_visitor
+import compiler.ast_visitor as ast_visitor
+import compiler.passes as passes
+import compiler.transpiler as transpiler
+import libraries.libs as libraries
+
+
+class TestSession(unittest.TestCase):
+
+    def setUp(self):
+        self.session = transpiler.CompilerSession()
+        with open("tests/engine-tests/forward.txt", encoding="utf-8") as file:
+            self.code = file.read()
+
+    def test_reuse(self):
+        first = self.session.transpile(self.code)
+        second = self.session.transpile(self.code)
+        self.assertEqual(len(first[1]), 0)
+        self.assertEqual(len(second[1]), 0)
+        self.assertEqual(first[2], second[2])
+
+    def test_errors_do_not_leak(self):
+        warns, errors, program = self.session.transpile("void setup() {")
+        self.assertGreater(len(errors), 0)
+        warns, errors, program = self.session.transpile(self.code)
+        self.assertEqual(len(errors), 0)
+        self.assertIsNotNone(program)
+
+    def test_includes_do_not_leak(self):
+        self.session.transpile(self.code)
+        self.assertIn("Servo", self.session.lib_manager.library_methods)
+        self.session.transpile("void setup() {}\nvoid loop() {}\n")
+        self.assertNotIn("Servo", self.session.lib_manager.library_methods)
+
+    def test_same_session_per_thread(self):
+        self.assertIs(transpiler.get_session(), transpiler.get_session())
+
+    def test_timings(self):
+        self.session.transpile(self.code)
+        self.assertEqual(list(self.session.timings), ["lex", "parse", "ast", "declarations+functions",
+                                                      "semantic", "codegen", "warnings", "compile"])
+
+
+class TestWarmUp(unittest.TestCase):
+
+    def setUp(self):
+        self.previous = transpiler.warm_up_stats
+
+    def tearDown(self):
+        transpiler.warm_up_stats = self.previous
+        return super().tearDown()
+
+    def test_warm_up(self):
+        transpiler.warm_up()
+        sketches, elapsed = transpiler.warm_up_stats
+        self.assertEqual(sketches, len(glob.glob(os.path.join(transpiler.WARM_UP_DIR, "*.txt"))))
+        self.assertGreater(sketches, 0)
+        self.assertGreater(elapsed, 0)
+        self.assertGreater(sum(len(dfa._states) for dfa in ArduinoParser.decisionsToDFA), 0)
+        self.assertIn("warm-up:", transpiler.CompilerSession().report())
+
+    def test_warm_up_without_sketches(self):
+        directory = tempfile.mkdtemp()
+        try:
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                transpiler.warm_up(directory)
+        finally:
+            os.rmdir(directory)
+        self.assertEqual(transpiler.warm_up_stats[0], 0)
+        self.assertIn("no se han encontrado sketches", output.getvalue())
+
+    def test_lexer_waits_for_other_threads(self):
+        session = transpiler.CompilerSession()
+        results = []
+        with transpiler._antlr_lock:
+            thread = threading.Thread(target=lambda: results.append(session.tokenize("int a;")))
+            thread.start()
+            thread.join(0.1)
+            self.assertEqual(results, [])
+        thread.join(5)
+        self.assertEqual(len(results[0][0]), 4)
+
+    def test_warm_up_does_not_change_results(self):
+        session = transpiler.CompilerSession()
+        session.warm_up(["void setup() {"])
+        warns, errors, program = session.transpile("void setup() {}\nvoid loop() {}\n")
+        self.assertEqual(errors, [])
+        self.assertIsNotNone(program)
+
+
+class FunctionCounter(ast_visitor.ASTVisitor):
+
+    def __init__(self):
+        self.names = []
+
+    def visit_function(self, function, param):
+        self.names.append(function.name)
+
+
+class TestPassManager(unittest.TestCase):
+
+    def setUp(self):
+        with open("tests/engine-tests/forward.txt", encoding="utf-8") as file:
+            code = file.read()
+        parser = ArduinoParser(CommonTokenStream(ArduinoLexer(InputStream(code))))
+        self.ast = ast_builder_visitor.ASTBuilderVisitor().visitProgram(parser.program())
+
+    def test_hook_is_fused(self):
+        manager = passes.PassManager()
+        walk = manager.add("walk", ast_visitor.ASTVisitor)
+        hook = manager.add("counter", FunctionCounter, hook=True)
+        manager.run(self.ast)
+        self.assertEqual(manager.walks, 1)
+        self.assertEqual(hook.visitor.names, ["setup", "loop"])
+        self.assertNotIn("visit_function", vars(walk.visitor))
+
+    def test_required_hook_runs_alone(self):
+        manager = passes.PassManager()
+        manager.add("walk", ast_visitor.ASTVisitor, requires=["counter"])
+        hook = manager.add("counter", FunctionCounter, hook=True)
+        manager.run(self.ast)
+        self.assertEqual(manager.walks, 2)
+        self.assertEqual(hook.visitor.names, ["setup", "loop"])
+
+    def test_order(self):
+        manager = passes.PassManager()
+        manager.add("second", ast_visitor.ASTVisitor, requires=["first"])
+        manager.add("first", ast_visitor.ASTVisitor)
+        manager.run(self.ast)
+        self.assertEqual(list(manager.timings), ["first", "second"])
+
+    def test_when(self):
+        manager = passes.PassManager()
+        manager.add("first", ast_visitor.ASTVisitor)
+        manager.add("second", ast_visitor.ASTVisitor, when=lambda: False)
+        manager.run(self.ast)
+        self.assertEqual(manager.walks, 1)
+
+    def test_later_pass_runs_after_skipped(self):
+        manager = passes.PassManager()
+        manager.add("first", ast_visitor.ASTVisitor)
+        manager.add("second", ast_visitor.ASTVisitor, when=lambda: False)
+        manager.add("third", ast_visitor.ASTVisitor)
+        manager.add("fourth", ast_visitor.ASTVisitor, requires=["second"])
+        manager.run(self.ast)
+        self.assertEqual(manager.walks, 2)
+        self.assertEqual(list(manager.timings), ["first", "third"])
+
+    def test_circular(self):
+        manager = passes.PassManager()
+        manager.add("first", ast_visitor.ASTVisitor, requires=["second"])
+        manager.add("second", ast_visitor.ASTVisitor, requires=["first"])
+        with self.assertRaises(ValueError):
+            manager.run(self.ast)
+
+
+class TestRegistry(unittest.TestCase):
+
+    def test_registry_is_not_modified(self):
+        manager = libraries.LibraryManager()
+        manager.add_library("Servo.h")
+        self.assertIn("Servo", manager.library_methods)
+        self.assertNotIn("Servo", libraries.REGISTRY.library_methods)
+        with self.assertRaises(TypeError):
+            libraries.REGISTRY.library_methods["Servo"] = {}
+
+
+class TestIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = libraries.LibraryManager()
+
+    def test_lookup(self):
+        library, signature = self.manager.lookup("digitalWrite")
+        self.assertEqual(library, "Standard")
+        self.assertEqual(signature[1], "digital_write")
+        self.assertIsNone(self.manager.lookup("notAFunction"))
+
+    def test_included_library(self):
+        self.assertIsNone(self.manager.lookup("attach"))
+        self.manager.add_library("Servo.h")
+        self.assertEqual(self.manager.lookup("attach")[0], "Servo")
+        self.manager.reset()
+        self.assertIsNone(self.manager.lookup("attach"))
+
+    def test_ambiguity(self):
+        self.manager.add_library("Servo.h")
+        self.assertTrue(self.manager.is_ambiguous("write"))
+        self.assertFalse(self.manager.is_ambiguous("attach"))
+        self.assertEqual([entry[0] for entry in self.manager.lookup_all("write")], ["Serial", "Servo"])
+        self.assertEqual(self.manager.lookup("write", "Servo")[0], "Servo")
+        self.assertEqual(self.manager.lookup("write")[0], "Serial")
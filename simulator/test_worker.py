@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+
+import compiler.commands as commands
+import compiler.worker as worker
+
+
+class TestWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = worker.CompileWorker()
+        self.results = []
+
+    def tearDown(self):
+        self.worker.shutdown()
+        return super().tearDown()
+
+    def wait(self):
+        deadline = time.time() + 5
+        while self.worker.poll():
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_callback_in_polling_thread(self):
+        threads = []
+
+        def job(value):
+            threads.append(threading.current_thread())
+            return value * 2
+
+        self.worker.submit(job, 21, callback=self.results.append)
+        self.wait()
+        self.assertEqual(self.results, [42])
+        self.assertIsNot(threads[0], threading.current_thread())
+        self.assertFalse(self.worker.busy())
+
+    def test_cancelled_result_is_discarded(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def job(value):
+            started.set()
+            release.wait(5)
+            return value
+
+        first = self.worker.submit(job, 1, callback=self.results.append)
+        second = self.worker.submit(job, 2, callback=self.results.append)
+        started.wait(5)
+        first.cancel()
+        second.cancel()
+        release.set()
+        self.wait()
+        self.assertEqual(self.results, [])
+
+    def test_exception(self):
+        errors = []
+        self.worker.submit(lambda: 1 / 0, callback=self.results.append, error=errors.append)
+        self.worker.submit(lambda: 2, callback=self.results.append)
+        self.wait()
+        self.assertEqual(self.results, [2])
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+
+    def test_compile_in_background(self):
+        command = commands.Compile(None, "user", "lab", "group")
+        with open("tests/engine-tests/forward.txt", encoding="utf-8") as file:
+            code = file.read()
+        self.worker.submit(command.compile, code, callback=self.results.append)
+        self.wait()
+        warns, errors, program = self.results[0]
+        self.assertEqual(errors, [])
+        self.assertIsNotNone(program)
+
+
+if __name__ == "__main__":
+    unittest.main()